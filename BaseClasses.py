@@ -5,6 +5,7 @@ import functools
 import logging
 import random
 import secrets
+import threading
 import warnings
 from argparse import Namespace
 from collections import Counter, deque, defaultdict
@@ -102,6 +103,8 @@ class MultiWorld():
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
+    sphere_cache: Optional[SphereCache] = None
+    """Set once placements are final, to share sphere searches between output steps."""
 
     class AttributeProxy():
         def __init__(self, rule):
@@ -590,24 +593,38 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
+        if self.sphere_cache is not None:
+            spheres, unreachable, _ = self.sphere_cache.get("locations", self._search_location_spheres)
+            remaining = set(self.get_filled_locations())
+            for sphere in spheres:
+                if not remaining:
+                    return
+                filled_sphere = {location for location in sphere if location.item is not None}
+                yield filled_sphere
+                if not filled_sphere:
+                    yield remaining  # unreachable locations
+                    return
+                remaining -= filled_sphere
+            if remaining:
+                yield set()
+                yield remaining  # unreachable locations
+            return
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
+        locations = SphereLocations(self.get_filled_locations())
+        yield from locations.search(CollectionState(self))
+        if locations:
+            yield set()
+            yield locations.remaining()  # unreachable locations
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+    def _search_location_spheres(self) -> Tuple[List[Set[Location]], Set[Location], CollectionState]:
+        """
+        Sorts all locations, filled or not, into spheres, for sharing through `sphere_cache`.
+        Returns the spheres, the unreachable locations and the state after collecting everything reachable.
+        """
+        state = CollectionState(self)
+        locations = SphereLocations(self.get_locations())
+        spheres = list(locations.search(state))
+        return spheres, locations.remaining(), state
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -616,46 +633,47 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
+        if self.sphere_cache is not None:
+            for sphere in self.sphere_cache.get("sendable", lambda: list(self._search_sendable_spheres())):
+                yield set(sphere)
+        else:
+            yield from self._search_sendable_spheres()
+
+    def _search_sendable_spheres(self) -> Iterator[Set[Location]]:
         state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
+        sendable: List[Location] = []
+        event_locations: List[Location] = []
         for location in self.get_filled_locations():
             if type(location.item.code) is int and type(location.address) is int:
-                locations.add(location)
+                sendable.append(location)
             else:
-                events.add(location)
+                event_locations.append(location)
+        locations = SphereLocations(sendable)
+        events = SphereLocations(event_locations)
 
         while locations:
-            sphere: Set[Location] = set()
-
             # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            while events:
+                done_events = events.pop_reachable(state)
+                if not done_events:
+                    break
+                changes = SphereLocations.collect(state, done_events)
+                events.invalidate(changes)
+                locations.invalidate(changes)
 
+            sphere = locations.pop_reachable(state)
             yield sphere
             if not sphere:
                 if locations:
-                    yield locations  # unreachable locations
+                    yield locations.remaining()  # unreachable locations
                 break
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+            changes = SphereLocations.collect(state, sphere)
+            events.invalidate(changes)
+            locations.invalidate(changes)
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -664,8 +682,6 @@ class MultiWorld():
         for player, world in self.worlds.items():
             players[world.options.accessibility.current_key].add(player)
 
-        beatable_fulfilled = False
-
         def location_condition(location: Location) -> bool:
             """Determine if this location has to be accessible, location is already filtered by location_relevant"""
             return location.player in players["full"] or \
@@ -675,42 +691,44 @@ class MultiWorld():
             """Determine if this location is relevant to sweep."""
             return location.player in players["full"] or location.advancement
 
-        def all_done() -> bool:
-            """Check if all access rules are fulfilled"""
-            if not beatable_fulfilled:
-                return False
-            if any(location_condition(location) for location in locations):
-                return False  # still locations required to be collected
-            return True
+        def missing_locations(missing: Collection[Location]) -> bool:
+            """Report relevant locations that could not be reached"""
+            if __debug__:
+                from Fill import FillError
+                raise FillError(
+                    f"Could not access required locations for accessibility check. Missing: {missing}",
+                    multiworld=self,
+                )
+            # ran out of places and did not finish yet, quit
+            logging.warning(f"Could not access required locations for accessibility check."
+                            f" Missing: {missing}")
+            return False
+
+        if not state and self.sphere_cache is not None:
+            _, unreachable, state = self.sphere_cache.get("locations", self._search_location_spheres)
+            missing = [location for location in unreachable if location_relevant(location)]
+            if self.has_beaten_game(state) and not any(location_condition(location) for location in missing):
+                return True
+            if missing:
+                return missing_locations(missing)
+            return False
 
-        locations = [location for location in self.get_locations() if location_relevant(location)]
+        if not state:
+            state = CollectionState(self)
+        beatable_fulfilled = False
+        locations = SphereLocations(location for location in self.get_locations() if location_relevant(location))
 
         while locations:
-            sphere: List[Location] = []
-            for n in range(len(locations) - 1, -1, -1):
-                if locations[n].can_reach(state):
-                    sphere.append(locations.pop(n))
-
+            sphere = locations.pop_reachable(state)
             if not sphere:
-                if __debug__:
-                    from Fill import FillError
-                    raise FillError(
-                        f"Could not access required locations for accessibility check. Missing: {locations}",
-                        multiworld=self,
-                    )
-                # ran out of places and did not finish yet, quit
-                logging.warning(f"Could not access required locations for accessibility check."
-                                f" Missing: {locations}")
-                return False
+                return missing_locations(list(locations.remaining()))
 
-            for location in sphere:
-                if location.item:
-                    state.collect(location.item, True, location)
+            locations.invalidate(SphereLocations.collect(state, sphere))
 
             if self.has_beaten_game(state):
                 beatable_fulfilled = True
 
-            if all_done():
+            if beatable_fulfilled and not any(location_condition(location) for location in locations.remaining()):
                 return True
 
         return False
@@ -719,30 +737,218 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class PlayerContainerDict(dict):
+    """
+    Mapping of player to a mutable per-player container of a CollectionState, like a Counter or a set.
+
+    Containers are shared with the states this one was copied from or to, until they are accessed by index. Indexing
+    always returns a container exclusively owned by this mapping, copying the shared one first if needed, so the result
+    is safe to mutate. `get()` and iteration return the container as is and must only be used for reading.
+    """
+    __slots__ = ("owned",)
+    owned: Set[int]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.owned = set(self.keys())
+
+    def __getitem__(self, player: int) -> Any:
+        container = dict.__getitem__(self, player)
+        if player not in self.owned:
+            container = container.copy()
+            dict.__setitem__(self, player, container)
+            self.owned.add(player)
+        return container
+
+    def __setitem__(self, player: int, container: Any) -> None:
+        dict.__setitem__(self, player, container)
+        self.owned.add(player)
+
+    def share(self) -> PlayerContainerDict:
+        """Returns a new mapping sharing all containers with this one. Both copy a container on first access."""
+        shared = PlayerContainerDict(self)
+        shared.owned.clear()
+        self.owned.clear()
+        return shared
+
+
+def _share_player_containers(containers: Dict[int, Any]) -> PlayerContainerDict:
+    if isinstance(containers, PlayerContainerDict):
+        return containers.share()
+    # a plain dict was assigned from outside, its containers can't be shared safely
+    return PlayerContainerDict((player, container.copy()) for player, container in containers.items())
+
+
+class SphereLocations:
+    """
+    Locations left to be sorted into spheres by a sphere search.
+
+    Locations that were tested and not reachable are remembered by why they were blocked, so after collecting a sphere
+    only the ones the collected items can affect are tested again: locations in an unreachable region when their
+    player's state changed, locations with declared item dependencies when one of those items changed, and all other
+    locations whenever any state changed.
+    """
+    untested: List[Location]
+    region_blocked: Dict[int, List[Location]]
+    rule_blocked: Dict[int, List[Tuple[Location, AbstractSet[str]]]]
+    unknown_blocked: List[Location]
+
+    def __init__(self, locations: Iterable[Location]) -> None:
+        self.untested = list(locations)
+        self.region_blocked = {}
+        self.rule_blocked = {}
+        self.unknown_blocked = []
+        self._count = len(self.untested)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def remaining(self) -> Set[Location]:
+        """Returns all locations that have not been found reachable yet."""
+        remaining = set(self.untested)
+        remaining.update(self.unknown_blocked)
+        for locations in self.region_blocked.values():
+            remaining.update(locations)
+        for blocked in self.rule_blocked.values():
+            remaining.update(location for location, _ in blocked)
+        return remaining
+
+    def pop_reachable(self, state: CollectionState) -> Set[Location]:
+        """Tests the locations that could have become reachable, then removes and returns the reachable ones."""
+        reachable: Set[Location] = set()
+        for location in self.untested:
+            if location.can_reach(state):
+                reachable.add(location)
+                continue
+            item_dependencies = location.get_item_dependencies()
+            if item_dependencies is None:
+                self.unknown_blocked.append(location)
+            elif not location.parent_region.can_reach(state):
+                self.region_blocked.setdefault(location.player, []).append(location)
+            else:
+                self.rule_blocked.setdefault(location.player, []).append((location, item_dependencies))
+        self.untested = []
+        self._count -= len(reachable)
+        return reachable
+
+    def invalidate(self, changes: Mapping[int, AbstractSet[str]]) -> None:
+        """
+        Marks the locations affected by a state change for testing again.
+
+        :param changes: The players whose state changed, mapped to the names of their items whose count changed,
+            as returned by `collect`.
+        """
+        if not changes:
+            return
+        self.untested.extend(self.unknown_blocked)
+        self.unknown_blocked = []
+        for player, item_names in changes.items():
+            region_blocked = self.region_blocked.pop(player, None)
+            if region_blocked:
+                self.untested.extend(region_blocked)
+            rule_blocked = self.rule_blocked.get(player)
+            if rule_blocked and item_names:
+                still_blocked: List[Tuple[Location, AbstractSet[str]]] = []
+                for location, item_dependencies in rule_blocked:
+                    if item_dependencies.isdisjoint(item_names):
+                        still_blocked.append((location, item_dependencies))
+                    else:
+                        self.untested.append(location)
+                self.rule_blocked[player] = still_blocked
+
+    def search(self, state: CollectionState) -> Iterator[Set[Location]]:
+        """
+        Yields each sphere of reachable locations and collects it into state once the next one is requested,
+        until no more locations are reachable. Unreachable locations are left in here.
+        """
+        while self:
+            sphere = self.pop_reachable(state)
+            if not sphere:
+                return
+            yield sphere
+            self.invalidate(self.collect(state, sphere))
+
+    @staticmethod
+    def collect(state: CollectionState, locations: Iterable[Location]) -> Dict[int, Set[str]]:
+        """
+        Collects the items of the filled locations into state without sweeping.
+        Returns the players whose state changed, mapped to the names of their items whose count changed.
+        """
+        snapshots: Dict[int, Dict[str, int]] = {}
+        changed_players: Set[int] = set()
+        for location in locations:
+            item = location.item
+            if item is None:
+                continue
+            if item.player not in snapshots:
+                snapshots[item.player] = dict(state.prog_items.get(item.player))
+            if state.collect(item, True, location):
+                changed_players.add(item.player)
+
+        changes: Dict[int, Set[str]] = {}
+        for player, snapshot in snapshots.items():
+            prog_items = state.prog_items.get(player)
+            item_names = {name for name, count in prog_items.items() if snapshot.get(name, 0) != count}
+            item_names.update(name for name in snapshot if name not in prog_items)
+            if item_names or player in changed_players:
+                changes[player] = item_names
+        return changes
+
+
+class SphereCache:
+    """
+    Results of sphere searches from an empty state, shared by everything that needs them once placements are final.
+    Set as `MultiWorld.sphere_cache` when output begins. Safe to use from the output threads.
+    """
+    _lock: threading.Lock
+    _key_locks: Dict[str, threading.Lock]
+    _results: Dict[str, Any]
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._results = {}
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Returns the result stored under key, calling compute to create it first if needed."""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._results:
+                self._results[key] = compute()
+            return self._results[key]
+
+
 class CollectionState():
     prog_items: Dict[int, Counter[str]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
+    """The per-player mappings above are PlayerContainerDicts, their containers are only copied on first access after
+    copying the state. Use `.get(player)` for reading in hot paths."""
     advancements: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     """Internal cache for Advancement Locations already checked by this CollectionState. Not for use in logic."""
     stale: Dict[int, bool]
+    stale_item_snapshots: Dict[int, Dict[str, int]]
+    """Per stale player, a snapshot of their prog_items taken when a collect first made them stale. Used to only
+    re-check the blocked entrances whose declared item dependencies changed. Snapshots are never mutated in place."""
     allow_partial_entrances: bool
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
         assert parent.worlds, "CollectionState created without worlds initialized in parent"
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.prog_items = PlayerContainerDict((player, Counter()) for player in parent.get_all_ids())
         self.multiworld = parent
-        self.reachable_regions = {player: set() for player in parent.get_all_ids()}
-        self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.reachable_regions = PlayerContainerDict((player, set()) for player in parent.get_all_ids())
+        self.blocked_connections = PlayerContainerDict((player, set()) for player in parent.get_all_ids())
         self.advancements = set()
         self.path = {}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
+        self.stale_item_snapshots = {}
         self.allow_partial_entrances = allow_partial_entrances
         for function in self.additional_init_functions:
             function(self, parent)
@@ -752,16 +958,32 @@ class CollectionState():
 
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        item_snapshot = self.stale_item_snapshots.pop(player, None)
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        blocked_connections = self.blocked_connections[player]
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
+            queue = deque(blocked_connections)
             reachable_regions.add(start)
-            self.blocked_connections[player].update(start.exits)
+            blocked_connections.update(start.exits)
             queue.extend(start.exits)
+        elif item_snapshot is None or self.allow_partial_entrances:
+            # stale for a reason other than collecting items, so anything may have changed
+            queue = deque(blocked_connections)
+        else:
+            # only re-check the connections whose rules could have been affected by the changed items
+            player_prog_items = self.prog_items.get(player)
+            changed_items = {item_name for item_name, count in player_prog_items.items()
+                             if item_snapshot.get(item_name, 0) != count}
+            changed_items.update(item_snapshot.keys() - player_prog_items.keys())
+            queue = deque()
+            for connection in blocked_connections:
+                item_dependencies = connection.get_item_dependencies()
+                if item_dependencies is None or not item_dependencies.isdisjoint(changed_items):
+                    queue.append(connection)
 
         if world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
@@ -819,19 +1041,30 @@ class CollectionState():
                     new_connection = True
                     self.multiworld.worlds[player].reached_region(self, new_region)
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
-            queue.extend(blocked_connections)
+            if self.allow_partial_entrances:
+                queue.extend(blocked_connections)
+            else:
+                # connections that only depend on items can't be unblocked by newly reached regions
+                queue.extend(connection for connection in blocked_connections
+                             if connection.get_item_dependencies() is None)
 
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        # __init__ is skipped, as collecting the precollected items would be wasted on containers that get replaced
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        # per-player containers are shared and only copied once either state accesses them for a player
+        ret.prog_items = _share_player_containers(self.prog_items)
+        ret.reachable_regions = _share_player_containers(self.reachable_regions)
+        ret.blocked_connections = _share_player_containers(self.blocked_connections)
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        # the shared reachability caches are still valid, so they don't need to be rebuilt
+        ret.stale = self.stale.copy()
+        ret.stale_item_snapshots = self.stale_item_snapshots.copy()
         ret.allow_partial_entrances = self.allow_partial_entrances
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -996,14 +1229,14 @@ class CollectionState():
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        return self.prog_items.get(player)[item] >= count
 
     # for loops are specifically used in all/any/count methods, instead of all()/any()/sum(), to avoid the overhead of
     # creating and iterating generator instances. In `return all(player_prog_items[item] for item in items)`, the
     # argument to all() would be a new generator instance, for example.
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item in items:
             if not player_prog_items[item]:
                 return False
@@ -1011,7 +1244,7 @@ class CollectionState():
 
     def has_any(self, items: Iterable[str], player: int) -> bool:
         """Returns True if at least one item name of items is in state at least once."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item in items:
             if player_prog_items[item]:
                 return True
@@ -1019,7 +1252,7 @@ class CollectionState():
 
     def has_all_counts(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if each item name is in the state at least as many times as specified."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item, count in item_counts.items():
             if player_prog_items[item] < count:
                 return False
@@ -1027,21 +1260,21 @@ class CollectionState():
 
     def has_any_count(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if at least one item name is in the state at least as many times as specified."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item, count in item_counts.items():
             if player_prog_items[item] >= count:
                 return True
         return False
 
     def count(self, item: str, player: int) -> int:
-        return self.prog_items[player][item]
+        return self.prog_items.get(player)[item]
 
     def has_from_list(self, items: Iterable[str], player: int, count: int) -> bool:
         """Returns True if the state contains at least `count` items matching any of the item names from a list."""
         if count <= 0:
             return True
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item_name in items:
             found += player_prog_items[item_name]
             if found >= count:
@@ -1054,7 +1287,7 @@ class CollectionState():
         if count <= 0:
             return True
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item_name in items:
             found += player_prog_items[item_name] > 0
             if found >= count:
@@ -1063,7 +1296,7 @@ class CollectionState():
 
     def count_from_list(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         total = 0
         for item_name in items:
             total += player_prog_items[item_name]
@@ -1071,7 +1304,7 @@ class CollectionState():
 
     def count_from_list_unique(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state. Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         total = 0
         for item_name in items:
             if player_prog_items[item_name] > 0:
@@ -1084,7 +1317,7 @@ class CollectionState():
         if count <= 0:
             return True
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name]
             if found >= count:
@@ -1098,7 +1331,7 @@ class CollectionState():
         if count <= 0:
             return True
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name] > 0
             if found >= count:
@@ -1107,7 +1340,7 @@ class CollectionState():
 
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         return sum(
             player_prog_items[item_name]
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
@@ -1116,7 +1349,7 @@ class CollectionState():
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.get(player)
         return sum(
             player_prog_items[item_name] > 0
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
@@ -1127,6 +1360,8 @@ class CollectionState():
         if location:
             self.locations_checked.add(location)
 
+        if not self.stale[item.player]:
+            self.stale_item_snapshots[item.player] = dict(self.prog_items.get(item.player))
         changed = self.multiworld.worlds[item.player].collect(self, item)
 
         self.stale[item.player] = True
@@ -1154,6 +1389,7 @@ class CollectionState():
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
             self.stale[item.player] = True
+            self.stale_item_snapshots.pop(item.player, None)
 
     def remove_item(self, item: str, player: int, count: int = 1) -> None:
         """
@@ -1187,6 +1423,20 @@ CollectionRule = Callable[[CollectionState], bool]
 DEFAULT_COLLECTION_RULE: CollectionRule = staticmethod(lambda state: True)
 
 
+def get_declared_item_dependencies(access_rule: CollectionRule) -> Optional[AbstractSet[str]]:
+    """
+    Returns the names of the items an access rule depends on, if the rule declares them and depends on nothing else.
+    Otherwise returns None.
+    """
+    if hasattr(access_rule, "item_dependencies") \
+            and not getattr(access_rule, "force_recalculate", False) \
+            and not access_rule.region_dependencies() \
+            and not access_rule.location_dependencies() \
+            and not access_rule.entrance_dependencies():
+        return frozenset(access_rule.item_dependencies())
+    return None
+
+
 class EntranceType(IntEnum):
     ONE_WAY = 1
     TWO_WAY = 2
@@ -1201,6 +1451,7 @@ class Entrance:
     connected_region: Optional[Region] = None
     randomization_group: int
     randomization_type: EntranceType
+    _item_dependencies_cache: Optional[Tuple[CollectionRule, Optional[AbstractSet[str]]]] = None
 
     def __init__(self, player: int, name: str = "", parent: Optional[Region] = None,
                  randomization_group: int = 0, randomization_type: EntranceType = EntranceType.ONE_WAY) -> None:
@@ -1219,6 +1470,26 @@ class Entrance:
 
         return False
 
+    def get_item_dependencies(self) -> Optional[AbstractSet[str]]:
+        """
+        Returns the names of the items this entrance's access rule depends on, given that its parent region is
+        reachable. Returns None if the rule doesn't declare its dependencies, in which case it has to be re-checked
+        whenever anything in the state changes.
+
+        Rules declare their dependencies by providing `item_dependencies()` and reporting no region, location or
+        entrance dependencies, like rule_builder's `Rule.Resolved`.
+        """
+        access_rule = self.access_rule
+        cache = self._item_dependencies_cache
+        if cache is not None and cache[0] is access_rule:
+            return cache[1]
+
+        item_dependencies: Optional[AbstractSet[str]] = None
+        if type(self).can_reach is Entrance.can_reach:
+            item_dependencies = get_declared_item_dependencies(access_rule)
+        self._item_dependencies_cache = (access_rule, item_dependencies)
+        return item_dependencies
+
     def connect(self, region: Region) -> None:
         self.connected_region = region
         region.entrances.append(self)
@@ -1351,7 +1622,7 @@ class Region:
     def can_reach(self, state: CollectionState) -> bool:
         if state.stale[self.player]:
             state.update_reachable_regions(self.player)
-        return self in state.reachable_regions[self.player]
+        return self in state.reachable_regions.get(self.player)
 
     @property
     def hint_text(self) -> str:
@@ -1495,6 +1766,7 @@ class Location:
     access_rule: CollectionRule = DEFAULT_COLLECTION_RULE
     item_rule: Callable[[Item], bool] = staticmethod(lambda item: True)
     item: Optional[Item] = None
+    _item_dependencies_cache: Optional[Tuple[CollectionRule, Optional[AbstractSet[str]]]] = None
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
@@ -1517,6 +1789,22 @@ class Location:
         assert self.parent_region, f"called can_reach on a Location \"{self}\" with no parent_region"
         return self.parent_region.can_reach(state) and self.access_rule(state)
 
+    def get_item_dependencies(self) -> Optional[AbstractSet[str]]:
+        """
+        Returns the names of the items this location's access rule depends on, given that its parent region is
+        reachable. Returns None if the rule doesn't declare its dependencies, see `Entrance.get_item_dependencies`.
+        """
+        access_rule = self.access_rule
+        cache = self._item_dependencies_cache
+        if cache is not None and cache[0] is access_rule:
+            return cache[1]
+
+        item_dependencies: Optional[AbstractSet[str]] = None
+        if type(self).can_reach is Location.can_reach:
+            item_dependencies = get_declared_item_dependencies(access_rule)
+        self._item_dependencies_cache = (access_rule, item_dependencies)
+        return item_dependencies
+
     def place_locked_item(self, item: Item):
         if self.item:
             raise Exception(f"Location {self} already filled.")
@@ -1713,46 +2001,56 @@ class Spoiler:
         # get locations containing progress items
         multiworld = self.multiworld
         prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
-        state_cache: List[Optional[CollectionState]] = [None]
+        state_cache: List[CollectionState] = []
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
 
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
+        # build up spheres of collection radius.
+        # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
+        if multiworld.sphere_cache is not None:
+            location_spheres, _, _ = multiworld.sphere_cache.get("locations", multiworld._search_location_spheres)
 
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+            def search_cached() -> Iterator[Set[Location]]:
+                for location_sphere in location_spheres:
+                    prog_sphere = location_sphere & prog_locations
+                    if prog_sphere:
+                        yield prog_sphere
+                        SphereLocations.collect(state, prog_sphere)
 
-            for location in sphere:
-                state.collect(location.item, True, location)
+            spheres = search_cached()
+        else:
+            spheres = SphereLocations(prog_locations).search(state)
 
-            sphere_candidates -= sphere
-            collection_spheres.append(sphere)
+        for sphere in spheres:
+            # the state doesn't contain the sphere yet, it gets collected when the next one is requested
             state_cache.append(state.copy())
+            collection_spheres.append(sphere)
 
             logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
                           len(sphere),
                           len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if not multiworld.has_beaten_game(state):
-                    raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
-                                       "Something went terribly wrong here. "
-                                       f"Unreachable progression items: {sphere_candidates}")
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+
+        sphere_candidates = prog_locations.difference(*collection_spheres)
+        if sphere_candidates:
+            logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                location.item.name, location.item.player, location.name, location.player) for location in
+                                                                           sphere_candidates])
+            if not multiworld.has_beaten_game(state):
+                raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
+                                   "Something went terribly wrong here. "
+                                   f"Unreachable progression items: {sphere_candidates}")
+            else:
+                self.unreachables = sphere_candidates
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
         required_locations = {location for sphere in collection_spheres for location in sphere}
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
             to_delete: Set[Location] = set()
-            for location in sphere:
+            # which of several interchangeable locations is kept depends on the order they are tested in, so test them
+            # in a fixed order rather than in set order, which depends on how the sphere was built
+            for location in sorted(sphere):
                 # we remove the location from required_locations to sweep from, and check if the game is still beatable
                 logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
                               location.item.player)
@@ -1790,23 +2088,17 @@ class Spoiler:
         # used to access it was deemed not required.) So we need to do one final sphere collection pass
         # to build up the correct spheres
 
-        required_locations = {item for sphere in collection_spheres for item in sphere}
+        required_locations = SphereLocations(location for sphere in collection_spheres for location in sphere)
         state = CollectionState(multiworld)
         collection_spheres = []
-        while required_locations:
-            sphere = set(filter(state.can_reach, required_locations))
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-
+        for sphere in required_locations.search(state):
             collection_spheres.append(sphere)
 
             logging.debug('Calculated final sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere), len(required_locations))
-
-            required_locations -= sphere
-            if not sphere:
-                raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
+                          len(sphere), len(sphere) + len(required_locations))
+        if required_locations:
+            raise RuntimeError(f'Not all required items reachable. '
+                               f'Unreachable locations: {required_locations.remaining()}')
 
         # we can finally output our playthrough
         self.playthrough = {"0": sorted([self.multiworld.get_name_string_for_object(item) for item in
@@ -0,0 +1,110 @@
+"""
+Generates many multiworlds from one interpreter, for services that roll seeds continuously.
+
+Worlds are imported once. Where the platform supports it, every job then runs in a process forked from a server process
+that imported them, so jobs don't pay for importing worlds again and can't leak world state into each other.
+
+The jobs file is a yaml list of jobs. Each job is a mapping of Generate.py command line arguments without the leading
+dashes, for example:
+
+- player_files_path: Players/async1
+  seed: 1234
+- player_files_path: Players/async2
+  spoiler: 1
+  race: true
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import logging
+import multiprocessing
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+import ModuleUpdate
+
+ModuleUpdate.update()
+
+import Utils
+
+
+def job_argv(job: dict[str, Any]) -> list[str]:
+    """Converts a job into Generate.py command line arguments."""
+    argv: list[str] = []
+    for key, value in job.items():
+        if value is True:
+            argv.append(f"--{key}")
+        elif value is not False and value is not None:
+            argv += [f"--{key}", str(value)]
+    return argv
+
+
+def generate_job(indexed_job: tuple[int, dict[str, Any]], log_level: str | None = None) -> tuple[int, str | None]:
+    """
+    Generates a single job. Returns its index and the path of the resulting archive, None if there is none.
+    If log_level is set, the job logs to a file of its own.
+    """
+    index, job = indexed_job
+    if log_level:
+        Utils.init_logging(f"BatchGenerate_Job{index + 1}", loglevel=log_level)
+
+    from Generate import main as generate, mystery_argparse
+    from Main import main as ERmain
+
+    try:
+        args, seed = generate(mystery_argparse(job_argv(job)))
+        multiworld = ERmain(args, seed)
+    except Exception as e:
+        logging.exception(f"Job {index + 1} ({job}) failed: {e}")
+        return index, None
+    if args.skip_output or args.spoiler_only:
+        return index, None
+    return index, Utils.output_path(f"AP_{multiworld.seed_name}.zip")
+
+
+def generate_batch(jobs: Sequence[dict[str, Any]], processes: int | None = None,
+                   log_level: str | None = None) -> Iterator[tuple[int, str | None]]:
+    """
+    Generates all jobs, yielding each job's index and the path of its archive as soon as the job is done.
+    The path is None if the job failed or produced no archive. If log_level is set, each job logs to a file of its own.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        # Jobs are forked from a server process that imports worlds and builds the data package once. Forking from this
+        # process instead would copy whatever its threads, like the ones of logging and the pool, hold at that moment.
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["Generate", "Main"])
+    else:
+        # without forkserver, each job has to import worlds on its own
+        context = multiprocessing.get_context()
+    # a fresh process per job keeps world class state from one job from affecting the next one's seed
+    with context.Pool(processes, maxtasksperchild=1) as pool:
+        yield from pool.imap_unordered(functools.partial(generate_job, log_level=log_level), enumerate(jobs))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a batch of multiworlds, see the module docstring.")
+    parser.add_argument("jobs", help="Path to a yaml file listing the jobs to generate.")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="How many jobs to generate at the same time. Defaults to the number of CPUs.")
+    parser.add_argument("--log_level", default="info", help="Sets log level")
+    args = parser.parse_args(argv)
+
+    Utils.init_logging("BatchGenerate", loglevel=args.log_level)
+    with open(args.jobs, encoding="utf-8-sig") as file:
+        jobs: list[dict[str, Any]] = Utils.parse_yaml(file.read())
+
+    failed = 0
+    for done, (index, archive) in enumerate(generate_batch(jobs, args.processes, args.log_level), start=1):
+        if archive:
+            logging.info(f"Job {index + 1} done ({done}/{len(jobs)}): {archive}")
+        else:
+            failed += 1
+            logging.info(f"Job {index + 1} done ({done}/{len(jobs)}) without output.")
+    logging.info(f"Finished {len(jobs)} jobs, {failed} without output.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
@@ -1,6 +1,7 @@
 import collections
 import itertools
 import logging
+import time
 import typing
 from collections import Counter, deque
 
@@ -20,8 +21,48 @@ class FillError(RuntimeError):
         super().__init__(*args)
 
 
-def _log_fill_progress(name: str, placed: int, total_items: int) -> None:
-    logging.info(f"Current fill step ({name}) at {placed}/{total_items} items placed.")
+class _SwapStatistics:
+    """Counters of the swap fallback of a fill_restrictive call, for progress logging."""
+    attempts: int = 0
+    sweeps: int = 0
+    time: float = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.attempts} swaps attempted, {self.sweeps} sweeps performed, {self.time:.2f}s spent swapping"
+
+
+def _log_fill_progress(name: str, placed: int, total_items: int,
+                       swap_statistics: typing.Optional[_SwapStatistics] = None) -> None:
+    if swap_statistics and swap_statistics.attempts:
+        logging.info(f"Current fill step ({name}) at {placed}/{total_items} items placed. {swap_statistics}.")
+    else:
+        logging.info(f"Current fill step ({name}) at {placed}/{total_items} items placed.")
+
+
+# Almost never are more than 2 states needed. The rare cases that do are usually highly restrictive
+# single_player_placement=True pre-fills which can go through more than 10 states in some seeds.
+max_swap_base_state_cache_length = 3
+
+
+def _can_fill_regardless_of_state(location: Location) -> bool:
+    """Returns True if whether location can be filled with an item, ignoring access, doesn't depend on the state."""
+    return location.always_allow is Location.always_allow and type(location).can_fill is Location.can_fill
+
+
+def _order_swap_candidates(placements: typing.List[Location], failed_locations: typing.Iterable[Location]) \
+        -> typing.List[typing.Tuple[int, Location]]:
+    """
+    Returns the placements with their indices in the order to try swapping them. Placed items that the rules of the
+    locations the item failed to reach declare as dependencies are tried first, as they are what keeps those locations
+    locked. If any of these rules doesn't declare its dependencies, the order of placement is kept.
+    """
+    dependencies: typing.Set[str] = set()
+    for location in failed_locations:
+        item_dependencies = location.get_item_dependencies()
+        if item_dependencies is None:
+            return list(enumerate(placements))
+        dependencies |= item_dependencies
+    return sorted(enumerate(placements), key=lambda candidate: candidate[1].item.name not in dependencies)
 
 
 def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item] = tuple(),
@@ -33,6 +74,52 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class _FillCandidates:
+    """
+    The locations of a fill_restrictive call, indexed by player, with their reachability remembered for the current
+    exploration state, so it is evaluated at most once per sweep instead of once per item.
+    """
+    locations: typing.List[Location]
+    by_player: typing.Dict[int, typing.List[Location]]
+    state: typing.Optional[CollectionState]
+    reachable: typing.Dict[Location, bool]
+
+    def __init__(self, locations: typing.List[Location]) -> None:
+        self.locations = locations
+        self.by_player = {}
+        for location in locations:
+            self.by_player.setdefault(location.player, []).append(location)
+        self.state = None
+        self.reachable = {}
+
+    def set_state(self, state: CollectionState) -> None:
+        self.state = state
+        self.reachable = {}
+
+    def get(self, item: Item, single_player_placement: bool) -> typing.List[Location]:
+        """Returns the locations item may be placed in, reachable or not."""
+        return self.by_player.get(item.player, []) if single_player_placement else self.locations
+
+    def find(self, item: Item, check_access: bool, single_player_placement: bool) -> typing.Optional[Location]:
+        """Removes and returns the first location that can be filled with item in the current state, if any."""
+        state = self.state
+        for location in self.get(item, single_player_placement):
+            if check_access and _can_fill_regardless_of_state(location):
+                # without always_allow the location can only be filled if it is reachable
+                reachable = self.reachable.get(location)
+                if reachable is None:
+                    reachable = self.reachable[location] = location.can_reach(state)
+                if reachable and location.can_fill(state, item, False):
+                    break
+            elif location.can_fill(state, item, check_access):
+                break
+        else:
+            return None
+        self.locations.remove(location)
+        self.by_player[location.player].remove(location)
+        return location
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -53,6 +140,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     """
     unplaced_items: typing.List[Item] = []
     placements: typing.List[Location] = []
+    candidates = _FillCandidates(locations)
+    swap_statistics = _SwapStatistics()
     cleanup_required = False
     swapped_items: typing.Counter[typing.Tuple[int, str, bool]] = Counter()
     reachable_items: typing.Dict[int, typing.Deque[Item]] = {}
@@ -87,6 +176,11 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             if single_player_placement else None)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        candidates.set_state(maximum_exploration_state)
+        # Keep a cache of previous safe swap states that might be usable to sweep from to produce the next swap state,
+        # instead of sweeping from `base_state` each time. They stay usable for all items of this batch until a swap
+        # succeeds, as until then `item_pool` is unchanged and placements only add items to sweep for.
+        previous_safe_swap_state_cache: typing.Deque[CollectionState] = deque()
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
@@ -95,8 +189,6 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 break
             item_to_place = items_to_place.pop(0)
 
-            spot_to_fill: typing.Optional[Location] = None
-
             # if minimal accessibility, only check whether location is reachable if game not beatable
             if multiworld.worlds[item_to_place.player].options.accessibility == Accessibility.option_minimal:
                 perform_access_check = not multiworld.has_beaten_game(maximum_exploration_state,
@@ -105,28 +197,18 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill = candidates.find(item_to_place, perform_access_check, single_player_placement)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
-                    # Keep a cache of previous safe swap states that might be usable to sweep from to produce the next
-                    # swap state, instead of sweeping from `base_state` each time.
-                    previous_safe_swap_state_cache: typing.Deque[CollectionState] = deque()
-                    # Almost never are more than 2 states needed. The rare cases that do are usually highly restrictive
-                    # single_player_placement=True pre-fills which can go through more than 10 states in some seeds.
-                    max_swap_base_state_cache_length = 3
+                    swap_start = time.perf_counter()
 
                     # try swapping this item with previously placed items in a safe way then in an unsafe way
+                    swap_candidates = _order_swap_candidates(placements,
+                                                             candidates.get(item_to_place, single_player_placement))
                     swap_attempts = ((i, location, unsafe)
                                      for unsafe in (False, True)
-                                     for i, location in enumerate(placements))
+                                     for i, location in swap_candidates)
                     for (i, location, unsafe) in swap_attempts:
                         placed_item = location.item
                         if item_to_place == placed_item:
@@ -138,7 +220,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                         swap_count = swapped_items[placed_item.player, placed_item.name, unsafe]
                         if swap_count > 1:
                             continue
+                        # Skip sweeping for locations that couldn't take the item in any state
+                        if single_player_placement and location.player != item_to_place.player:
+                            continue
+                        if _can_fill_regardless_of_state(location) \
+                                and not location.can_fill(maximum_exploration_state, item_to_place, False):
+                            continue
 
+                        swap_statistics.attempts += 1
                         location.item = None
                         placed_item.location = None
 
@@ -165,6 +254,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                                     previous_safe_swap_state_cache.pop()
                                 # Add the new state to the start of the cache.
                                 previous_safe_swap_state_cache.appendleft(swap_state)
+                        swap_statistics.sweeps += 1
                         # unsafe means swap_state assumes we can somehow collect placed_item before item_to_place
                         # by continuing to swap, which is not guaranteed. This is unsafe because there is no mechanic
                         # to clean that up later, so there is a chance generation fails.
@@ -180,6 +270,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                             reachable_items[placed_item.player].appendleft(
                                 placed_item)
                             item_pool.append(placed_item)
+                            # cached states have not collected placed_item from item_pool
+                            previous_safe_swap_state_cache.clear()
 
                             # cleanup at the end to hopefully get better errors
                             cleanup_required = True
@@ -190,6 +282,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                         location.item = placed_item
                         placed_item.location = location
 
+                    swap_statistics.time += time.perf_counter() - swap_start
+
                     if spot_to_fill is None:
                         # Can't place this item, move on to the next
                         unplaced_items.append(item_to_place)
@@ -202,12 +296,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             placements.append(spot_to_fill)
             placed += 1
             if not placed % 1000:
-                _log_fill_progress(name, placed, total)
+                _log_fill_progress(name, placed, total, swap_statistics)
             if on_place:
                 on_place(spot_to_fill)
 
-    if total > 1000:
-        _log_fill_progress(name, placed, total)
+    if total > 1000 or swap_statistics.attempts:
+        _log_fill_progress(name, placed, total, swap_statistics)
 
     if cleanup_required:
         # validate all placements and remove invalid ones
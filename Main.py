@@ -10,7 +10,7 @@ import zipfile
 import zlib
 
 import worlds
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, SphereCache
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, flood_items, \
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
 from NetUtils import convert_to_base_types
@@ -212,6 +212,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     # we're about to output using multithreading, so we're removing the global random state to prevent accidental use
     multiworld.random.passthrough = False
+    # placements are final now, so sphere searches can be shared by the spoiler, multidata and accessibility check
+    multiworld.sphere_cache = SphereCache()
 
     if args.skip_output:
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import bisect
 import collections
 import contextlib
 import copy
@@ -13,9 +14,11 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import shlex
+import struct
 import threading
 import time
 import typing
@@ -42,9 +45,9 @@ except ImportError:
 
 import NetUtils
 import Utils
-from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text
+from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text, LRUCache
 from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore, MultiData, Hint, HintStatus
+    SlotType, LocationStore, MultiData, Hint, HintStatus, get_location_spheres
 from BaseClasses import ItemClassification
 
 
@@ -156,6 +159,8 @@ class Client(Endpoint):
         "no_items",
         "no_locations",
         "no_text",
+        "outgoing",
+        "outgoing_awaited",
     )
 
     version: Version
@@ -171,6 +176,10 @@ class Client(Endpoint):
     no_items: bool
     no_locations: bool
     no_text: bool
+    outgoing: list[str]
+    """ encoded messages queued to be sent at the end of the event loop tick, see Context.queue_msgs """
+    outgoing_awaited: bool
+    """ if the queued messages include ones that have to be sent with awaited sends """
 
     def __init__(self, socket: "ServerConnection", ctx: Context) -> None:
         super().__init__(socket)
@@ -187,6 +196,8 @@ class Client(Endpoint):
         self.no_items = False
         self.no_locations = False
         self.no_text = False
+        self.outgoing = []
+        self.outgoing_awaited = False
 
     @property
     def items_handling(self):
@@ -210,6 +221,279 @@ class Client(Endpoint):
         return "Deallocated"
 
 
+class DataStorageFull(Exception):
+    """Raised when a Set package would grow the data storage of a room beyond its limit."""
+
+
+class OutgoingQueueStats:
+    """Counters of the outgoing message queue, see Context.queue_msgs."""
+    __slots__ = ("flushes", "frames", "queued", "max_depth", "total_latency", "max_latency")
+
+    flushes: int
+    frames: int
+    queued: int
+    """ how many times messages were queued for an endpoint """
+    max_depth: int
+    """ most queued messages waiting for one flush """
+    total_latency: float
+    max_latency: float
+    """ seconds from queueing the first message to sending it """
+
+    def __init__(self) -> None:
+        self.flushes = 0
+        self.frames = 0
+        self.queued = 0
+        self.max_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+
+class Histogram:
+    """Counts observed values into buckets, each bucket counting the values up to its upper bound."""
+    __slots__ = ("bounds", "buckets", "count", "sum", "max")
+
+    bounds: typing.Tuple[float, ...]
+    buckets: typing.List[int]
+    """ one more than bounds, the last one counting values above all bounds """
+
+    def __init__(self, bounds: typing.Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile_bound(self, quantile: float) -> float:
+        """Upper bound of the bucket containing the quantile, capped at the highest observed value."""
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= quantile * self.count:
+                return min(bound, self.max)
+        return self.max
+
+
+class ServerMetrics:
+    """Instrumentation of the message handling of a Context, recorded while Context.metrics is set."""
+    latency_bounds = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+    fan_out_bounds = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+    commands = frozenset({"Connect", "ConnectUpdate", "Sync", "LocationChecks", "LocationScouts", "CreateHints",
+                          "UpdateHint", "StatusUpdate", "Say", "GetDataPackage", "Bounce", "Get", "Set", "SetNotify"})
+    """ commands get recorded under their name, anything else clients send as "other" """
+
+    labels: typing.Dict[str, str]
+    started: float
+    command_latency: typing.Dict[str, Histogram]
+    """ seconds spent handling each command, by command """
+    received_frames: int
+    received_bytes: int
+    sent_frames: int
+    """ frames sent, counted once per endpoint """
+    sent_bytes: int
+    """ uncompressed, counted once per endpoint """
+    fan_out: Histogram
+    """ endpoints each message got queued for """
+    loop_lag: Histogram
+    """ seconds the event loop was late to wake up a sleeping task """
+    outgoing: OutgoingQueueStats
+    """ counted by the Context since it started, not only while recording """
+
+    def __init__(self, labels: typing.Dict[str, str], outgoing: typing.Optional[OutgoingQueueStats] = None) -> None:
+        self.labels = labels
+        self.outgoing = outgoing if outgoing else OutgoingQueueStats()
+        self.started = time.time()
+        self.command_latency = {}
+        self.received_frames = 0
+        self.received_bytes = 0
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.fan_out = Histogram(self.fan_out_bounds)
+        self.loop_lag = Histogram(self.latency_bounds)
+
+    def record_command(self, msg: typing.Any, seconds: float) -> None:
+        cmd = msg.get("cmd", None) if isinstance(msg, dict) else None
+        if not isinstance(cmd, str) or cmd not in self.commands:
+            cmd = "other"
+        histogram = self.command_latency.get(cmd, None)
+        if histogram is None:
+            histogram = self.command_latency[cmd] = Histogram(self.latency_bounds)
+        histogram.observe(seconds)
+
+    def record_received(self, data: typing.Union[str, bytes]) -> None:
+        self.received_frames += 1
+        self.received_bytes += len(data.encode()) if isinstance(data, str) else len(data)
+
+    def record_sent(self, msg: str, endpoints: int) -> None:
+        self.sent_frames += endpoints
+        self.sent_bytes += len(msg.encode()) * endpoints
+
+    def get_summary(self) -> typing.List[str]:
+        texts = [f"Recording for {datetime.timedelta(seconds=int(time.time() - self.started))}",
+                 f"Received {self.received_frames} frames, {Utils.format_SI_prefix(self.received_bytes, 1024)}B",
+                 f"Sent {self.sent_frames} frames, {Utils.format_SI_prefix(self.sent_bytes, 1024)}B"]
+        for name, histogram in (("Broadcast fan-out", self.fan_out), ("Event loop lag", self.loop_lag)):
+            if histogram.count:
+                scale, unit = (1000, "ms") if histogram is self.loop_lag else (1, " endpoints")
+                texts.append(f"{name}: {histogram.sum / histogram.count * scale:.2f}{unit} average, "
+                             f"99% up to {histogram.quantile_bound(0.99) * scale:.3g}{unit}, "
+                             f"{histogram.max * scale:.3g}{unit} max")
+        outgoing = self.outgoing
+        if outgoing.flushes:
+            texts.append(f"Outgoing queue: {outgoing.flushes} flushes, "
+                         f"{outgoing.total_latency / outgoing.flushes * 1000:.3f}ms average latency, "
+                         f"{outgoing.max_latency * 1000:.3f}ms max, {outgoing.max_depth} messages max depth")
+        for cmd, histogram in sorted(self.command_latency.items(), key=lambda item: item[1].sum, reverse=True):
+            texts.append(f"{cmd}: {histogram.count} times, {histogram.sum * 1000:.1f}ms total, "
+                         f"{histogram.sum / histogram.count * 1000:.3f}ms average, "
+                         f"99% up to {histogram.quantile_bound(0.99) * 1000:.3g}ms, {histogram.max * 1000:.3f}ms max")
+        return texts
+
+    def get_prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: typing.List[str] = []
+
+        def format_labels(labels: typing.Dict[str, str]) -> str:
+            if not labels:
+                return ""
+            escaped = (key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                       for key, value in labels.items())
+            return "{" + ",".join(escaped) + "}"
+
+        def add_metric(name: str, kind: str, description: str) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def add_histogram(name: str, histogram: Histogram, labels: typing.Dict[str, str]) -> None:
+            seen = 0
+            for bound, count in zip(histogram.bounds, histogram.buckets):
+                seen += count
+                lines.append(f"{name}_bucket{format_labels({**labels, 'le': f'{bound:g}'})} {seen}")
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum:g}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        add_metric("archipelago_command_seconds", "histogram", "Time spent handling client commands.")
+        for cmd, histogram in sorted(self.command_latency.items()):
+            add_histogram("archipelago_command_seconds", histogram, {**self.labels, "cmd": cmd})
+        for name, value, description in (
+                ("archipelago_received_frames_total", self.received_frames, "Frames received from clients."),
+                ("archipelago_received_bytes_total", self.received_bytes, "Bytes received from clients."),
+                ("archipelago_sent_frames_total", self.sent_frames, "Frames sent to clients."),
+                ("archipelago_sent_bytes_total", self.sent_bytes, "Uncompressed bytes sent to clients.")):
+            add_metric(name, "counter", description)
+            lines.append(f"{name}{format_labels(self.labels)} {value}")
+        outgoing = self.outgoing
+        for name, kind, value, description in (
+                ("archipelago_outgoing_flushes_total", "counter", outgoing.flushes, "Flushes of the outgoing queue."),
+                ("archipelago_outgoing_frames_total", "counter", outgoing.frames, "Frames sent by queue flushes."),
+                ("archipelago_outgoing_queued_total", "counter", outgoing.queued,
+                 "Messages queued, counted once per endpoint."),
+                ("archipelago_outgoing_latency_seconds_total", "counter", outgoing.total_latency,
+                 "Time from queueing the first message to flushing the queue, summed over flushes."),
+                ("archipelago_outgoing_max_latency_seconds", "gauge", outgoing.max_latency,
+                 "Longest time from queueing the first message to flushing the queue."),
+                ("archipelago_outgoing_max_depth", "gauge", outgoing.max_depth,
+                 "Most messages waiting for one flush of the queue.")):
+            add_metric(name, kind, description)
+            lines.append(f"{name}{format_labels(self.labels)} {value}")
+        add_metric("archipelago_broadcast_fan_out", "histogram", "Endpoints each message got queued for.")
+        add_histogram("archipelago_broadcast_fan_out", self.fan_out, self.labels)
+        add_metric("archipelago_event_loop_lag_seconds", "histogram", "Delay of the event loop waking up tasks.")
+        add_histogram("archipelago_event_loop_lag_seconds", self.loop_lag, self.labels)
+        return "\n".join(lines) + "\n"
+
+
+class SaveJournal:
+    """
+    Append-only file of the changes made to the save state since the last save snapshot, see Context.journal_event.
+
+    Each record is a pickled (sequence, event) tuple behind its length and crc32. Records get flushed as they are
+    written, so a crash of the server loses at most the event being written. They only get synced to disk when the
+    journal gets rotated, so a crash of the operating system can lose the records written since.
+    Reading stops at the first torn or corrupt record.
+    While a snapshot is being written in the background, the records it covers are kept in a second file.
+    """
+    record_header = struct.Struct("<II")
+    path: str
+    old_path: str
+    """ records covered by the snapshot being written """
+    size: int
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.old_path = path + ".old"
+        _, end = self.read(path)
+        self.file = open(path, "ab")
+        self.file.truncate(end)  # drop a torn record, so new records don't get appended behind it
+        self.size = end
+
+    @classmethod
+    def read(cls, path: str) -> typing.Tuple[typing.List[typing.Tuple[int, tuple]], int]:
+        """Returns the records of a journal file up to the first torn or corrupt one, and the offset they end at."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+        records: typing.List[typing.Tuple[int, tuple]] = []
+        offset = 0
+        while offset + cls.record_header.size <= len(data):
+            length, crc = cls.record_header.unpack_from(data, offset)
+            start = offset + cls.record_header.size
+            record = data[start:start + length]
+            if len(record) != length or zlib.crc32(record) != crc:
+                break
+            try:
+                records.append(restricted_loads(record))
+            except Exception:
+                break
+            offset = start + length
+        if offset != len(data):
+            logging.warning(f"Ignoring {len(data) - offset} bytes of torn or corrupt records at the end of {path}.")
+        return records, offset
+
+    def read_all(self) -> typing.List[typing.Tuple[int, tuple]]:
+        return self.read(self.old_path)[0] + self.read(self.path)[0]
+
+    def append(self, sequence: int, event: tuple) -> None:
+        record = pickle.dumps((sequence, event))
+        self.file.write(self.record_header.pack(len(record), zlib.crc32(record)) + record)
+        self.file.flush()
+        self.size += self.record_header.size + len(record)
+
+    def rotate(self) -> None:
+        """Moves the records written so far to old_path, behind the ones already there, and starts a new file.
+        The moved records get synced to disk."""
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if os.path.exists(self.old_path):
+            with open(self.path, "rb") as f, open(self.old_path, "ab") as old_file:
+                old_file.write(f.read())
+                old_file.flush()
+                os.fsync(old_file.fileno())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.old_path)
+        self.file = open(self.path, "ab")
+        self.size = 0
+
+    def remove_old(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.old_path)
+
+    def clear(self) -> None:
+        self.file.truncate(0)
+        self.size = 0
+        self.remove_old()
+
+
 team_slot = typing.Tuple[int, int]
 
 
@@ -238,6 +522,15 @@ class Context:
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    stored_data_notification_prefixes: typing.Dict[str, typing.Set[Client]]
+    """ clients subscribed to all keys starting with a prefix, by SetNotify prefixes """
+    stored_data_notification_prefix_lengths: typing.Set[int]
+    stored_data_sizes: typing.Dict[str, int]
+    """ encoded size of each value in the data storage, or an upper bound of it if stored_data_sizes_exact isn't set """
+    stored_data_size: int
+    stored_data_sizes_exact: bool
+    max_stored_data_size: int = 64 * 1024 * 1024
+    """ Set packages that would grow the encoded data storage beyond this many characters get refused """
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -250,6 +543,31 @@ class Context:
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    location_spheres: typing.Dict[int, typing.Dict[int, int]]
+    """ { player: { location_id: sphere, ... } } """
+    location_info_cache: typing.Dict[typing.Tuple[int, typing.Tuple[int, ...]], str]
+    """ encoded LocationInfo messages by scouting slot and scouted locations, least recently used first """
+    max_location_info_cache_size: int = 256
+    encoded_game_packages: typing.ClassVar[LRUCache[str]] = LRUCache()
+    """ game data packages encoded as json by checksum, shared by all contexts in this process """
+    max_encoded_game_packages_size: typing.ClassVar[int] = 64 * 1024 * 1024
+    """ characters of encoded game data packages to keep, as hosting processes see many versions over time """
+    encoded_unchecked_game_packages: typing.Dict[str, str]
+    """ encoded game data packages without checksum, by game """
+    room_data_package_games: typing.List[str]
+    room_data_package: typing.Optional[str]
+    """ encoded DataPackage message for all games in this room, which is what clients usually request """
+    max_frame_size: int = 64 * 1024
+    """ queued messages get combined into frames of up to about this many characters, close to the compression window """
+    queued_endpoints: typing.Dict[Client, None]
+    outgoing_stats: OutgoingQueueStats
+    metrics: typing.Optional[ServerMetrics] = None
+    """ only recorded after enable_metrics """
+    metrics_task: typing.Optional[asyncio.Task] = None
+    metrics_file: typing.Optional[str] = None
+    """ file the recorded metrics get written to in Prometheus text format, for example for node_exporter to collect """
+    metrics_file_interval: float = 15
+    metrics_file_task: typing.Optional[asyncio.Task] = None
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
@@ -278,6 +596,8 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.new_items_slots: typing.Set[team_slot] = set()
+        """ slots that received items since the last send_new_items """
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -285,6 +605,9 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        self.hints_by_location: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = \
+            collections.defaultdict(set)
+        """ (team, finding player, location) -> every remembered hint for that location """
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -304,6 +627,13 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.journal: typing.Optional[SaveJournal] = None
+        """ changes since the last save snapshot, when saving to a save file """
+        self.journal_sequence = 0
+        """ sequence number of the last change made to the save state """
+        self.max_journal_size = 16 * 1024 * 1024
+        """ journal size in bytes at which it gets compacted into a new save snapshot """
+        self.compaction_thread: typing.Optional[threading.Thread] = None
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -313,8 +643,15 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_notification_prefixes = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_notification_prefix_lengths = set()
+        self.stored_data_sizes = {}
+        self.stored_data_size = 0
+        self.stored_data_sizes_exact = True
         self.read_data = {}
         self.spheres = []
+        self.location_spheres = {}
+        self.location_info_cache = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -328,6 +665,13 @@ class Context:
         self.location_names = collections.defaultdict(
             lambda: Utils.KeyedDefaultDict(lambda code: f'Unknown location (ID:{code})'))
         self.non_hintable_names = collections.defaultdict(frozenset)
+        self.encoded_unchecked_game_packages = {}
+        self.room_data_package_games = []
+        self.room_data_package = None
+        self.queued_endpoints = {}
+        self.outgoing_stats = OutgoingQueueStats()
+        self._flush_handle: typing.Optional[asyncio.Handle] = None
+        self._first_queued = 0.0
 
         self._load_game_data()
 
@@ -345,8 +689,9 @@ class Context:
 
         for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            # the data package is shared by all contexts in this process, so another one may have done so already
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -368,6 +713,36 @@ class Context:
             self.item_names[game].update(archipelago_item_names)
             self.location_names[game].update(archipelago_location_names)
 
+        # encode the data package of this room up front, clients request it when connecting
+        self.encoded_unchecked_game_packages = {}
+        self.room_data_package = None
+        room_games = set(self.games.values()) | {"Archipelago"}
+        self.room_data_package_games = [game for game in self.gamespackage if game in room_games]
+        self.room_data_package = self.encode_data_package(self.room_data_package_games)
+
+    def encode_game_package(self, game: str) -> str:
+        """Returns the data package of a game encoded as json, encoding it only the first time."""
+        game_package = self.gamespackage[game]
+        checksum = game_package.get("checksum")
+        if not checksum:
+            encoded = self.encoded_unchecked_game_packages.get(game)
+            if encoded is None:
+                encoded = self.encoded_unchecked_game_packages[game] = self.dumper(game_package)
+            return encoded
+        encoded = self.encoded_game_packages.get(checksum)
+        if encoded is None:
+            encoded = self.dumper(game_package)
+            self.encoded_game_packages.set(checksum, encoded, len(encoded), self.max_encoded_game_packages_size)
+        return encoded
+
+    def encode_data_package(self, games: typing.Iterable[str]) -> str:
+        """Encodes a DataPackage message for the games, same as dumper would, from their pre-encoded data packages."""
+        games = list(games)
+        if self.room_data_package is not None and games == self.room_data_package_games:
+            return self.room_data_package
+        game_packages = ",".join(f"{self.dumper(game)}:{self.encode_game_package(game)}" for game in games)
+        return f'[{{"cmd":"DataPackage","data":{{"games":{{{game_packages}}}}}}}]'
+
     def item_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["item_name_to_id"] if game in self.gamespackage else None
 
@@ -388,6 +763,8 @@ class Context:
         else:
             if self.log_network:
                 self.logger.info(f"Outgoing message: {msg}")
+            if self.metrics:
+                self.metrics.record_sent(msg, 1)
             return True
 
     async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
@@ -402,9 +779,14 @@ class Context:
         else:
             if self.log_network:
                 self.logger.info(f"Outgoing message: {msg}")
+            if self.metrics:
+                self.metrics.record_sent(msg, 1)
             return True
 
     async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        return self.broadcast_encoded(endpoints, msg)
+
+    def broadcast_encoded(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
         sockets = []
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
@@ -417,17 +799,96 @@ class Context:
         else:
             if self.log_network:
                 self.logger.info(f"Outgoing broadcast: {msg}")
+            if self.metrics:
+                self.metrics.record_sent(msg, len(sockets))
             return True
 
+    def queue_msgs(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict], awaited: bool = False):
+        """
+        Queues messages for the endpoints. Everything queued for an endpoint during the current event loop tick gets
+        sent together at the end of it, in as few frames as possible. Messages are only encoded once for all endpoints.
+        Like messages sent with async_start(send_msgs(...)), they arrive after messages that get awaited in this tick.
+        Endpoints with the same messages queued share frames sent with websockets.broadcast, which skips clients that
+        can't take them right now. Per-client state, like ReceivedItems, has to be queued as awaited instead.
+        """
+        if not msgs:
+            return
+        data = self.dumper(msgs)[1:-1]  # without the enclosing list, so it can be joined with other messages
+        queued = 0
+        for endpoint in endpoints:
+            if not endpoint.outgoing:
+                self.queued_endpoints[endpoint] = None
+            endpoint.outgoing.append(data)
+            endpoint.outgoing_awaited |= awaited
+            queued += 1
+        if queued:
+            self.outgoing_stats.queued += queued
+            if self.metrics:
+                self.metrics.fan_out.observe(queued)
+            if self._flush_handle is None:
+                self._first_queued = time.perf_counter()
+                self._flush_handle = asyncio.get_running_loop().call_soon(self.flush_outgoing)
+
+    def flush_outgoing(self):
+        """
+        Sends everything queued. Endpoints with the same messages queued get sent the same frames, unless some of
+        their messages are awaited, in which case all of their frames are sent with awaited sends, in order.
+        """
+        self._flush_handle = None
+        endpoints = self.queued_endpoints
+        self.queued_endpoints = {}
+        by_queue: typing.Dict[typing.Tuple[str, ...], typing.List[Client]] = {}
+        depth = 0
+        for endpoint in endpoints:
+            depth += len(endpoint.outgoing)
+            if endpoint.outgoing_awaited:
+                frames = self._get_frames(endpoint.outgoing)
+                self.outgoing_stats.frames += len(frames)
+                async_start(self._send_frames(endpoint, frames))
+            else:
+                by_queue.setdefault(tuple(endpoint.outgoing), []).append(endpoint)
+            endpoint.outgoing = []
+            endpoint.outgoing_awaited = False
+        for queued, queue_endpoints in by_queue.items():
+            for frame in self._get_frames(queued):
+                self.broadcast_encoded(queue_endpoints, frame)
+                self.outgoing_stats.frames += 1
+
+        stats = self.outgoing_stats
+        latency = time.perf_counter() - self._first_queued
+        stats.flushes += 1
+        stats.max_depth = max(stats.max_depth, depth)
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+
+    def _get_frames(self, queued: typing.Sequence[str]) -> typing.List[str]:
+        frames: typing.List[str] = []
+        frame: typing.List[str] = []
+        frame_size = 0
+        for data in queued:
+            if frame and frame_size + len(data) > self.max_frame_size:
+                frames.append(f"[{','.join(frame)}]")
+                frame = []
+                frame_size = 0
+            frame.append(data)
+            frame_size += len(data) + 1
+        if frame:
+            frames.append(f"[{','.join(frame)}]")
+        return frames
+
+    async def _send_frames(self, endpoint: Client, frames: typing.List[str]):
+        for frame in frames:
+            if not await self.send_encoded_msgs(endpoint, frame):
+                break
+
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
         endpoints = (
             endpoint
             for endpoint in self.endpoints
             if endpoint.auth and not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.queue_msgs(endpoints, msgs)
 
     def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
         self.logger.info("Notice (all): %s" % text)
@@ -435,17 +896,36 @@ class Context:
 
     def broadcast_team(self, team: int, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
         endpoints = (
             endpoint
             for endpoint in itertools.chain.from_iterable(self.clients[team].values())
             if not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.queue_msgs(endpoints, msgs)
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.queue_msgs(endpoints, msgs)
+
+    def get_metrics_labels(self) -> typing.Dict[str, str]:
+        """Labels identifying this server in exported metrics."""
+        return {"port": str(self.port)}
+
+    def enable_metrics(self) -> None:
+        """Starts recording metrics, from now on."""
+        self.metrics = ServerMetrics(self.get_metrics_labels(), self.outgoing_stats)
+        if not self.metrics_task:
+            self.metrics_task = asyncio.create_task(monitor_event_loop_lag(self))
+        if self.metrics_file and not self.metrics_file_task:
+            self.metrics_file_task = asyncio.create_task(write_metrics_file(self))
+
+    def disable_metrics(self) -> None:
+        self.metrics = None
+        if self.metrics_task:
+            self.metrics_task.cancel()
+            self.metrics_task = None
+        if self.metrics_file_task:
+            self.metrics_file_task.cancel()
+            self.metrics_file_task = None
 
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
@@ -458,14 +938,14 @@ class Context:
         if not client.auth or client.no_text:
             return
         self.logger.info("Notice (Player %s in team %d): %s" % (client.name, client.team + 1, text))
-        async_start(self.send_msgs(client, [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}]))
+        self.queue_msgs([client], [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}],
+                        awaited=True)
 
     def notify_client_multiple(self, client: Client, texts: typing.List[str], additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
-        async_start(self.send_msgs(client,
-                                   [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
-                                    for text in texts]))
+        self.queue_msgs([client], [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
+                                   for text in texts], awaited=True)
 
     # loading
     def load(self, multidatapath: str, use_embedded_server_options: bool = False):
@@ -487,10 +967,15 @@ class Context:
 
     @staticmethod
     def decompress(data: bytes) -> dict:
+        return restricted_loads(Context.decompress_pickled(data))
+
+    @staticmethod
+    def decompress_pickled(data: bytes) -> bytes:
+        """Returns the pickled multidata of a compressed multidata file."""
         format_version = data[0]
         if format_version > 3:
             raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+        return zlib.decompress(data[1:])
 
     def _load(self, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
@@ -536,6 +1021,7 @@ class Context:
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
         self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        self.location_info_cache.clear()
         self.slot_data = decoded_obj['slot_data']
         for slot, data in self.slot_data.items():
             self.read_data[f"slot_data_{slot}"] = lambda data=data: data
@@ -548,6 +1034,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            self.index_hints(0, hints)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -578,6 +1065,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.location_spheres = get_location_spheres(self.spheres)
 
     # saving
 
@@ -587,42 +1075,163 @@ class Context:
                 self.save_dirty = False
                 return self._save()
 
+            if self.journal:
+                # changes are journaled as they happen, only compact once the journal grows too big
+                if self.journal.size > self.max_journal_size:
+                    self.compact_journal()
+                return True
+
             self.save_dirty = True
             return True
 
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        if self.compaction_thread:
+            self.compaction_thread.join()
         try:
             # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
             encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
+        except Exception as e:
+            self.logger.exception(e)
+            return False
+        if not self._write_save(encoded_save):
+            return False
+        if self.journal:
+            self.journal.clear()
+        return True
+
+    def _write_save(self, encoded_save: bytes) -> bool:
+        try:
+            temp_filename = self.save_filename + ".tmp"
+            with open(temp_filename, "wb") as f:
                 f.write(zlib.compress(encoded_save))
+                f.flush()
+                os.fsync(f.fileno())  # on disk before the journal it covers gets removed
+            os.replace(temp_filename, self.save_filename)
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
             return True
 
+    def compact_journal(self) -> None:
+        """Snapshots the save state and starts a new journal. The snapshot is pickled, compressed and written in a
+        thread, the journal it covers is only removed once it is written."""
+        if self.compaction_thread and self.compaction_thread.is_alive():
+            return  # compact again once the running compaction is done
+        snapshot = self.get_save_snapshot()
+        self.journal.rotate()
+
+        def write_snapshot(journal: SaveJournal):
+            try:
+                encoded_save = pickle.dumps(snapshot)
+            except Exception as e:
+                self.logger.exception(e)
+                return  # the old journal stays and gets replayed together with the new one
+            if self._write_save(encoded_save):
+                journal.remove_old()
+
+        self.compaction_thread = threading.Thread(target=write_snapshot, args=(self.journal,), daemon=True)
+        self.compaction_thread.start()
+
+    def journal_event(self, *event: typing.Any) -> None:
+        """Records a change of the save state, when saving to a save file. See replay_journal_event for events."""
+        if self.journal:
+            self.journal_sequence += 1
+            self.journal.append(self.journal_sequence, event)
+
+    def replay_journal_event(self, event: tuple) -> None:
+        name, *args = event
+        if name == "location_checks":
+            team, slot, locations, activity_timestamp = args
+            send_location_items(self, team, slot, locations)
+            self.location_checks[team, slot] |= locations
+            if activity_timestamp is not None:
+                self.client_activity_timers[team, slot] = \
+                    datetime.datetime.fromtimestamp(activity_timestamp, datetime.timezone.utc)
+        elif name == "send_items":
+            team, target_slot, items = args
+            send_items_to(self, team, target_slot, *items)
+        elif name == "getitem":
+            team, slot, item = args
+            get_received_items(self, team, slot, False).append(item)
+            get_received_items(self, team, slot, True).append(item)
+        elif name == "hint":
+            team, hint = args
+            self.add_hint(team, hint)
+        elif name == "replace_hint":
+            self.replace_hint(*args)
+        elif name == "hints_used":
+            team, slot, hints_used = args
+            self.hints_used[team, slot] = hints_used
+        elif name == "alias":
+            team, slot, alias = args
+            if alias is None:
+                self.name_aliases.pop((team, slot), None)
+            else:
+                self.name_aliases[team, slot] = alias
+        elif name == "client_status":
+            team, slot, status = args
+            self.client_game_state[team, slot] = status
+        elif name == "stored_data":
+            self.modify_stored_data(*args)
+        elif name == "group_collected":
+            group, slot = args
+            self.group_collected.setdefault(group, set()).add(slot)
+        elif name == "connection_timer":
+            team, slot, timestamp = args
+            self.client_connection_timers[team, slot] = \
+                datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+        elif name == "option":
+            option_name, value = args
+            setattr(self, option_name, value)
+        else:
+            raise ValueError(f"Unknown journal event {name}")
+
+    def replay_journal(self, journal: SaveJournal) -> None:
+        """Applies the journaled changes made after the loaded save snapshot."""
+        replayed = 0
+        for sequence, event in journal.read_all():
+            if sequence > self.journal_sequence:
+                self.replay_journal_event(event)
+                self.journal_sequence = sequence
+                replayed += 1
+        if replayed:
+            self.logger.info(f"Replayed {replayed} changes from the save journal")
+
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
-                import os
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            journal = SaveJournal(self.save_filename + ".journal")
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
                     self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
+                journal.clear()  # a journal without the save it belongs to can't be replayed
             except Exception as e:
                 self.logger.exception(e)
+                journal.clear()
+            else:
+                self.replay_journal(journal)
+            # start journaling from a fresh snapshot
+            self.journal = journal
+            self._save()
             self._start_async_saving()
 
     def _start_async_saving(self, atexit_save: bool = True):
+        if self.journal:
+            # changes are journaled as they happen, saving only has to happen on exit
+            if atexit_save:
+                import atexit
+                atexit.register(self._save, True)
+            return
         if not self.auto_saver_thread:
             def save_regularly():
                 # time.time() is platform dependent, so using the expensive datetime method instead
@@ -669,6 +1278,7 @@ class Context:
             "client_connection_timers": tuple(
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
+            "journal_sequence": self.journal_sequence,
             "group_collected": dict(self.group_collected),
             "stored_data": self.stored_data,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
@@ -682,6 +1292,18 @@ class Context:
 
         return d
 
+    def get_save_snapshot(self) -> dict:
+        """Returns get_save with copies of the containers that get changed in place, so it can be pickled outside of
+        the event loop. Stored data values get replaced instead of changed, so only their dict gets copied."""
+        save = self.get_save()
+        for key, value in save.items():
+            if key == "stored_data":
+                save[key] = dict(value)
+            elif isinstance(value, dict):
+                save[key] = {inner_key: copy.copy(inner_value) if isinstance(inner_value, (dict, list, set))
+                             else inner_value for inner_key, inner_value in value.items()}
+        return save
+
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
@@ -690,6 +1312,8 @@ class Context:
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        for (team, slot), hints in savedata["hints"].items():
+            self.index_hints(team, hints)
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -701,6 +1325,7 @@ class Context:
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
         self.random.setstate(savedata["random_state"])
+        self.journal_sequence = savedata.get("journal_sequence", 0)
 
         if "game_options" in savedata:
             self.hint_cost = savedata["game_options"]["hint_cost"]
@@ -719,6 +1344,7 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+            self.measure_stored_data()
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -748,6 +1374,7 @@ class Context:
                 new_hints.add(new_hint)
                 if hint == new_hint:
                     continue
+                self.reindex_hint(hint_team, hint, new_hint)
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -755,6 +1382,32 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, finding_player: int, locations: typing.Iterable[int],
+                               changed: typing.Set[team_slot]) -> None:
+        """Refreshes only the hints for locations of finding_player that were just checked, in every slot that
+        remembers them. Each (team,slot) pair that has at least one hint modified will be added to 'changed'.
+        """
+        for location in locations:
+            hints = self.hints_by_location.get((team, finding_player, location))
+            if not hints:
+                continue
+            for hint in list(hints):
+                new_hint = hint.re_check(self, team)
+                if hint == new_hint:
+                    continue
+                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                    changed.add((team, player))
+                    self.replace_hint(team, player, hint, new_hint)
+
+    def index_hints(self, team: int, hints: typing.Iterable[Hint]) -> None:
+        for hint in hints:
+            self.hints_by_location[team, hint.finding_player, hint.location].add(hint)
+
+    def reindex_hint(self, team: int, old_hint: Hint, new_hint: Hint) -> None:
+        hints = self.hints_by_location[team, old_hint.finding_player, old_hint.location]
+        hints.discard(old_hint)
+        hints.add(new_hint)
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
@@ -762,13 +1415,26 @@ class Context:
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
+            sphere = self.location_spheres.get(player, {}).get(location_id)
+            if sphere is not None:
+                return sphere
             raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
                            f"Location or player may not exist.")
         return -1
 
+    def get_location_info(self, slot: int, locations: typing.Sequence[int]) -> str:
+        """Get the encoded LocationInfo message for a scout of locations by slot.
+        Raises KeyError for locations that do not exist for slot."""
+        key = slot, tuple(locations)
+        msg = self.location_info_cache.pop(key, None)
+        if msg is None:
+            items = [NetworkItem(*entry) for entry in self.locations.scout(slot, key[1])]
+            msg = self.dumper([{"cmd": "LocationInfo", "locations": items}])
+            if len(self.location_info_cache) >= self.max_location_info_cache_size:
+                del self.location_info_cache[next(iter(self.location_info_cache))]
+        self.location_info_cache[key] = msg
+        return msg
+
     def get_players_package(self):
         return [NetworkPlayer(t, p, self.get_aliased_name(t, p), n) for (t, p), n in self.player_names.items()]
 
@@ -824,11 +1490,8 @@ class Context:
                 # since hints are bidirectional, finding player and receiving player,
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
-                    self.hints[team, hint.finding_player].add(hint)
-                    new_hint_events.add(hint.finding_player)
-                    for player in self.slot_set(hint.receiving_player):
-                        self.hints[team, player].add(hint)
-                        new_hint_events.add(player)
+                    new_hint_events |= self.add_hint(team, hint)
+                    self.journal_event("hint", team, hint)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
@@ -839,12 +1502,88 @@ class Context:
                 if not clients:
                     continue
                 client_hints = [datum[1] for datum in sorted(hint_data, key=lambda x: x[0].finding_player != slot)]
-                for client in clients:
-                    async_start(self.send_msgs(client, client_hints))
+                self.queue_msgs(clients, client_hints, awaited=True)
+
+    def modify_stored_data(self, key: str, default: typing.Any,
+                           operations: typing.List[dict]) -> typing.Tuple[typing.Any, typing.Any]:
+        """Applies data storage operations to the value stored at key, or to default if there is none.
+        Returns the value from before and after the operations.
+        Raises DataStorageFull, leaving the value as it was, if the new value would grow the data storage beyond
+        max_stored_data_size."""
+        original_value = self.stored_data.get(key, default)
+        # operations like update change the value in place, stored values get replaced instead (see get_save_snapshot)
+        value = copy.copy(original_value)
+        for operation in operations:
+            func = modify_functions[operation["operation"]]
+            value = func(value, operation["value"])
+        old_size = self.stored_data_sizes.get(key, 0)
+        size = self.estimate_stored_data_size(key, value, operations)
+        if size > old_size and self.stored_data_size - old_size + size > self.max_stored_data_size:
+            # sizes may be estimated too big, only refuse by exact sizes
+            if not self.stored_data_sizes_exact:
+                self.measure_stored_data()
+                old_size = self.stored_data_sizes.get(key, 0)
+            size = len(self.dumper(value))
+            if size > old_size and self.stored_data_size - old_size + size > self.max_stored_data_size:
+                raise DataStorageFull(f"Setting {key} would grow the data storage beyond "
+                                      f"{self.max_stored_data_size} characters.")
+        self.stored_data[key] = value
+        self.stored_data_sizes[key] = size
+        self.stored_data_size += size - old_size
+        self.journal_event("stored_data", key, default, operations)
+        return original_value, value
+
+    def estimate_stored_data_size(self, key: str, value: typing.Any, operations: typing.List[dict]) -> int:
+        """Returns an upper bound of the encoded size of value, the result of applying operations to the value stored
+        at key. Avoids encoding big lists, dicts and strings again when the operations can only change them by
+        their operands."""
+        old_size = self.stored_data_sizes.get(key)
+        if old_size is None or not isinstance(value, (str, list, dict)):
+            return len(self.dumper(value))
+        size = old_size
+        for operation in operations:
+            if operation["operation"] in ("add", "update"):
+                size += len(self.dumper(operation["value"]))
+            elif operation["operation"] not in ("default", "remove", "pop"):
+                return len(self.dumper(value))
+        if any(operation["operation"] != "default" for operation in operations):
+            self.stored_data_sizes_exact = False
+        return size
+
+    def measure_stored_data(self) -> None:
+        """Sets the sizes of the data storage values to their exact encoded size."""
+        self.stored_data_sizes = {key: len(self.dumper(value)) for key, value in self.stored_data.items()}
+        self.stored_data_size = sum(self.stored_data_sizes.values())
+        self.stored_data_sizes_exact = True
+
+    def add_stored_data_notification(self, client: Client, key: str, prefix: bool = False) -> None:
+        """Subscribes client to the SetReply packages of key, or of all keys starting with key if prefix is set."""
+        if prefix:
+            self.stored_data_notification_prefixes[key].add(client)
+            self.stored_data_notification_prefix_lengths.add(len(key))
+        else:
+            self.stored_data_notification_clients[key].add(client)
+
+    def get_stored_data_notification_clients(self, key: str) -> typing.Set[Client]:
+        """Returns the clients subscribed to the SetReply packages of key, directly or by prefix."""
+        targets: typing.Set[Client] = set(self.stored_data_notification_clients.get(key, ()))
+        for length in self.stored_data_notification_prefix_lengths:
+            clients = self.stored_data_notification_prefixes.get(key[:length])
+            if clients:
+                targets.update(clients)
+        return targets
+
+    def add_hint(self, team: int, hint: Hint) -> typing.Set[int]:
+        """Remembers a hint for its finding and receiving players, returns those players."""
+        players = self.slot_set(hint.receiving_player) | {hint.finding_player}
+        for player in players:
+            self.hints[team, player].add(hint)
+        self.hints_by_location[team, hint.finding_player, hint.location].add(hint)
+        return players
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
+        for hint in self.hints_by_location.get((team, finding_player, seeked_location), ()):
+            if hint in self.hints[team, finding_player]:
                 return hint
         return None
     
@@ -852,6 +1591,8 @@ class Context:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.reindex_hint(team, old_hint, new_hint)
+            self.journal_event("replace_hint", team, slot, old_hint, new_hint)
     
     # "events"
 
@@ -874,24 +1615,20 @@ class Context:
 
     def on_changed_hints(self, team: int, slot: int):
         key: str = f"_read_hints_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        targets = self.get_stored_data_notification_clients(key)
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        targets = self.get_stored_data_notification_clients(key)
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.client_game_state[team, slot]}])
 
 
 def update_aliases(ctx: Context, team: int):
-    cmd = ctx.dumper([{"cmd": "RoomUpdate",
-                       "players": ctx.get_players_package()}])
-
-    for clients in ctx.clients[team].values():
-        for client in clients:
-            async_start(ctx.send_encoded_msgs(client, cmd))
+    ctx.queue_msgs(itertools.chain.from_iterable(ctx.clients[team].values()),
+                   [{"cmd": "RoomUpdate", "players": ctx.get_players_package()}], awaited=True)
 
 
 async def server(websocket: "ServerConnection", path: str = "/", ctx: Context = None) -> None:
@@ -907,8 +1644,16 @@ async def server(websocket: "ServerConnection", path: str = "/", ctx: Context =
         async for data in websocket:
             if ctx.log_network:
                 ctx.logger.info(f"Incoming message: {data}")
+            if ctx.metrics:
+                ctx.metrics.record_received(data)
             for msg in decode(data):
-                await process_client_cmd(ctx, client, msg)
+                if ctx.metrics:
+                    start = time.perf_counter()
+                    await process_client_cmd(ctx, client, msg)
+                    if ctx.metrics:  # could have been disabled by this command
+                        ctx.metrics.record_command(msg, time.perf_counter() - start)
+                else:
+                    await process_client_cmd(ctx, client, msg)
     except Exception as e:
         if not isinstance(e, websockets.WebSocketException):
             ctx.logger.exception(e)
@@ -918,6 +1663,34 @@ async def server(websocket: "ServerConnection", path: str = "/", ctx: Context =
         await ctx.disconnect(client)
 
 
+async def monitor_event_loop_lag(ctx: Context, interval: float = 0.5) -> None:
+    """Records how late the event loop wakes this task up, while metrics are enabled."""
+    while ctx.metrics and not ctx.exit_event.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        if ctx.metrics:
+            ctx.metrics.loop_lag.observe(max(0.0, time.perf_counter() - start - interval))
+
+
+async def write_metrics_file(ctx: Context) -> None:
+    """Regularly replaces Context.metrics_file with the recorded metrics, while metrics are enabled."""
+
+    def write(text: str) -> None:
+        # replaced at once, so readers never see a partially written file
+        temp_filename = ctx.metrics_file + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_filename, ctx.metrics_file)
+
+    loop = asyncio.get_running_loop()
+    while ctx.metrics and not ctx.exit_event.is_set():
+        try:
+            await loop.run_in_executor(None, write, ctx.metrics.get_prometheus_text())
+        except OSError as e:
+            ctx.logger.warning(f"Could not write metrics to {ctx.metrics_file}: {e}")
+        await asyncio.sleep(ctx.metrics_file_interval)
+
+
 async def on_client_connected(ctx: Context, client: Client):
     games = {ctx.games[x] for x in range(1, len(ctx.games) + 1)}
     games.add("Archipelago")
@@ -984,12 +1757,16 @@ async def on_client_joined(ctx: Context, client: Client):
                                   "It may stop working in the future. If you are a player, please report this to the "
                                   "client's developer.")
     ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+    ctx.journal_event("connection_timer", client.team, client.slot,
+                      ctx.client_connection_timers[client.team, client.slot].timestamp())
 
 
 async def on_client_left(ctx: Context, client: Client):
     if len(ctx.clients[client.team][client.slot]) < 1:
         update_client_status(ctx, client, ClientStatus.CLIENT_UNKNOWN)
         ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.journal_event("connection_timer", client.team, client.slot,
+                          ctx.client_connection_timers[client.team, client.slot].timestamp())
 
     version_str = '.'.join(str(x) for x in client.version)
 
@@ -1068,20 +1845,21 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Sends the items received since the last call to the clients of the slots that received them."""
+    new_items_slots, ctx.new_items_slots = ctx.new_items_slots, set()
+    for team, slot in new_items_slots:
+        for client in ctx.clients[team].get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                ctx.queue_msgs([client], [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}], awaited=True)
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1115,6 +1893,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.journal_event("group_collected", group, slot)
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -1125,12 +1904,33 @@ def get_remaining(ctx: Context, team: int, slot: int) -> typing.List[typing.Tupl
 
 def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem):
     for target in ctx.slot_set(target_slot):
+        ctx.new_items_slots.add((team, target))
         for item in items:
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
 
 
+def send_location_items(ctx: Context, team: int, slot: int, locations: typing.Iterable[int]
+                        ) -> typing.List[typing.Tuple[int, NetworkItem]]:
+    """Sends the items placed at locations of slot, grouped by receiver and item.
+    Returns the receiver of each item sent, in sending order."""
+    slot_locations = ctx.locations[slot]
+    sortable: list[tuple[int, int, int, int]] = []
+    for location in locations:
+        # extract all fields to avoid runtime overhead in LocationStore
+        item_id, target_player, flags = slot_locations[location]
+        # sort/group by receiver and item
+        sortable.append((target_player, item_id, location, flags))
+
+    sent_items: typing.List[typing.Tuple[int, NetworkItem]] = []
+    for target_player, item_id, location, flags in sorted(sortable):
+        new_item = NetworkItem(item_id, location, slot, flags)
+        send_items_to(ctx, team, target_player, new_item)
+        sent_items.append((target_player, new_item))
+    return sent_items
+
+
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
                              count_activity: bool = True):
     slot_locations = ctx.locations[slot]
@@ -1140,21 +1940,13 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
 
-        sortable: list[tuple[int, int, int, int]] = []
-        for location in new_locations:
-            # extract all fields to avoid runtime overhead in LocationStore
-            item_id, target_player, flags = slot_locations[location]
-            # sort/group by receiver and item
-            sortable.append((target_player, item_id, location, flags))
-
         info_texts: list[dict[str, typing.Any]] = []
-        for target_player, item_id, location, flags in sorted(sortable):
-            new_item = NetworkItem(item_id, location, slot, flags)
-            send_items_to(ctx, team, target_player, new_item)
-
+        for target_player, new_item in send_location_items(ctx, team, slot, new_locations):
             ctx.logger.info('(Team #%d) %s sent %s to %s (%s)' % (
-                team + 1, ctx.player_names[(team, slot)], ctx.item_names[ctx.slot_info[target_player].game][item_id],
-                ctx.player_names[(team, target_player)], ctx.location_names[ctx.slot_info[slot].game][location]))
+                team + 1, ctx.player_names[(team, slot)],
+                ctx.item_names[ctx.slot_info[target_player].game][new_item.item],
+                ctx.player_names[(team, target_player)],
+                ctx.location_names[ctx.slot_info[slot].game][new_item.location]))
             if len(info_texts) >= 140:
                 # split into chunks that are close to compression window of 64K but not too big on the wire
                 # (roughly 1300-2600 bytes after compression depending on repetitiveness)
@@ -1163,9 +1955,10 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             info_texts.append(json_format_send_event(new_item, target_player))
         ctx.broadcast_team(team, info_texts)
         del info_texts
-        del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        ctx.journal_event("location_checks", team, slot, new_locations,
+                          ctx.client_activity_timers[team, slot].timestamp() if count_activity else None)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1173,7 +1966,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1650,12 +2443,14 @@ class ClientMessageProcessor(CommonCommandProcessor):
         if alias_name:
             alias_name = alias_name[:16].strip()
             self.ctx.name_aliases[self.client.team, self.client.slot] = alias_name
+            self.ctx.journal_event("alias", self.client.team, self.client.slot, alias_name)
             self.output(f"Hello, {alias_name}")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
             return True
         elif (self.client.team, self.client.slot) in self.ctx.name_aliases:
             del (self.ctx.name_aliases[self.client.team, self.client.slot])
+            self.ctx.journal_event("alias", self.client.team, self.client.slot, None)
             self.output("Removed Alias")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
@@ -1675,6 +2470,8 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_items_slots.add((self.client.team, self.client.slot))
+                self.ctx.journal_event("getitem", self.client.team, self.client.slot, new_item)
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1692,9 +2489,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         points_available = get_client_points(self.ctx, self.client)
         cost = self.ctx.get_hint_cost(self.client.slot)
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.get_rechecked_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1786,6 +2581,8 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.journal_event("hints_used", self.client.team, self.client.slot,
+                                           self.ctx.hints_used[self.client.team, self.client.slot])
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1942,23 +2739,17 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            games = set(args.get("games", []))
+            await ctx.send_encoded_msgs(client, ctx.encode_data_package(name for name in ctx.gamespackage
+                                                                        if name in games))
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
+            await ctx.send_encoded_msgs(client, ctx.encode_data_package(name for name in ctx.gamespackage
+                                                                        if name not in exclusions))
 
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            await ctx.send_encoded_msgs(client, ctx.encode_data_package(ctx.gamespackage))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -2014,25 +2805,24 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 register_location_checks(ctx, client.team, client.slot, args["locations"])
 
         elif cmd == 'LocationScouts':
-            locs = []
+            locations = args["locations"]
             create_as_hint: int = int(args.get("create_as_hint", 0))
-            hints = []
-            for location in args["locations"]:
-                if type(location) is not int:
-                    await ctx.send_msgs(client,
-                                        [{'cmd': 'InvalidPacket', "type": "arguments",
-                                          "text": 'Locations has to be a list of integers',
-                                          "original_cmd": cmd}])
-                    return
+            if any(type(location) is not int for location in locations):
+                await ctx.send_msgs(client,
+                                    [{'cmd': 'InvalidPacket', "type": "arguments",
+                                      "text": 'Locations has to be a list of integers',
+                                      "original_cmd": cmd}])
+                return
 
-                target_item, target_player, flags = ctx.locations[client.slot][location]
-                if create_as_hint:
+            location_info = ctx.get_location_info(client.slot, locations)
+            if create_as_hint:
+                hints = []
+                for location in locations:
                     hints.extend(collect_hint_location_id(ctx, client.team, client.slot, location))
-                locs.append(NetworkItem(target_item, location, target_player, flags))
-            ctx.notify_hints(client.team, hints, only_new=create_as_hint == 2, persist_even_if_found=True)
-            if locs and create_as_hint:
-                ctx.save()
-            await ctx.send_msgs(client, [{'cmd': 'LocationInfo', 'locations': locs}])
+                ctx.notify_hints(client.team, hints, only_new=create_as_hint == 2, persist_even_if_found=True)
+                if locations:
+                    ctx.save()
+            await ctx.send_encoded_msgs(client, location_info)
 
         elif cmd == 'CreateHints':
             location_player = args.get("player", client.slot)
@@ -2053,20 +2843,22 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                       "original_cmd": cmd}])
                 return
 
-            hints = []
-
-            for location in locations:
-                if location_player != client.slot and location not in ctx.locations[location_player]:
-                    error_text = (
-                        "CreateHints: One or more of the locations do not exist for the specified off-world player. "
-                        "Please refrain from hinting other slot's locations that you don't know contain your items."
-                    )
-                    await ctx.send_msgs(client, [{"cmd": "InvalidPacket", "type": "arguments",
-                                                  "text": error_text, "original_cmd": cmd}])
-                    return
+            try:
+                scouted = ctx.locations.scout(location_player, locations)
+            except KeyError:
+                if location_player == client.slot:
+                    raise
+                error_text = (
+                    "CreateHints: One or more of the locations do not exist for the specified off-world player. "
+                    "Please refrain from hinting other slot's locations that you don't know contain your items."
+                )
+                await ctx.send_msgs(client, [{"cmd": "InvalidPacket", "type": "arguments",
+                                              "text": error_text, "original_cmd": cmd}])
+                return
 
-                target_item, item_player, flags = ctx.locations[location_player][location]
+            hints = []
 
+            for target_item, location, item_player, flags in scouted:
                 if client.slot not in ctx.slot_set(item_player):
                     if status != HintStatus.HINT_UNSPECIFIED:
                         error_text = 'CreateHints: Must use "unspecified"/None status for items from other players.'
@@ -2179,28 +2971,36 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'Set', "original_cmd": cmd}])
                 return
+            try:
+                original_value, value = ctx.modify_stored_data(args["key"], args.get("default", 0),
+                                                               args["operations"])
+            except DataStorageFull as e:
+                await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
+                                              "text": str(e), "original_cmd": cmd}])
+                return
             args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
+            args["original_value"] = original_value
             args["slot"] = client.slot
-            for operation in args["operations"]:
-                func = modify_functions[operation["operation"]]
-                value = func(value, operation["value"])
-            ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
+            args["value"] = value
+            targets = ctx.get_stored_data_notification_clients(args["key"])
             if args.get("want_reply", False):
                 targets.add(client)
             if targets:
+                # queued, so all SetReply packages of a tick reach each client in one frame
                 ctx.broadcast(targets, [args])
             ctx.save()
 
         elif cmd == "SetNotify":
-            if "keys" not in args or type(args["keys"]) != list:
+            prefixes = args.get("prefixes", [])
+            if "keys" not in args or type(args["keys"]) != list or type(prefixes) != list or \
+                    not all(type(prefix) == str for prefix in prefixes):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'SetNotify', "original_cmd": cmd}])
                 return
             for key in args["keys"]:
-                ctx.stored_data_notification_clients[key].add(client)
+                ctx.add_stored_data_notification(client, key)
+            for prefix in prefixes:
+                ctx.add_stored_data_notification(client, prefix, prefix=True)
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
@@ -2215,6 +3015,7 @@ def update_client_status(ctx: Context, client: Client, new_status: ClientStatus)
                 ctx.broadcast_text_all(f"Team #{client.team + 1} has completed all of their games! Congratulations!")
 
         ctx.client_game_state[client.team, client.slot] = new_status
+        ctx.journal_event("client_status", client.team, client.slot, new_status)
         ctx.on_client_status_change(client.team, client.slot)
         ctx.save()
 
@@ -2274,12 +3075,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
                     if alias_name:
                         alias_name = alias_name.strip()[:15]
                         self.ctx.name_aliases[team, slot] = alias_name
+                        self.ctx.journal_event("alias", team, slot, alias_name)
                         self.output(f"Named {player_name} as {alias_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
                         return True
                     else:
                         del (self.ctx.name_aliases[team, slot])
+                        self.ctx.journal_event("alias", team, slot, None)
                         self.output(f"Removed Alias for {player_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
@@ -2384,6 +3187,7 @@ class ServerCommandProcessor(CommonCommandProcessor):
                     raise ValueError(f"{amount} is invalid. Maximum is 100.")
                 new_items = [NetworkItem(names[item_name], -1, 0) for _ in range(int(amount))]
                 send_items_to(self.ctx, team, slot, *new_items)
+                self.ctx.journal_event("send_items", team, slot, new_items)
 
                 send_new_items(self.ctx)
                 self.ctx.broadcast_text_all(
@@ -2537,6 +3341,7 @@ class ServerCommandProcessor(CommonCommandProcessor):
                 return False
 
         setattr(self.ctx, option_name, value_type(option_value))
+        self.ctx.journal_event("option", option_name, getattr(self.ctx, option_name))
         self.output(f"Set option {option_name} to {getattr(self.ctx, option_name)}")
         if option_name in {"release_mode", "remaining_mode", "collect_mode"}:
             self.ctx.broadcast_all([{"cmd": "RoomUpdate", 'permissions': get_permissions(self.ctx)}])
@@ -2544,6 +3349,26 @@ class ServerCommandProcessor(CommonCommandProcessor):
             self.ctx.broadcast_all([{"cmd": "RoomUpdate", option_name: getattr(self.ctx, option_name)}])
         return True
 
+    def _cmd_metrics(self, mode: str = "") -> bool:
+        """Show how much time handling each kind of client command takes, and other network metrics.
+        "on" or "off" to start or stop recording, "prometheus" to show them in Prometheus text format."""
+        if mode.lower() == "on":
+            self.ctx.enable_metrics()
+            self.output("Recording metrics.")
+            return True
+        if mode.lower() == "off":
+            self.ctx.disable_metrics()
+            self.output("Stopped recording metrics.")
+            return True
+        if not self.ctx.metrics:
+            self.output("Metrics are not being recorded, use /metrics on to start.")
+            return False
+        if mode.lower() == "prometheus":
+            self.output(self.ctx.metrics.get_prometheus_text())
+        else:
+            self.output("\n".join(self.ctx.metrics.get_summary()))
+        return True
+
     def _cmd_datastore(self):
         """Debug Tool: list writable datastorage keys and approximate the size of their values with pickle."""
         total: int = 0
@@ -2645,6 +3470,13 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--max_stored_data_size', default=defaults["max_stored_data_size"], type=int,
+                        help="refuse data storage Set packages that would grow it beyond this many characters")
+    parser.add_argument('--metrics', default=defaults["metrics"], action="store_true",
+                        help="record handling time of client commands and other network metrics, "
+                             "shown by the /metrics server command")
+    parser.add_argument('--metrics_file', default=defaults["metrics_file"],
+                        help="regularly write the recorded metrics to this file in Prometheus text format")
     args = parser.parse_args()
     return args
 
@@ -2692,6 +3524,8 @@ async def main(args: argparse.Namespace):
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.countdown_mode, args.remaining_mode,
                   args.auto_shutdown, args.compatibility, args.log_network)
+    ctx.max_stored_data_size = args.max_stored_data_size
+    ctx.metrics_file = args.metrics_file
     data_filename = args.multidata
 
     if not data_filename:
@@ -2737,6 +3571,8 @@ async def main(args: argparse.Namespace):
                                                  'No password' if not ctx.password else 'Password: %s' % ctx.password))
 
     await ctx.server
+    if args.metrics:
+        ctx.enable_metrics()
     console_task = asyncio.create_task(console(ctx))
     if ctx.auto_shutdown:
         ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, [console_task]))
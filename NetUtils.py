@@ -135,10 +135,54 @@ _encode = JSONEncoder(
 ).encode
 
 
-def encode(obj: typing.Any) -> str:
+def _encode_json(obj: typing.Any) -> str:
     return _encode(_scan_for_TypedTuples(obj))
 
 
+_scalar_types = (str, int, float, bool, type(None))
+_container_types = (tuple, list, dict, set, frozenset)
+
+
+def _fast_encode_default(obj: typing.Any) -> typing.Any:
+    """Converts the types orjson has no native handling for the same way as _scan_for_TypedTuples."""
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        for value in obj:
+            # _scan_for_TypedTuples doesn't look into NamedTuples, so anything orjson would convert in there,
+            # nested NamedTuples and sets, has to go through the json module instead
+            if value.__class__ not in _scalar_types and isinstance(value, _container_types) and (
+                    value.__class__ not in (list, tuple) or
+                    any(isinstance(element, _container_types) for element in value)):
+                raise TypeError
+        data = dict(zip(obj._fields, obj))
+        data["class"] = obj.__class__.__name__
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError
+
+
+def _has_small_float(data: bytes) -> bool:
+    """Whether data has a float with a negative exponent, which orjson writes differently than the json module."""
+    index = data.find(b"e-")
+    while index != -1:
+        if data[index - 1:index].isdigit():
+            return True
+        index = data.find(b"e-", index + 2)
+    return False
+
+
+def _fast_encode(obj: typing.Any) -> str:
+    try:
+        data = _orjson.dumps(obj, default=_fast_encode_default, option=_fast_encode_options)
+    except _orjson.JSONEncodeError:
+        # integers beyond 64 bit, lone surrogates and anything the json module would refuse to encode
+        return _encode_json(obj)
+    if b"null" in data or b"0.0000" in data or _has_small_float(data):
+        # orjson writes NaN and Infinity as null and small floats in another notation, leave those to the json module
+        return _encode_json(obj)
+    return data.decode()
+
+
 def get_any_version(data: dict) -> Version:
     data = {key.lower(): value for key, value in data.items()}  # .NET version classes have capitalized keys
     return Version(int(data["major"]), int(data["minor"]), int(data["build"]))
@@ -162,6 +206,10 @@ def _object_hook(o: typing.Any) -> typing.Any:
             return hook(o)
         cls = allowlist.get(o.get("class", None), None)
         if cls:
+            try:
+                return cls._make([o[key] for key in cls._fields])
+            except KeyError:  # leave missing fields to their defaults
+                pass
             for key in tuple(o):
                 if key not in cls._fields:
                     del (o[key])
@@ -170,7 +218,37 @@ def _object_hook(o: typing.Any) -> typing.Any:
     return o
 
 
-decode = JSONDecoder(object_hook=_object_hook).decode
+_decode_json = JSONDecoder(object_hook=_object_hook).decode
+
+
+_digits_to_zero = bytes.maketrans(b"123456789", b"000000000")
+
+
+def _fast_decode(s: str) -> typing.Any:
+    if '"class"' in s or "\\u" in s:
+        # the json module applies _object_hook faster than walking the result here, the key could also be escaped
+        return _decode_json(s)
+    if b"0" * 19 in s.encode("utf-8", "surrogatepass").translate(_digits_to_zero):
+        # orjson turns integers beyond 64 bit into floats
+        return _decode_json(s)
+    try:
+        return _orjson.loads(s)
+    except _orjson.JSONDecodeError:
+        # NaN, Infinity, lone surrogates, or invalid json for the json module to report
+        return _decode_json(s)
+
+
+try:
+    import orjson as _orjson
+except ImportError:
+    encode = _encode_json
+    decode = _decode_json
+else:
+    # dataclasses and datetimes are passed to _fast_encode_default to be refused, like the json module does
+    _fast_encode_options = _orjson.OPT_NON_STR_KEYS | _orjson.OPT_PASSTHROUGH_DATACLASS | \
+        _orjson.OPT_PASSTHROUGH_DATETIME
+    encode = _fast_encode
+    decode = _fast_decode
 
 
 class Endpoint:
@@ -473,6 +551,15 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
                         location_id in player_locations if
                         location_id not in checked])
 
+    def scout(self, slot: int, locations: typing.Iterable[int]) -> typing.List[typing.Tuple[int, int, int, int]]:
+        """Returns (item, location, receiver, flags) for each of the locations of slot, in NetworkItem field order."""
+        player_locations = self[slot]
+        result = []
+        for location_id in locations:
+            item_id, receiving_player, item_flags = player_locations[location_id]
+            result.append((item_id, location_id, receiving_player, item_flags))
+        return result
+
 
 class MinimumVersions(typing.TypedDict):
     server: tuple[int, int, int]
@@ -510,6 +597,17 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+def get_location_spheres(spheres: Sequence[Mapping[int, typing.Iterable[int]]]) -> dict[int, dict[int, int]]:
+    """Indexes multidata spheres as player -> location id -> sphere number, counting from 0."""
+    location_spheres: dict[int, dict[int, int]] = {}
+    for sphere_number, sphere in enumerate(spheres):
+        for player, location_ids in sphere.items():
+            player_spheres = location_spheres.setdefault(player, {})
+            for location_id in location_ids:
+                player_spheres.setdefault(location_id, sphere_number)
+    return location_spheres
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
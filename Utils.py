@@ -15,6 +15,7 @@ import io
 import collections
 import importlib
 import logging
+import threading
 import warnings
 
 from argparse import Namespace
@@ -525,6 +526,66 @@ class KeyedDefaultDict(collections.defaultdict):
         return value
 
 
+class LRUCache(typing.Generic[T]):
+    """Thread-safe cache that evicts the least recently used entries
+    once the sizes of its entries add up to more than the size limit."""
+    _entries: collections.OrderedDict[typing.Hashable, typing.Tuple[T, int]]
+    size: int
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of get calls that found their key, 0 before the first get."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_stats(self) -> typing.Dict[str, typing.Union[int, float]]:
+        """Returns the number of entries, their total size, hits, misses and hit rate, for monitoring."""
+        with self._lock:
+            return {"entries": len(self._entries), "size": self.size, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hit_rate}
+
+    def get(self, key: typing.Hashable) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: typing.Hashable, value: T, size: int, max_size: int) -> None:
+        """Stores value, then evicts least recently used entries until the total size is at most max_size."""
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.size -= old_entry[1]
+            self._entries[key] = value, size
+            self.size += size
+            while self.size > max_size and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+
 def get_text_between(text: str, start: str, end: str) -> str:
     return text[text.index(start) + len(start): text.rindex(end)]
 
@@ -606,7 +667,6 @@ def init_logging(name: str, loglevel: typing.Union[str, int] = logging.INFO,
                         logging.exception(e)
                     else:
                         logging.debug(f"Deleted old logfile {file.path}")
-    import threading
     threading.Thread(target=_cleanup, name="LogCleaner").start()
     import platform
     logging.info(
@@ -43,6 +43,8 @@ app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
 app.config["SELFGEN"] = True  # application process is in charge of scheduling Generations.
 app.config["GAME_PORTS"] = ["49152-65535", 0]
+# local UDP port of the first room hoster to notify of new room commands, the others use the following ports. 0 to poll
+app.config["ROOM_COMMAND_PORT"] = 49100
 # at what amount of worlds should scheduling be used, instead of rolling in the web-thread
 app.config["JOB_THRESHOLD"] = 1
 # after what time in seconds should generation be aborted, freeing the queue slot. Can be set to None to disable.
@@ -53,6 +55,12 @@ app.config["MAX_ROOM_TIMEOUT"] = 259200
 app.config["ROOM_AUTO_DELETE"] = 0
 # memory limit for generator processes in bytes
 app.config["GENERATOR_MEMORY_LIMIT"] = 4294967296
+# size limits in bytes of the pickled multidata and saves each web process keeps decoded for trackers
+app.config["TRACKER_SEED_CACHE_SIZE"] = 32 * 1024 * 1024
+app.config["TRACKER_SAVE_CACHE_SIZE"] = 32 * 1024 * 1024
+# size limit in bytes of the pickled game data packages each web and room hosting process keeps decoded,
+# they are shared by many seeds and most are a few hundred kilobytes
+app.config["GAME_DATA_PACKAGE_CACHE_SIZE"] = 64 * 1024 * 1024
 
 # waitress uses one thread for I/O, these are for processing of views that then get sent
 # archipelago.gg uses gunicorn + nginx; ignoring this option
@@ -0,0 +1,15 @@
+from typing import Dict, Union
+
+from . import api_endpoints
+from ..datacache import game_data_package_cache
+from ..tracker import _multisave_cache, _seed_data_cache
+
+
+@api_endpoints.route('/cache_stats')
+def get_cache_stats() -> Dict[str, Dict[str, Union[int, float]]]:
+    """Hits, misses and sizes of the decoded data caches of the web process answering, see their *_CACHE_SIZE config."""
+    return {
+        "game_data_package": game_data_package_cache.get_stats(),
+        "seed": _seed_data_cache.get_stats(),
+        "save": _multisave_cache.get_stats(),
+    }
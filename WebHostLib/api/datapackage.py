@@ -1,8 +1,7 @@
 from flask import abort
 
-from Utils import restricted_loads
 from WebHostLib import cache
-from WebHostLib.models import GameDataPackage
+from WebHostLib.datacache import get_game_data_package
 from . import api_endpoints
 
 
@@ -16,9 +15,9 @@ def get_datapackage():
 @api_endpoints.route('/datapackage/<string:checksum>')
 @cache.memoize(timeout=3600)
 def get_datapackage_by_checksum(checksum: str):
-    package = GameDataPackage.get(checksum=checksum)
-    if package:
-        return restricted_loads(package.data)
+    decoded = get_game_data_package(checksum)
+    if decoded:
+        return decoded.package
     return abort(404)
 
 
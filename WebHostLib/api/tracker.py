@@ -2,13 +2,13 @@ from datetime import datetime, timezone
 from typing import Any, TypedDict
 from uuid import UUID
 
-from flask import abort
+from flask import Response, abort, make_response, request
 
 from NetUtils import ClientStatus, Hint, NetworkItem, SlotType
 from WebHostLib import cache
 from WebHostLib.api import api_endpoints
 from WebHostLib.models import Room
-from WebHostLib.tracker import TrackerData
+from WebHostLib.tracker import TrackerData, get_save_digest
 
 
 class PlayerAlias(TypedDict):
@@ -23,6 +23,13 @@ class PlayerItemsReceived(TypedDict):
     items: list[NetworkItem]
 
 
+class PlayerNewItemsReceived(TypedDict):
+    team: int
+    player: int
+    index: int
+    items: list[NetworkItem]
+
+
 class PlayerChecksDone(TypedDict):
     team: int
     player: int
@@ -64,12 +71,29 @@ class PlayerGame(TypedDict):
     game: str
 
 
+class PlayerLocationSpheres(TypedDict):
+    player: int
+    spheres: dict[int, int]
+
+
+def get_player_hints(tracker_data: TrackerData, team: int, player: int) -> list[Hint]:
+    """Hints the player has used or received, followed by those of the groups the player is a member of."""
+    hints = sorted(tracker_data.get_player_hints(team, player))
+    for slot in tracker_data.get_all_slots().get(team, []):
+        slot_info = tracker_data.get_slot_info(slot)
+        if slot_info.type == SlotType.group and player in slot_info.group_members:
+            hints += sorted(tracker_data.get_player_hints(team, slot))
+    return hints
+
+
 @api_endpoints.route("/tracker/<suuid:tracker>")
-@cache.memoize(timeout=60)
-def tracker_data(tracker: UUID) -> dict[str, Any]:
+def tracker_data(tracker: UUID) -> Response:
     """
     Outputs json data to <root_path>/api/tracker/<id of current session tracker>.
 
+    The ETag changes with every save of the room, so If-None-Match can be used to only download changed data.
+    With a since argument, only returns what changed after that cursor, see get_tracker_changes.
+
     :param tracker: UUID of current session tracker.
 
     :return: Tracking data for all players in the room. Typing and docstrings describe the format of each value.
@@ -78,8 +102,27 @@ def tracker_data(tracker: UUID) -> dict[str, Any]:
     if not room:
         abort(404)
 
-    tracker_data = TrackerData(room)
-
+    # only decode the save if it changed
+    save_digest = get_save_digest(room)
+    etag = save_digest or "unsaved"
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        since: int | None = request.args.get("since", type=int)
+        if since is None:
+            key = f"api_tracker_{tracker}_{etag}"
+            data = cache.get(key)
+            if data is None:
+                data = get_tracker_data(TrackerData(room, save_digest))
+                cache.set(key, data, 60)
+        else:
+            data = get_tracker_changes(TrackerData(room, save_digest), since)
+        response = make_response(data)
+    response.set_etag(etag)
+    return response
+
+
+def get_tracker_data(tracker_data: TrackerData) -> dict[str, Any]:
     all_players: dict[int, list[int]] = tracker_data.get_all_players()
 
     player_aliases: list[PlayerAlias] = []
@@ -114,14 +157,7 @@ def tracker_data(tracker: UUID) -> dict[str, Any]:
     """Hints that all players have used or received."""
     for team, players in tracker_data.get_all_slots().items():
         for player in players:
-            player_hints = sorted(tracker_data.get_player_hints(team, player))
-            hints.append({"team": team, "player": player, "hints": player_hints})
-            slot_info = tracker_data.get_slot_info(player)
-            # this assumes groups are always after players
-            if slot_info.type != SlotType.group:
-                continue
-            for member in slot_info.group_members:
-                hints[member - 1]["hints"] += player_hints
+            hints.append({"team": team, "player": player, "hints": get_player_hints(tracker_data, team, player)})
 
     activity_timers: list[PlayerTimer] = []
     """Time of last activity per player. Returned as RFC 1123 format and null if no connection has been made."""
@@ -164,6 +200,57 @@ def tracker_data(tracker: UUID) -> dict[str, Any]:
         "activity_timers": activity_timers,
         "connection_timers": connection_timers,
         "player_status": player_status,
+        "cursor": tracker_data.get_tracker_generation(),
+    }
+
+
+def get_tracker_changes(tracker_data: TrackerData, since: int) -> dict[str, Any]:
+    """
+    :param since: The cursor of a previous response of the tracker api.
+
+    :return: What changed in the room after since, in the format of the full tracker data. Aborts with 410 Gone if the
+             room no longer knows what changed after since, after which the full tracker data has to be requested.
+    """
+    changes = tracker_data.get_changes_since(since)
+    if changes is None:
+        abort(410)
+
+    player_checks_done: list[PlayerChecksDone] = [
+        {"team": team, "player": player, "locations": sorted(locations)}
+        for (team, player), locations in sorted(changes.checks.items())
+    ]
+    """ID of the locations checked by each player since the cursor."""
+
+    player_items_received: list[PlayerNewItemsReceived] = [
+        {"team": team, "player": player, "index": index,
+         "items": tracker_data.get_player_received_items(team, player)[index:]}
+        for (team, player), index in sorted(changes.items.items())
+    ]
+    """Items received by each player since the cursor, replacing the items received from index onwards."""
+
+    changed_hints = set(changes.hints)
+    for team, slot in changes.hints:
+        slot_info = tracker_data.get_slot_info(slot)
+        if slot_info.type == SlotType.group:
+            changed_hints.update((team, member) for member in slot_info.group_members)
+    hints: list[PlayerHints] = [
+        {"team": team, "player": player, "hints": get_player_hints(tracker_data, team, player)}
+        for team, player in sorted(changed_hints)
+    ]
+    """All hints of each player whose hints changed since the cursor."""
+
+    player_status: list[PlayerStatus] = [
+        {"team": team, "player": player, "status": tracker_data.get_player_client_status(team, player)}
+        for team, players in tracker_data.get_all_players().items() for player in players
+    ]
+    """The current client status for each player."""
+
+    return {
+        "player_checks_done": player_checks_done,
+        "player_items_received": player_items_received,
+        "hints": hints,
+        "player_status": player_status,
+        "cursor": tracker_data.get_tracker_generation(),
     }
 
 
@@ -222,11 +309,17 @@ def static_tracker_data(tracker: UUID) -> dict[str, Any]:
         for player in players:
             player_game.append({"team": team, "player": player, "game": tracker_data.get_player_game(player)})
 
+    player_location_spheres: list[PlayerLocationSpheres] = []
+    """The sphere of each location per player slot, empty if the room has no sphere data."""
+    for player, spheres in tracker_data.get_location_spheres().items():
+        player_location_spheres.append({"player": player, "spheres": spheres})
+
     return {
         "groups": groups,
         "datapackage": tracker_data._multidata["datapackage"],
         "player_locations_total": player_locations_total,
         "player_game": player_game,
+        "player_location_spheres": player_location_spheres,
     }
 
 
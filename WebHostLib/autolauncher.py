@@ -3,8 +3,9 @@ from __future__ import annotations
 import json
 import logging
 import multiprocessing
+import time
 import typing
-from datetime import timedelta
+from datetime import datetime, timedelta
 from threading import Event, Thread
 from typing import Any
 from uuid import UUID
@@ -16,6 +17,19 @@ from .locker import Locker, AlreadyRunningException
 
 _stop_event = Event()
 
+# the room query backs off between these intervals in seconds while no rooms need to be started
+MIN_ROOM_QUERY_INTERVAL = 0.1
+MAX_ROOM_QUERY_INTERVAL = 1.0
+# in between, only rooms with activity since the previous query are queried, with leeway for transactions in flight
+ROOM_QUERY_LEEWAY = timedelta(seconds=10)
+# all active rooms are queried in this interval in seconds, in case a hoster lost its rooms
+FULL_ROOM_QUERY_INTERVAL = 60
+# hosters whose event loop lags behind by more than this many seconds only get new rooms if all others lag as well
+MAX_HOSTER_LOOP_LAG = 0.1
+# how long in seconds after starting a hoster its room command notifications get probed, until one gets acknowledged
+COMMAND_PROBE_DURATION = 60
+COMMAND_PROBE_TIMEOUT = 0.05
+
 
 def stop() -> None:
     """Stops previously launched threads"""
@@ -118,6 +132,14 @@ def cleanup(config: dict[str, Any]):
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+def place_room(hosters: list[MultiworldInstance], room_id: UUID) -> bool:
+    """Starts the room on the least loaded hoster, unless a hoster already runs it. Returns if it got started."""
+    if any(room_id in hoster.room_ids for hoster in hosters):
+        return False
+    min(hosters, key=MultiworldInstance.get_load).start_room(room_id)
+    return True
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
@@ -130,16 +152,31 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
-                while not stop_event.wait(0.1):
+                interval = MIN_ROOM_QUERY_INTERVAL
+                last_query: datetime | None = None
+                next_full_query = 0.0
+                while not stop_event.wait(interval):
+                    started = False
                     with db_session:
+                        now = utcnow()
+                        cutoff = now - timedelta(seconds=config["MAX_ROOM_TIMEOUT"])
+                        if time.monotonic() >= next_full_query:
+                            next_full_query = time.monotonic() + FULL_ROOM_QUERY_INTERVAL
+                        elif last_query:
+                            # rooms get started and kept alive by updating last_activity
+                            cutoff = max(cutoff, last_query - ROOM_QUERY_LEEWAY)
+                        last_query = now
                         rooms = select(
                             room for room in Room if
-                            room.last_activity >= utcnow() - timedelta(
-                                seconds=config["MAX_ROOM_TIMEOUT"])).order_by(desc(Room.last_port))
+                            room.last_activity >= cutoff).order_by(desc(Room.last_port))
+                        for hoster in hosters:
+                            hoster.collect_shut_down_rooms()
+                            hoster.probe_commands()
                         for room in rooms:
                             # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
                             if room.last_activity >= utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                                started |= place_room(hosters, room.id)
+                    interval = MIN_ROOM_QUERY_INTERVAL if started else min(interval * 2, MAX_ROOM_QUERY_INTERVAL)
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -196,6 +233,11 @@ class MultiworldInstance():
         self.game_ports = config["GAME_PORTS"]
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
+        self.load = HosterLoad(multiprocessing.Value("i", 0), multiprocessing.Value("d", 0.0))
+        self.command_port = get_command_port(config, id)
+        self.command_probe_deadline: typing.Optional[float] = None
+        """ while set, the hoster's room command notifications are not confirmed yet """
+        self.game_data_package_cache_size = config["GAME_DATA_PACKAGE_CACHE_SIZE"]
         self.name = f"MultiHoster{id}"
 
     def start(self):
@@ -205,14 +247,35 @@ class MultiworldInstance():
         process = multiprocessing.Process(group=None, target=run_server_process,
                                           args=(self.name, self.ponyconfig, get_static_server_data(),
                                                 self.cert, self.key, self.host, self.game_ports,
-                                                self.rooms_to_start, self.rooms_shutting_down),
+                                                self.rooms_to_start, self.rooms_shutting_down, self.load,
+                                                self.command_port, self.game_data_package_cache_size),
                                           name=self.name)
         process.start()
         self.process = process
-
-    def start_room(self, room_id):
+        self.command_probe_deadline = time.monotonic() + COMMAND_PROBE_DURATION if self.command_port else None
+
+    def probe_commands(self) -> None:
+        """Probes the room command notifications of the started hoster, which lets its rooms poll the database less
+        often once one gets through. The hoster may not listen yet right after starting, so this retries for a while."""
+        if self.command_probe_deadline is None:
+            return
+        if probe_room_commands(self.command_port, COMMAND_PROBE_TIMEOUT):
+            self.command_probe_deadline = None
+        elif time.monotonic() > self.command_probe_deadline:
+            self.command_probe_deadline = None
+            logging.warning(f"{self.name} did not acknowledge room command notifications on port {self.command_port}, "
+                            f"its rooms keep polling for commands.")
+
+    def collect_shut_down_rooms(self) -> None:
         while not self.rooms_shutting_down.empty():
             self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
+
+    def get_load(self) -> tuple[bool, int]:
+        """Hosters with a lagging event loop sort last, others by the number of rooms and connected clients."""
+        return self.load.loop_lag.value > MAX_HOSTER_LOOP_LAG, len(self.room_ids) + self.load.client_count.value
+
+    def start_room(self, room_id):
+        self.collect_shut_down_rooms()
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
@@ -233,5 +296,6 @@ class MultiworldInstance():
 
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
-from .customserver import run_server_process, get_static_server_data
+from .customserver import HosterLoad, run_server_process, get_static_server_data
 from .generate import gen_game
+from .roomcommands import get_command_port, probe_room_commands
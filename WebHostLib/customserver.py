@@ -14,7 +14,9 @@ import threading
 import time
 import typing
 import sys
+import weakref
 from collections.abc import Iterable
+from uuid import UUID
 
 import psutil
 import websockets
@@ -28,8 +30,11 @@ from MultiServer import (
 )
 from Utils import restricted_loads, cache_argsless
 
+from . import app
+from .datacache import game_data_package_cache, get_game_data_package
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, Room, db
+from .roomcommands import COMMAND_HOST, RoomCommandProtocol
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -66,16 +71,47 @@ class DBCommandProcessor(ServerCommandProcessor):
 
 class WebHostContext(Context):
     room_id: int
-
-    def __init__(self, static_server_data: dict, logger: logging.Logger):
+    tracker_generation: int
+    """ counts the saves that changed checks, received items or hints, used as cursor by the tracker api """
+    tracker_log: typing.Deque[typing.Dict[str, typing.Any]]
+    """ what changed in the latest tracker generations, saved with the multisave for the tracker api """
+    tracker_log_size: int
+    """ checks, received item counts and hints in the tracker log, see get_tracker_log_entry_size """
+    max_tracker_log_length: int = 256
+    max_tracker_log_size: int = 4096
+    max_tracker_log_age: float = 3600
+    """ seconds after which generations get dropped from the tracker log, api clients then get everything again """
+    tracker_pending_checks: typing.DefaultDict[typing.Tuple[int, int], typing.Set[int]]
+    tracker_pending_hints: typing.Set[typing.Tuple[int, int]]
+    tracker_item_counts: typing.Dict[typing.Tuple[int, int], int]
+    """ number of received items of each player as of the last tracker generation """
+    commands_pending: asyncio.Event
+    """ set when notified of new commands in the database """
+    command_notifications: typing.Optional[CommandNotifications]
+    db_command_poll_interval: float = 5
+    """ seconds between looking for commands in the database without being notified """
+    notified_db_command_poll_interval: float = 60
+    """ db_command_poll_interval once command_notifications are confirmed to arrive """
+
+    def __init__(self, static_server_data: dict, logger: logging.Logger,
+                 command_notifications: typing.Optional[CommandNotifications] = None):
         # static server data is used during _load_game_data to load required data,
         # without needing to import worlds system, which takes quite a bit of memory
         self.static_server_data = static_server_data
+        self.command_notifications = command_notifications
+        self.tracker_generation = 0
+        self.tracker_log = collections.deque()
+        self.tracker_log_size = 0
+        self.tracker_pending_checks = collections.defaultdict(set)
+        self.tracker_pending_hints = set()
+        self.tracker_item_counts = {}
+        self.tracker_lock = threading.Lock()
         super(WebHostContext, self).__init__("", 0, "", "", 1,
                                              40, True, "enabled", "enabled",
                                              "enabled", 0, 2, logger=logger)
         del self.static_server_data
         self.main_loop = asyncio.get_running_loop()
+        self.commands_pending = asyncio.Event()
         self.video = {}
         self.tags = ["AP", "WebHost"]
 
@@ -83,6 +119,9 @@ class WebHostContext(Context):
         from Utils import format_SI_prefix
         self.logger.debug(f"Context destroyed, Mem: {format_SI_prefix(psutil.Process().memory_info().rss, 1024)}iB")
 
+    def get_metrics_labels(self) -> typing.Dict[str, str]:
+        return {"room": str(self.room_id)}
+
     def _load_game_data(self):
         for key, value in self.static_server_data.items():
             # NOTE: attributes are mutable and shared, so they will have to be copied before being modified
@@ -93,11 +132,20 @@ class WebHostContext(Context):
         cmdprocessor = DBCommandProcessor(self)
 
         while not self.exit_event.is_set():
+            # cleared first, so that notifications arriving while processing cause another lookup
+            self.commands_pending.clear()
             await self.main_loop.run_in_executor(None, self._process_db_commands, cmdprocessor)
-            try:
-                await asyncio.wait_for(self.exit_event.wait(), 5)
-            except asyncio.TimeoutError:
-                pass
+            waits = {asyncio.create_task(self.exit_event.wait()), asyncio.create_task(self.commands_pending.wait())}
+            _, pending = await asyncio.wait(waits, timeout=self.get_db_command_poll_interval(),
+                                            return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+
+    def get_db_command_poll_interval(self) -> float:
+        """Rooms only poll the database as fallback once notifications of new commands are confirmed to arrive."""
+        if self.command_notifications and self.command_notifications.confirmed:
+            return self.notified_db_command_poll_interval
+        return self.db_command_poll_interval
 
     def _process_db_commands(self, cmdprocessor):
         with db_session:
@@ -136,9 +184,10 @@ class WebHostContext(Context):
                     # games package could be dropped from static data once all rooms embed data package
                     del multidata["datapackage"][game]
                 else:
-                    row = GameDataPackage.get(checksum=game_data["checksum"])
-                    if row:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
-                        game_data_packages[game] = restricted_loads(row.data)
+                    decoded = get_game_data_package(game_data["checksum"])
+                    if decoded:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
+                        # _load removes the name groups from the data package, so it gets a copy of the cached one
+                        game_data_packages[game] = dict(decoded.package)
                         continue
                     else:
                         self.logger.warning(f"Did not find game_data_package for {game}: {game_data['checksum']}")
@@ -165,8 +214,61 @@ class WebHostContext(Context):
             self._start_async_saving(atexit_save=False)
         asyncio.create_task(self.listen_to_db_commands())
 
+    def journal_event(self, *event: typing.Any) -> None:
+        super().journal_event(*event)
+        name = event[0]
+        with self.tracker_lock:
+            if name == "location_checks":
+                team, slot, locations = event[1:4]
+                self.tracker_pending_checks[team, slot] |= locations
+            elif name == "hint":
+                team, hint = event[1:]
+                self.tracker_pending_hints.update(((team, hint.finding_player), (team, hint.receiving_player)))
+            elif name == "replace_hint":
+                team, slot = event[1:3]
+                self.tracker_pending_hints.add((team, slot))
+
+    def record_tracker_generation(self) -> None:
+        """Adds what changed since the last save to the tracker log as a new generation, if anything did."""
+        items: typing.Dict[typing.Tuple[int, int], int] = {}
+        for (team, slot, remote), received_items in list(self.received_items.items()):
+            count = len(received_items)
+            if remote and count > self.tracker_item_counts.get((team, slot), 0):
+                items[team, slot] = self.tracker_item_counts.get((team, slot), 0)
+                self.tracker_item_counts[team, slot] = count
+        with self.tracker_lock:
+            if not (items or self.tracker_pending_checks or self.tracker_pending_hints):
+                return
+            self.tracker_generation += 1
+            entry = {
+                "generation": self.tracker_generation,
+                "time": time.time(),
+                "checks": {key: sorted(locations) for key, locations in self.tracker_pending_checks.items()},
+                "items": items,
+                "hints": sorted(self.tracker_pending_hints),
+            }
+            self.tracker_log.append(entry)
+            self.tracker_log_size += self.get_tracker_log_entry_size(entry)
+            self.tracker_pending_checks.clear()
+            self.tracker_pending_hints.clear()
+            self.trim_tracker_log()
+
+    def trim_tracker_log(self) -> None:
+        """Drops the oldest generations from the tracker log, until it is within its limits of length, size and age.
+        The latest generation always stays."""
+        oldest = time.time() - self.max_tracker_log_age
+        while len(self.tracker_log) > 1 and (len(self.tracker_log) > self.max_tracker_log_length
+                                             or self.tracker_log_size > self.max_tracker_log_size
+                                             or self.tracker_log[0].get("time", 0) < oldest):
+            self.tracker_log_size -= self.get_tracker_log_entry_size(self.tracker_log.popleft())
+
+    @staticmethod
+    def get_tracker_log_entry_size(entry: typing.Dict[str, typing.Any]) -> int:
+        return sum(len(locations) for locations in entry["checks"].values()) + len(entry["items"]) + len(entry["hints"])
+
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
+        self.record_tracker_generation()
         room = Room.get(id=self.room_id)
         # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
         room.multisave = pickle.dumps(self.get_save())
@@ -178,8 +280,19 @@ class WebHostContext(Context):
     def get_save(self) -> dict:
         d = super(WebHostContext, self).get_save()
         d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
+        d["tracker_generation"] = self.tracker_generation
+        d["tracker_log"] = list(self.tracker_log)
         return d
 
+    def set_save(self, savedata: dict):
+        super(WebHostContext, self).set_save(savedata)
+        self.tracker_generation = savedata.get("tracker_generation", 0)
+        self.tracker_log.extend(savedata.get("tracker_log", ()))
+        self.tracker_log_size = sum(map(self.get_tracker_log_entry_size, self.tracker_log))
+        self.trim_tracker_log()
+        self.tracker_item_counts = {(team, slot): len(received_items)
+                                    for (team, slot, remote), received_items in self.received_items.items() if remote}
+
 
 class GameRangePorts(typing.NamedTuple):
     valid_ports: list[int]
@@ -334,10 +447,59 @@ def tear_down_logging(room_id):
         del logging.Logger.manager.loggerDict[logger_name]
 
 
+class HosterLoad(typing.NamedTuple):
+    """Load of a room hosting process, shared with the autolauncher placing rooms on the least loaded one."""
+    client_count: typing.Any  # multiprocessing.Value("i")
+    """ connected clients of all rooms """
+    loop_lag: typing.Any  # multiprocessing.Value("d")
+    """ smoothed seconds the event loop runs behind """
+
+
+async def report_load(load: HosterLoad, contexts: typing.Iterable[WebHostContext], interval: float = 1.0) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        load.loop_lag.value += (lag - load.loop_lag.value) / 4
+        load.client_count.value = sum(len(ctx.endpoints) for ctx in list(contexts))
+
+
+async def log_cache_stats(name: str, interval: float = 3600) -> None:
+    """Logs how well the game data packages decoded by this process get reused, see GAME_DATA_PACKAGE_CACHE_SIZE."""
+    while True:
+        await asyncio.sleep(interval)
+        stats = game_data_package_cache.get_stats()
+        logging.info(f"{name} game data package cache: {stats['entries']} entries of {stats['size']} bytes, "
+                     f"{stats['hits']} hits, {stats['misses']} misses, {stats['hit_rate']:.1%} hit rate")
+
+
+class CommandNotifications:
+    """State of the room command notifications of a hosting process, see roomcommands."""
+    __slots__ = ("confirmed",)
+
+    confirmed: bool
+    """ set once a probe of the autolauncher arrived, proving that notifications reach this process """
+
+    def __init__(self) -> None:
+        self.confirmed = False
+
+    def confirm(self) -> None:
+        self.confirmed = True
+
+
+def notify_commands(contexts: typing.Iterable[WebHostContext], room_id: UUID) -> None:
+    """Wakes the context hosting room_id up to process its new commands."""
+    for ctx in contexts:
+        if ctx.room_id == room_id:
+            ctx.commands_pending.set()
+
+
 def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
                        host: str, game_ports: Iterable[str | int],
-                       rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       load: typing.Optional[HosterLoad] = None, command_port: int = 0,
+                       game_data_package_cache_size: typing.Optional[int] = None):
     from setproctitle import setproctitle
 
     setproctitle(name)
@@ -356,6 +518,9 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     # establish DB connection for multidata and multisave
     db.bind(**ponyconfig)
     db.generate_mapping(check_tables=False)
+    if game_data_package_cache_size is not None:
+        # not inherited from the launching process when it spawns instead of forking
+        app.config["GAME_DATA_PACKAGE_CACHE_SIZE"] = game_data_package_cache_size
 
     if "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded in the custom server.")
@@ -382,13 +547,28 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
 
     loop = asyncio.get_event_loop()
     socket_creator = RandomPortSocketCreator(game_ports)
+    contexts: weakref.WeakSet[WebHostContext] = weakref.WeakSet()
+    if load:
+        loop.create_task(report_load(load, contexts))
+    loop.create_task(log_cache_stats(name))
+
+    command_notifications = CommandNotifications()
+    if command_port:
+        try:
+            loop.run_until_complete(loop.create_datagram_endpoint(
+                lambda: RoomCommandProtocol(functools.partial(notify_commands, contexts),
+                                            command_notifications.confirm),
+                local_addr=(COMMAND_HOST, command_port)))
+        except OSError as e:
+            logging.warning(f"{name} could not listen for room commands on port {command_port}: {e}")
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
             try:
                 logger = set_up_logging(room_id)
-                ctx = WebHostContext(static_server_data, logger)
+                ctx = WebHostContext(static_server_data, logger, command_notifications)
                 ctx.load(room_id)
+                contexts.add(ctx)
                 ctx.init_save()
                 assert ctx.server is None
                 if ctx.port != 0:
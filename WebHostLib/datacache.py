@@ -0,0 +1,39 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+from pony.orm import db_session
+
+from Utils import LRUCache, restricted_loads
+from . import app
+from .models import GameDataPackage
+
+
+class DecodedGameDataPackage(NamedTuple):
+    """A game data package from the database with its reverse lookup tables. Shared, so it must not be modified."""
+    package: Dict[str, Any]
+    item_id_to_name: Dict[int, str]
+    location_id_to_name: Dict[int, str]
+
+
+game_data_package_cache: LRUCache[DecodedGameDataPackage] = LRUCache()
+""" by checksum, sized by pickled data package """
+
+
+@db_session
+def get_game_data_package(checksum: str) -> Optional[DecodedGameDataPackage]:
+    """Returns the decoded game data package with checksum, None if it is not in the database.
+    As a checksum always refers to the same data package, it gets decoded only once per process while cached."""
+    decoded = game_data_package_cache.get(checksum)
+    if decoded:
+        return decoded
+
+    row = GameDataPackage.get(checksum=checksum)
+    if not row:
+        return None
+    package = restricted_loads(row.data)
+    decoded = DecodedGameDataPackage(
+        package,
+        {id: name for name, id in package["item_name_to_id"].items()},
+        {id: name for name, id in package["location_name_to_id"].items()},
+    )
+    game_data_package_cache.set(checksum, decoded, len(row.data), app.config["GAME_DATA_PACKAGE_CACHE_SIZE"])
+    return decoded
@@ -14,6 +14,7 @@ from worlds.AutoWorld import AutoWorldRegister, World
 from . import app, cache
 from .markdown import render_markdown
 from .models import Seed, Room, Command, UUID, uuid4
+from .roomcommands import notify_room_command
 from Utils import title_sorted, utcnow
 
 class WebWorldTheme(StrEnum):
@@ -225,6 +226,7 @@ def host_room_command(room: UUID):
         if cmd:
             Command(room=room, commandtext=cmd)
             commit()
+            notify_room_command(app.config, room.id)
     return redirect(url_for("host_room", room=room.id))
 
 
@@ -0,0 +1,62 @@
+"""Wakes room hosting processes as soon as commands for one of their rooms are added to the database.
+The Command table stays the durable store, the notifications only spare hosted rooms from frequently polling it,
+once a probe proved that they reach the hosting process."""
+import asyncio
+import logging
+import socket
+import typing
+from uuid import UUID
+
+COMMAND_HOST = "127.0.0.1"
+PROBE = b"probe"
+PROBE_ACK = b"probe ack"
+
+
+def get_command_port(config: typing.Dict[str, typing.Any], hoster_id: int) -> int:
+    """Returns the local UDP port the hoster listens on for command notifications, 0 if disabled."""
+    port = config["ROOM_COMMAND_PORT"]
+    return port + hoster_id if port else 0
+
+
+def notify_room_command(config: typing.Dict[str, typing.Any], room_id: UUID) -> None:
+    """Tells all hosters that there are new commands for room_id, only the one hosting it will look them up."""
+    if not config["ROOM_COMMAND_PORT"]:
+        return
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for hoster_id in range(config["HOSTERS"]):
+            try:
+                sock.sendto(room_id.bytes, (COMMAND_HOST, get_command_port(config, hoster_id)))
+            except OSError as e:
+                # the hosting process falls back to polling the database
+                logging.debug(f"Could not notify hoster {hoster_id} of commands for room {room_id}: {e}")
+
+
+def probe_room_commands(port: int, timeout: float) -> bool:
+    """Sends a probe to the hoster listening on port, returns if it acknowledged it, proving notifications reach it."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.sendto(PROBE, (COMMAND_HOST, port))
+            return sock.recv(len(PROBE_ACK)) == PROBE_ACK
+        except OSError:  # including timeouts
+            return False
+
+
+class RoomCommandProtocol(asyncio.DatagramProtocol):
+    """Receives the room ids sent by notify_room_command and acknowledges the probes of probe_room_commands."""
+    transport: typing.Optional[asyncio.DatagramTransport] = None
+
+    def __init__(self, on_command: typing.Callable[[UUID], None], on_probe: typing.Callable[[], None] = lambda: None):
+        self.on_command = on_command
+        self.on_probe = on_probe
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = typing.cast(asyncio.DatagramTransport, transport)
+
+    def datagram_received(self, data: bytes, addr: typing.Tuple[str, int]) -> None:
+        if len(data) == 16:
+            self.on_command(UUID(bytes=data))
+        elif data == PROBE:
+            self.on_probe()
+            if self.transport:
+                self.transport.sendto(PROBE_ACK, addr)
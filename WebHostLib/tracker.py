@@ -1,7 +1,8 @@
 import datetime
 import collections
+import hashlib
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
@@ -9,10 +10,11 @@ from flask import make_response, render_template, request, Request, Response
 from werkzeug.exceptions import abort
 
 from MultiServer import Context, get_saving_second
-from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
-from Utils import restricted_loads, KeyedDefaultDict, utcnow
+from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType, get_location_spheres
+from Utils import restricted_loads, utcnow
 from . import app, cache
-from .models import GameDataPackage, Room
+from .datacache import LRUCache, get_game_data_package
+from .models import Room
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
@@ -24,6 +26,118 @@ TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
 
 
+class _IdToName(Mapping[int, str]):
+    """Id to name table of a data package shared between requests. Unknown ids get a placeholder name, which unlike
+    with KeyedDefaultDict doesn't get added to the shared table."""
+    __slots__ = ("names", "unknown")
+
+    def __init__(self, names: Dict[int, str], unknown: str) -> None:
+        self.names = names
+        self.unknown = unknown
+        """ placeholder name, formatted with the id """
+
+    def __getitem__(self, code: int) -> str:
+        name = self.names.get(code)
+        return self.unknown.format(code) if name is None else name
+
+    def get(self, code: int, default: Any = None) -> Any:
+        return self.names.get(code, default)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.names
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class _GameIdToName(Dict[str, _IdToName]):
+    """Id to name tables by game. Games without a data package get an empty table, without adding it."""
+    __slots__ = ("kind",)
+
+    def __init__(self, kind: str) -> None:
+        super().__init__()
+        self.kind = kind
+
+    def __missing__(self, game: str) -> _IdToName:
+        return _IdToName({}, f"Unknown Game {game} - {self.kind} (ID: {{}})")
+
+
+class _SeedData(NamedTuple):
+    """Decoded multidata of a seed and the lookup tables of its data packages. Never modified after creation."""
+    multidata: Dict[str, Any]
+    item_name_to_id: Dict[str, Dict[str, int]]
+    location_name_to_id: Dict[str, Dict[str, int]]
+    item_id_to_name: Dict[str, Mapping[int, str]]
+    location_id_to_name: Dict[str, Mapping[int, str]]
+
+
+class TrackerChanges(NamedTuple):
+    """What changed in a room over some tracker generations, see TrackerData.get_changes_since."""
+    checks: Dict[TeamPlayer, Set[int]]
+    """ newly checked locations of each player """
+    items: Dict[TeamPlayer, int]
+    """ index of the first newly received item of each player """
+    hints: Set[TeamPlayer]
+    """ players whose hints changed """
+
+
+_seed_data_cache: LRUCache[_SeedData] = LRUCache()
+""" by seed id, sized by pickled multidata, as the decoded data packages have a cache of their own """
+_multisave_cache: LRUCache[Dict[str, Any]] = LRUCache()
+""" by digest of the pickled multisave, which changes with every save of the room, sized by pickled multisave """
+
+
+def _load_seed_data(room: Room) -> _SeedData:
+    seed_data = _seed_data_cache.get(room.seed.id)
+    if seed_data:
+        return seed_data
+
+    pickled_multidata = Context.decompress_pickled(room.seed.multidata)
+    multidata = restricted_loads(pickled_multidata)
+    item_name_to_id: Dict[str, Dict[str, int]] = {}
+    location_name_to_id: Dict[str, Dict[str, int]] = {}
+
+    # Inverse lookup tables from the data packages, useful for trackers.
+    item_id_to_name: Dict[str, Mapping[int, str]] = _GameIdToName("Item")
+    location_id_to_name: Dict[str, Mapping[int, str]] = _GameIdToName("Location")
+    for game, game_package in multidata["datapackage"].items():
+        decoded_package = get_game_data_package(game_package["checksum"])
+        item_id_to_name[game] = _IdToName(decoded_package.item_id_to_name, "Unknown Item (ID: {})")
+        location_id_to_name[game] = _IdToName(decoded_package.location_id_to_name, "Unknown Location (ID: {})")
+
+        # Normal lookup tables as well.
+        item_name_to_id[game] = decoded_package.package["item_name_to_id"]
+        location_name_to_id[game] = decoded_package.package["location_name_to_id"]
+
+    seed_data = _SeedData(multidata, item_name_to_id, location_name_to_id, item_id_to_name, location_id_to_name)
+    _seed_data_cache.set(room.seed.id, seed_data, len(pickled_multidata), app.config["TRACKER_SEED_CACHE_SIZE"])
+    return seed_data
+
+
+def get_save_digest(room: Room) -> str:
+    """Returns the digest of the room's pickled multisave, which changes with every save, empty if there is none."""
+    return hashlib.sha1(room.multisave).hexdigest() if room.multisave else ""
+
+
+def _load_multisave(room: Room, key: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Returns the digest of the room's pickled multisave, see get_save_digest, and the multisave.
+    key is the digest, if already known."""
+    multisave_bytes = room.multisave
+    if not multisave_bytes:
+        return "", {}
+
+    if key is None:
+        key = get_save_digest(room)
+    multisave = _multisave_cache.get(key)
+    if multisave is None:
+        multisave = restricted_loads(multisave_bytes)
+        _multisave_cache.set(key, multisave, len(multisave_bytes), app.config["TRACKER_SAVE_CACHE_SIZE"])
+    return key, multisave
+
+
 def _cache_results(func: Callable) -> Callable:
     """Stores the results of any computationally expensive methods after the initial call in TrackerData.
     If called again, returns the cached result instead, as results will not change for the lifetime of TrackerData.
@@ -46,39 +160,28 @@ class TrackerData:
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    The decoded multidata and multisave are shared with other requests for the same seed and save, so they must not
+    be modified.
     """
     room: Room
+    save_digest: str
+    """ changes with every save of the room, empty if there is no save yet """
     _multidata: Dict[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
 
-    def __init__(self, room: Room):
-        """Initialize a new RoomMultidata object for the current room."""
+    def __init__(self, room: Room, save_digest: Optional[str] = None):
+        """Initialize a new RoomMultidata object for the current room, save_digest from get_save_digest if known."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        seed_data = _load_seed_data(room)
+        self._multidata = seed_data.multidata
+        self.save_digest, self._multisave = _load_multisave(room, save_digest)
         self._tracker_cache = {}
 
-        self.item_name_to_id: Dict[str, Dict[str, int]] = {}
-        self.location_name_to_id: Dict[str, Dict[str, int]] = {}
-
-        # Generate inverse lookup tables from data package, useful for trackers.
-        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
-        })
-        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
-        })
-        for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
-
-            # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+        self.item_name_to_id: Dict[str, Dict[str, int]] = seed_data.item_name_to_id
+        self.location_name_to_id: Dict[str, Dict[str, int]] = seed_data.location_name_to_id
+        self.item_id_to_name: Dict[str, Mapping[int, str]] = seed_data.item_id_to_name
+        self.location_id_to_name: Dict[str, Mapping[int, str]] = seed_data.location_id_to_name
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -292,11 +395,52 @@ class TrackerData:
 
         return video_feeds
 
+    def get_tracker_generation(self) -> int:
+        """Retrieves the number of saves that changed checks, received items or hints.
+        Stays 0 if the room was not hosted by the WebHost, which counts them."""
+        return self._multisave.get("tracker_generation", 0)
+
+    def get_changes_since(self, generation: int) -> Optional[TrackerChanges]:
+        """Retrieves what changed after the tracker generation up to the current one.
+        Returns None if some of those generations are no longer logged in the multisave."""
+        current_generation = self.get_tracker_generation()
+        if not 0 <= generation <= current_generation:
+            return None
+        log = [entry for entry in self._multisave.get("tracker_log", ()) if entry["generation"] > generation]
+        if len(log) != current_generation - generation:
+            return None
+
+        changes = TrackerChanges(collections.defaultdict(set), {}, set())
+        for entry in log:
+            for team_player, locations in entry["checks"].items():
+                changes.checks[team_player].update(locations)
+            for team_player, index in entry["items"].items():
+                changes.items[team_player] = min(index, changes.items.get(team_player, index))
+            changes.hints.update(entry["hints"])
+        return changes
+
     @_cache_results
     def get_spheres(self) -> List[List[int]]:
         """ each sphere is { player: { location_id, ... } } """
         return self._multidata.get("spheres", [])
 
+    @_cache_results
+    def get_location_spheres(self) -> Dict[int, Dict[int, int]]:
+        """ { player: { location_id: sphere, ... } }, spheres counting from 0 """
+        return get_location_spheres(self.get_spheres())
+
+    @_cache_results
+    def get_checked_locations_by_sphere(self, team: int) -> List[Tuple[int, int, int]]:
+        """Retrieves the sphere, player and location id of every location with a sphere checked by the team,
+        ordered by sphere."""
+        checked: List[Tuple[int, int, int]] = []
+        for player, location_spheres in self.get_location_spheres().items():
+            for location_id in self.get_player_checked_locations(team, player):
+                if location_id in location_spheres:
+                    checked.append((location_spheres[location_id], player, location_id))
+        checked.sort()
+        return checked
+
 
 def _process_if_request_valid(incoming_request: Request, room: Optional[Room]) -> Optional[Response]:
     if not room:
@@ -197,6 +197,27 @@ cdef class LocationStore:
     def __iter__(self) -> Iterator[int]:
         return self._keys.__iter__()
 
+    cdef LocationEntry* _get(self, size_t sender, ap_id_t loc):
+        # This requires locations to be sorted.
+        cdef LocationEntry* entry = NULL
+        # binary search
+        cdef size_t l = self.sender_index[sender].start
+        cdef size_t e = l + self.sender_index[sender].count
+        cdef size_t r = e
+        cdef size_t m
+        while l < r:
+            m = (l + r) // 2
+            entry = self.entries + m
+            if entry.location < loc:
+                l = m + 1
+            else:
+                r = m
+        if l < e:
+            entry = self.entries + l
+            if entry.location == loc:
+                return entry
+        return NULL
+
     def __getitem__(self, key: int) -> Any:
         # figure out if player actually exists in the multidata and return a proxy
         cdef size_t i = key  # NOTE: this may raise TypeError
@@ -311,6 +332,20 @@ cdef class LocationStore:
                         entry in self.entries[start:start+count] if
                         entry.location not in checked])
 
+    def scout(self, slot: int, locations: Iterable[int]) -> List[Tuple[int, int, int, int]]:
+        """Returns (item, location, receiver, flags) for each of the locations of slot, in NetworkItem field order."""
+        cdef LocationEntry* entry
+        cdef ap_player_t sender = slot
+        if sender < 0 or sender >= self.sender_index_size:
+            raise KeyError(slot)
+        cdef list result = []
+        for location in locations:
+            entry = self._get(sender, location)
+            if not entry:
+                raise KeyError(f"No location {location} for player {slot}")
+            result.append((entry.item, entry.location, entry.receiver, entry.flags))
+        return result
+
 
 @cython.auto_pickle(False)
 @cython.internal  # unsafe. disable direct import
@@ -336,27 +371,9 @@ cdef class PlayerLocationProxy:
             yield entry.location
 
     cdef LocationEntry* _get(self, ap_id_t loc):
-        # This requires locations to be sorted.
         # This is always going to be slower than a pure python dict, because constructing the result tuple takes as long
         # as the search in a python dict, which stores a pointer to an existing tuple.
-        cdef LocationEntry* entry = NULL
-        # binary search
-        cdef size_t l = self._store.sender_index[self._player].start
-        cdef size_t e = l + self._store.sender_index[self._player].count
-        cdef size_t r = e
-        cdef size_t m
-        while l < r:
-            m = (l + r) // 2
-            entry = self._store.entries + m
-            if entry.location < loc:
-                l = m + 1
-            else:
-                r = m
-        if l < e:
-            entry = self._store.entries + l
-            if entry.location == loc:
-                return entry
-        return NULL
+        return self._store._get(self._player, loc)
 
     def __getitem__(self, key: int) -> Tuple[int, int, int]:
         cdef LocationEntry* entry = self._get(key)
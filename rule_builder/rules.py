@@ -864,7 +864,7 @@ class Has(Rule[TWorld], game="Archipelago"):
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has
-            return state.prog_items[self.player][self.item_name] >= self.count
+            return state.prog_items.get(self.player)[self.item_name] >= self.count
 
         @override
         def item_dependencies(self) -> dict[str, set[int]]:
@@ -947,7 +947,7 @@ class HasAll(Rule[TWorld], game="Archipelago"):
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_all
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item in self.item_names:
                 if not player_prog_items[item]:
                     return False
@@ -1065,7 +1065,7 @@ class HasAny(Rule[TWorld], game="Archipelago"):
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_any
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item in self.item_names:
                 if player_prog_items[item]:
                     return True
@@ -1185,7 +1185,7 @@ class HasAllCounts(Rule[TWorld], game="Archipelago"):
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_all_counts
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item, count in self.item_counts:
                 if player_prog_items[item] < count:
                     return False
@@ -1308,7 +1308,7 @@ class HasAnyCount(Rule[TWorld], game="Archipelago"):
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_any_count
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item, count in self.item_counts:
                 if player_prog_items[item] >= count:
                     return True
@@ -1439,7 +1439,7 @@ class HasFromList(Rule[TWorld], game="Archipelago"):
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_from_list
             found = 0
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item_name in self.item_names:
                 found += player_prog_items[item_name]
                 if found >= self.count:
@@ -1575,7 +1575,7 @@ class HasFromListUnique(Rule[TWorld], game="Archipelago"):
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_from_list_unique
             found = 0
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item_name in self.item_names:
                 found += player_prog_items[item_name] > 0
                 if found >= self.count:
@@ -1687,7 +1687,7 @@ class HasGroup(Rule[TWorld], game="Archipelago"):
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_group
             found = 0
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item_name in self.item_names:
                 found += player_prog_items[item_name]
                 if found >= self.count:
@@ -1766,7 +1766,7 @@ class HasGroupUnique(Rule[TWorld], game="Archipelago"):
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_group_unique
             found = 0
-            player_prog_items = state.prog_items[self.player]
+            player_prog_items = state.prog_items.get(self.player)
             for item_name in self.item_names:
                 found += player_prog_items[item_name] > 0
                 if found >= self.count:
@@ -611,6 +611,18 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class Metrics(Bool):
+        """Record how long handling client commands takes, traffic and event loop lag, see the /metrics command"""
+
+    class MetricsFile(str):
+        """
+        File to regularly write the recorded metrics to in Prometheus text format,
+        for example for the textfile collector of node_exporter
+        """
+
+    class MaxStoredDataSize(int):
+        """Refuse data storage changes that would grow it beyond this many characters, as encoded for clients"""
+
     host: str | None = None
     port: int = 38281
     password: str | None = None
@@ -630,6 +642,9 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    max_stored_data_size: MaxStoredDataSize = MaxStoredDataSize(64 * 1024 * 1024)
+    metrics: Metrics | bool = False
+    metrics_file: MetricsFile | None = None
 
 
 class GeneratorOptions(Group):
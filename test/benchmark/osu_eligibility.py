@@ -0,0 +1,75 @@
+"""Micro benchmark comparing the osu! song eligibility filter on the song index with the former loop over song dicts"""
+
+from timeit import timeit
+from typing import AbstractSet, Dict, List, Mapping, Tuple
+
+
+def loop_eligible(song_data: List[dict], include_songs: AbstractSet[str], exclude_songs: AbstractSet[str],
+                  minimum_length: int, maximum_length: int, allow_nsfw: bool, enable_loved: bool,
+                  newest: int, oldest: int, difficulty_ranges: Mapping[str, Tuple[int, int]]) -> List[Tuple[int, List[int]]]:
+    """The filter as OsuWorld.check_eligibility and check_difficulties did it, one beatmapset dict at a time."""
+    eligible = []
+    for position, beatmapset in enumerate(song_data):
+        if str(beatmapset["id"]) in include_songs.union(exclude_songs):
+            continue
+        if beatmapset["length"] > maximum_length or beatmapset["length"] < minimum_length:
+            continue
+        if (not allow_nsfw) and beatmapset["nsfw"]:
+            continue
+        if beatmapset["status"] == "loved" and not enable_loved:
+            continue
+        if not (newest >= beatmapset["ranked_date"] >= oldest):
+            continue
+        diffs = []
+        for difficulty in beatmapset["beatmaps"]:
+            minimum_difficulty, maximum_difficulty = difficulty_ranges[difficulty["mode"]]
+            if minimum_difficulty <= difficulty["sr"] * 100 <= maximum_difficulty:
+                diffs.append(difficulty["id"])
+        if diffs:
+            eligible.append((position, diffs))
+    return eligible
+
+
+def main() -> None:
+    from worlds.osu.Items import get_song_data
+    from worlds.osu.SongIndex import get_song_index
+
+    song_index = get_song_index()
+    song_data = get_song_data()
+    cases: Dict[str, dict] = {
+        "default options": {
+            "include_songs": set(), "exclude_songs": set(), "minimum_length": 30, "maximum_length": 300,
+            "allow_nsfw": False, "enable_loved": False, "newest": 2025, "oldest": 2007,
+            "difficulty_ranges": {"osu": (0, 1000), "fruits": (-1, -1), "taiko": (-1, -1), "4k": (-1, -1),
+                                  "7k": (-1, -1), "other": (-1, -1)},
+        },
+        "every mode, 100 excluded songs": {
+            "include_songs": set(), "exclude_songs": {str(song_index.id[i]) for i in range(0, 2000, 20)},
+            "minimum_length": 0, "maximum_length": 2200, "allow_nsfw": True, "enable_loved": True,
+            "newest": 2025, "oldest": 2007,
+            "difficulty_ranges": {mode: (200, 600) for mode in ("osu", "fruits", "taiko", "4k", "7k", "other")},
+        },
+    }
+    for name, case in cases.items():
+        excluded_ids = {int(beatmapset_id) for beatmapset_id in case["include_songs"] | case["exclude_songs"]}
+        allowed_statuses = set(song_index.statuses)
+        if not case["enable_loved"]:
+            allowed_statuses.discard("loved")
+
+        def index_eligible() -> List[Tuple[int, List[int]]]:
+            return song_index.find_eligible(excluded_ids, case["minimum_length"], case["maximum_length"],
+                                            case["allow_nsfw"], allowed_statuses, case["newest"], case["oldest"],
+                                            case["difficulty_ranges"])
+
+        eligible = index_eligible()
+        assert eligible == loop_eligible(song_data, **case)
+        loop_time = min(timeit(lambda: loop_eligible(song_data, **case), number=20) for _ in range(5)) / 20
+        index_time = min(timeit(index_eligible, number=20) for _ in range(5)) / 20
+        print(f"{name}: {len(eligible)} of {len(song_index)} eligible, loop {loop_time * 1000:.2f} ms, "
+              f"index {index_time * 1000:.2f} ms, {loop_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    import path_change
+    path_change.change_home()
+    main()
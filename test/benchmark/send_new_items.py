@@ -0,0 +1,68 @@
+"""Micro benchmark comparing item delivery of send_new_items in a large room with scanning every connected client"""
+
+import asyncio
+import random
+from timeit import timeit
+
+
+def scan_send_new_items(ctx) -> None:
+    """send_new_items as it was, checking every client of every slot after each change."""
+    from MultiServer import get_received_items, get_start_inventory
+
+    ctx.new_items_slots.clear()
+    for team, clients in ctx.clients.items():
+        for slot, clients in clients.items():
+            for client in clients:
+                if client.no_items:
+                    continue
+                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+                items = get_received_items(ctx, team, slot, client.remote_items)
+                if len(start_inventory) + len(items) > client.send_index:
+                    first_new_item = max(0, client.send_index - len(start_inventory))
+                    ctx.queue_msgs([client], [{
+                        "cmd": "ReceivedItems",
+                        "index": client.send_index,
+                        "items": start_inventory[client.send_index:] + items[first_new_item:]}])
+                    client.send_index = len(start_inventory) + len(items)
+
+
+async def run(slot_count: int, location_count: int) -> None:
+    from MultiServer import Client, Context, send_items_to, send_new_items
+    from NetUtils import NetworkItem
+
+    ctx = Context("", 0, "", "", 0, 0, False)
+    ctx.broadcast_encoded = lambda endpoints, msg: True
+    ctx.clients = {0: {slot: [Client(None, ctx)] for slot in range(1, slot_count + 1)}}
+    targets = [random.randint(1, slot_count) for _ in range(location_count)]
+
+    def check_one_by_one(send) -> None:
+        """Every location gets checked on its own, as while playing."""
+        for location, target in enumerate(targets):
+            send_items_to(ctx, 0, target, NetworkItem(1, location, 1, 0))
+            send(ctx)
+
+    def release(send) -> None:
+        """All locations get checked at once, as on release."""
+        for location, target in enumerate(targets):
+            send_items_to(ctx, 0, target, NetworkItem(1, location, 1, 0))
+        send(ctx)
+
+    for name, simulate in (("checks one by one", check_one_by_one), ("release", release)):
+        times = {}
+        for send in (scan_send_new_items, send_new_items):
+            times[send] = min(timeit(lambda: simulate(send), number=1) for _ in range(5))
+            await asyncio.sleep(0)  # flush the queued messages
+        print(f"{slot_count} clients, {location_count} locations, {name}: "
+              f"scan {times[scan_send_new_items] * 1000:.2f} ms, targeted {times[send_new_items] * 1000:.2f} ms, "
+              f"{times[scan_send_new_items] / times[send_new_items]:.1f}x")
+
+
+def main() -> None:
+    for slot_count, location_count in ((30, 1000), (300, 1000)):
+        asyncio.run(run(slot_count, location_count))
+
+
+if __name__ == "__main__":
+    import path_change
+    path_change.change_home()
+    main()
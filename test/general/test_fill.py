@@ -4,7 +4,7 @@ import unittest
 from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
 from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
+    distribute_early_items, distribute_items_restrictive, _order_swap_candidates
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
@@ -433,6 +433,54 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertTrue(sphere1_loc1.item.name == one_to_two1 or
                         sphere1_loc2.item.name == one_to_two1, "Wrong item in Sphere 1")
 
+    def test_swap_skips_locations_rejecting_item(self):
+        """Test that swapping doesn't sweep for placements whose item rule rejects the item, and logs its counters"""
+        multiworld = generate_test_multiworld(1)
+        player1 = generate_player_data(multiworld, 1, 3, 3)
+        locations = player1.locations[:]
+        items = player1.prog_items[:]
+        # items are placed starting from the last one, the last placed item fits nowhere without a swap
+        add_item_rule(locations[0], lambda item_to_place: item_to_place == items[2])
+        add_item_rule(locations[2], lambda item_to_place: item_to_place != items[0])
+
+        with self.assertLogs(level="INFO") as logs:
+            fill_restrictive(multiworld, multiworld.state, player1.locations, player1.prog_items)
+
+        self.assertEqual(locations[0].item, items[2])
+        self.assertEqual(locations[1].item, items[0])
+        self.assertEqual(locations[2].item, items[1])
+        self.assertIn("1 swaps attempted, 1 sweeps performed", logs.output[-1])
+
+    def test_swap_candidate_order(self):
+        """Test that swap candidates holding items the failed locations depend on are tried first"""
+        class DeclaredRule:
+            def __init__(self, item_names: List[str]) -> None:
+                self.item_names = item_names
+
+            def __call__(self, state) -> bool:
+                return state.has_all(self.item_names, 1)
+
+            def item_dependencies(self) -> List[str]:
+                return self.item_names
+
+            def region_dependencies(self) -> List[str]:
+                return []
+
+            location_dependencies = entrance_dependencies = region_dependencies
+
+        multiworld = generate_test_multiworld(1)
+        player1 = generate_player_data(multiworld, 1, 5, 3)
+        placed, failed = player1.locations[:3], player1.locations[3:]
+        for location, item in zip(placed, player1.prog_items):
+            location.item = item
+        set_rule(failed[0], DeclaredRule([player1.prog_items[2].name]))
+        set_rule(failed[1], DeclaredRule([player1.prog_items[1].name]))
+
+        self.assertEqual([i for i, _ in _order_swap_candidates(placed, failed)], [1, 2, 0])
+        self.assertEqual([i for i, _ in _order_swap_candidates(placed, failed[:1])], [2, 0, 1])
+        set_rule(failed[1], lambda state: state.has(player1.prog_items[1].name, 1))
+        self.assertEqual([i for i, _ in _order_swap_candidates(placed, failed)], [0, 1, 2])
+
     def test_double_sweep(self):
         """Test that sweep doesn't duplicate Event items when sweeping"""
         # test for PR1114
@@ -448,6 +496,40 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertTrue(multiworld.state.prog_items[item.player][item.name], "Sweep did not collect - Test flawed")
         self.assertEqual(multiworld.state.prog_items[item.player][item.name], 1, "Sweep collected multiple times")
 
+    def test_reachability_checked_once_per_sweep(self):
+        """Test that a location's reachability is only evaluated once for all items placed from the same sweep"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 3, 1)
+        player2 = generate_player_data(multiworld, 2, 0, 1)
+        rule_calls = 0
+
+        def unreachable(state) -> bool:
+            nonlocal rule_calls
+            rule_calls += 1
+            return False
+
+        set_rule(player1.locations[0], unreachable)
+        locations = player1.locations.copy()
+        fill_restrictive(multiworld, multiworld.state, locations, player1.prog_items + player2.prog_items)
+
+        self.assertEqual(1, rule_calls)
+        self.assertEqual([player1.locations[0]], locations)
+        self.assertIsNone(player1.locations[0].item)
+
+    def test_single_player_placement(self):
+        """Test that single player placement only fills the locations of each item's player"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 2, 1)
+        player2 = generate_player_data(multiworld, 2, 2, 1)
+
+        locations = player2.locations + player1.locations
+        fill_restrictive(multiworld, multiworld.state, locations, player1.prog_items + player2.prog_items,
+                         single_player_placement=True)
+
+        self.assertEqual(player1.locations[0].item.player, 1)
+        self.assertEqual(player2.locations[0].item.player, 2)
+        self.assertEqual([player2.locations[1], player1.locations[1]], locations)
+
     def test_correct_item_instance_removed_from_pool(self):
         """Test that a placed item gets removed from the submitted pool"""
         multiworld = generate_test_multiworld()
@@ -636,6 +636,98 @@ class TestCacheDisabled(RuleBuilderTestCase):
         self.assertTrue(location.can_reach(self.state))
 
 
+class TestIncrementalReachability(RuleBuilderTestCase):
+    multiworld: MultiWorld  # pyright: ignore[reportUninitializedInstanceVariable]
+    world: World  # pyright: ignore[reportUninitializedInstanceVariable]
+    player: int = 1
+
+    @override
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.multiworld = setup_solo_multiworld(self.world_cls, seed=0)
+        world = self.multiworld.worlds[1]
+        self.world = world
+
+        region1 = Region("Region 1", self.player, self.multiworld)
+        region2 = Region("Region 2", self.player, self.multiworld)
+        region3 = Region("Region 3", self.player, self.multiworld)
+        region4 = Region("Region 4", self.player, self.multiworld)
+        self.multiworld.regions.extend([region1, region2, region3, region4])
+
+        world.create_entrance(region1, region2, Has("Item 1"))
+        world.create_entrance(region1, region3, HasAll("Item 2", "Item 3"))
+        world.create_entrance(region1, region4, CanReachRegion("Region 2"))
+
+    def test_item_dependencies(self) -> None:
+        self.assertEqual(self.world.get_entrance("Region 1 -> Region 2").get_item_dependencies(), {"Item 1"})
+        self.assertEqual(self.world.get_entrance("Region 1 -> Region 3").get_item_dependencies(),
+                         {"Item 2", "Item 3"})
+        # region dependencies can't be tracked by item, so the rule is treated as opaque
+        self.assertIsNone(self.world.get_entrance("Region 1 -> Region 4").get_item_dependencies())
+
+        entrance = self.world.get_entrance("Region 1 -> Region 2")
+        entrance.access_rule = lambda state: state.has("Item 1", self.player)
+        self.assertIsNone(entrance.get_item_dependencies())
+
+    def test_only_dependent_entrances_rechecked(self) -> None:
+        state = CollectionState(self.multiworld)
+        region2 = self.world.get_region("Region 2")
+        region3 = self.world.get_region("Region 3")
+        region4 = self.world.get_region("Region 4")
+        self.assertFalse(state.can_reach(region2))
+
+        checked: list[str] = []
+        for entrance in self.world.get_region("Region 1").exits:
+            original_rule = entrance.access_rule
+
+            def tracking_rule(inner_state: CollectionState, name: str = entrance.name,
+                              rule: Any = original_rule) -> bool:
+                checked.append(name)
+                return rule(inner_state)
+
+            # keep the declared dependencies of the original rule while recording evaluations
+            tracking_rule.item_dependencies = original_rule.item_dependencies  # type: ignore[attr-defined]
+            tracking_rule.region_dependencies = original_rule.region_dependencies  # type: ignore[attr-defined]
+            tracking_rule.location_dependencies = original_rule.location_dependencies  # type: ignore[attr-defined]
+            tracking_rule.entrance_dependencies = original_rule.entrance_dependencies  # type: ignore[attr-defined]
+            entrance.access_rule = tracking_rule
+
+        state.collect(self.world.create_item("Item 2"), prevent_sweep=True)
+        self.assertFalse(state.can_reach(region3))
+        self.assertIn("Region 1 -> Region 3", checked)
+        self.assertNotIn("Region 1 -> Region 2", checked)
+        self.assertIn("Region 1 -> Region 4", checked)  # opaque rules are always rechecked
+
+        checked.clear()
+        state.collect(self.world.create_item("Item 1"), prevent_sweep=True)
+        self.assertTrue(state.can_reach(region2))
+        self.assertTrue(state.can_reach(region4))
+        self.assertFalse(state.can_reach(region3))
+        self.assertNotIn("Region 1 -> Region 3", checked)
+
+        copied_state = state.copy()
+        copied_state.collect(self.world.create_item("Item 3"), prevent_sweep=True)
+        self.assertTrue(copied_state.can_reach(region3))
+        self.assertFalse(state.can_reach(region3))
+
+        state.remove(self.world.create_item("Item 1"))
+        self.assertFalse(state.can_reach(region2))
+        self.assertFalse(state.can_reach(region4))
+
+    def test_rules_do_not_copy_items(self) -> None:
+        state = CollectionState(self.multiworld)
+        state.collect(self.world.create_item("Item 1"), prevent_sweep=True)
+        copied_state = state.copy()
+        rules = [Has("Item 1"), HasAll("Item 1", "Item 2"), HasAny("Item 1", "Item 2"),
+                 HasAllCounts({"Item 1": 1}), HasAnyCount({"Item 1": 1}), HasFromList("Item 1", "Item 2"),
+                 HasFromListUnique("Item 1", "Item 2"), HasGroup("Group 1"), HasGroupUnique("Group 1")]
+        for rule in rules:
+            rule.resolve(self.world)(copied_state)
+        # evaluating rules only reads the items, so the copy keeps sharing them
+        self.assertIs(copied_state.prog_items.get(self.player), state.prog_items.get(self.player))
+
+
 class TestRules(RuleBuilderTestCase):
     multiworld: MultiWorld  # pyright: ignore[reportUninitializedInstanceVariable]
     world: World  # pyright: ignore[reportUninitializedInstanceVariable]
@@ -0,0 +1,63 @@
+import unittest
+from typing import List, Set
+
+from BaseClasses import CollectionState, Location, MultiWorld, SphereCache
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+def naive_spheres(multiworld: MultiWorld) -> List[Set[Location]]:
+    """Sorts the filled locations into spheres by testing every remaining location each sphere."""
+    state = CollectionState(multiworld)
+    locations = set(multiworld.get_filled_locations())
+    spheres: List[Set[Location]] = []
+    while locations:
+        sphere = {location for location in locations if location.can_reach(state)}
+        spheres.append(sphere)
+        if not sphere:
+            spheres.append(locations)
+            break
+        for location in sphere:
+            state.collect(location.item, True, location)
+        locations -= sphere
+    return spheres
+
+
+class TestSphereSearch(unittest.TestCase):
+    games = ("APQuest", "A Link to the Past", "Muse Dash", "Pokemon Emerald")
+
+    def generate(self, game: str) -> MultiWorld:
+        world_type = AutoWorldRegister.world_types[game]
+        multiworld = setup_multiworld([world_type, world_type], seed=0)
+        distribute_items_restrictive(multiworld)
+        call_all(multiworld, "post_fill")
+        call_all(multiworld, "finalize_multiworld")
+        return multiworld
+
+    def test_spheres_match_naive_search(self) -> None:
+        """Tests that only re-testing affected locations finds the same spheres as testing all of them."""
+        for game in self.games:
+            with self.subTest(game=game):
+                multiworld = self.generate(game)
+                expected = naive_spheres(multiworld)
+                self.assertEqual(list(multiworld.get_spheres()), expected)
+                multiworld.sphere_cache = SphereCache()
+                self.assertEqual(list(multiworld.get_spheres()), expected)
+
+    def test_cached_results_match(self) -> None:
+        """Tests that results shared through the sphere cache are the same as when searching from scratch."""
+        for game in self.games:
+            with self.subTest(game=game):
+                multiworld = self.generate(game)
+                sendable_spheres = list(multiworld.get_sendable_spheres())
+                fulfills_accessibility = multiworld.fulfills_accessibility()
+                multiworld.spoiler.create_playthrough(create_paths=True)
+                playthrough, paths = multiworld.spoiler.playthrough, multiworld.spoiler.paths
+
+                multiworld.sphere_cache = SphereCache()
+                self.assertEqual(list(multiworld.get_sendable_spheres()), sendable_spheres)
+                self.assertEqual(multiworld.fulfills_accessibility(), fulfills_accessibility)
+                multiworld.spoiler.create_playthrough(create_paths=True)
+                self.assertEqual(multiworld.spoiler.playthrough, playthrough)
+                self.assertEqual(multiworld.spoiler.paths, paths)
@@ -1,7 +1,8 @@
 import unittest
 
+from BaseClasses import CollectionState, Item, ItemClassification
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +28,26 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+    def test_copy_is_independent(self):
+        """Ensure copies share per-player containers lazily without leaking mutations between states."""
+        multiworld = generate_test_multiworld(2)
+        state = CollectionState(multiworld)
+        state.collect(Item("Item", ItemClassification.progression, None, 1), prevent_sweep=True)
+        self.assertTrue(state.can_reach_region("Menu", 1))
+        self.assertTrue(state.can_reach_region("Menu", 2))
+
+        copied_state = state.copy()
+        self.assertIs(copied_state.prog_items.get(2), state.prog_items.get(2))
+        self.assertFalse(copied_state.stale[1])
+
+        copied_state.collect(Item("Other Item", ItemClassification.progression, None, 1), prevent_sweep=True)
+        copied_state.reachable_regions[2].clear()
+        self.assertEqual(copied_state.count("Other Item", 1), 1)
+        self.assertEqual(state.count("Other Item", 1), 0)
+        self.assertEqual(state.count("Item", 1), 1)
+        self.assertIn(multiworld.get_region("Menu", 2), state.reachable_regions[2])
+
+        state.remove(Item("Item", ItemClassification.progression, None, 1))
+        self.assertEqual(copied_state.count("Item", 1), 1)
+        self.assertEqual(state.count("Item", 1), 0)
@@ -0,0 +1,45 @@
+"""
+Micro benchmark comparing the orjson backed NetUtils.encode and decode with the json module implementation
+
+Run from the repository root with `python -m test.netutils.benchmark_codec`.
+"""
+
+import hashlib
+import typing
+from timeit import timeit
+
+from .test_codec import print_json, received_items
+
+
+def run_codec_benchmark() -> None:
+    import NetUtils
+
+    if NetUtils.encode is NetUtils._encode_json:
+        print("orjson is not installed, encode and decode use the json module")
+        return
+
+    payloads: typing.Dict[str, typing.Any] = {
+        "ReceivedItems, 1000 items": received_items(1000),
+        "PrintJSON, 100 ItemSend": print_json(100),
+        "LocationChecks, 10 locations": [{"cmd": "LocationChecks", "locations": list(range(1000, 1010))}],
+        "DataPackage, 2 games": [{"cmd": "DataPackage", "data": {"games": {
+            f"Game {game}": {"item_name_to_id": {f"Item {index}": index for index in range(2000)},
+                             "location_name_to_id": {f"Location {index}": index for index in range(5000)},
+                             "checksum": hashlib.sha1(str(game).encode()).hexdigest()}
+            for game in range(2)}}}],
+    }
+    for name, payload in payloads.items():
+        text = NetUtils._encode_json(payload)
+        assert NetUtils.encode(payload) == text
+        assert NetUtils.decode(text) == NetUtils._decode_json(text)
+        number = max(5, 2000000 // len(text))
+        for operation, old, new, argument in (("encode", NetUtils._encode_json, NetUtils.encode, payload),
+                                              ("decode", NetUtils._decode_json, NetUtils.decode, text)):
+            old_time = min(timeit(lambda: old(argument), number=number) for _ in range(5)) / number
+            new_time = min(timeit(lambda: new(argument), number=number) for _ in range(5)) / number
+            print(f"{name}, {operation} {len(text) / 1000:.1f} kB: json {old_time * 1e6:.1f} µs, "
+                  f"orjson {new_time * 1e6:.1f} µs, {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    run_codec_benchmark()
@@ -0,0 +1,97 @@
+# Tests for the orjson backed NetUtils.encode and NetUtils.decode against the json module implementation
+import typing
+import unittest
+
+import NetUtils
+from NetUtils import ClientStatus, HintStatus, JSONMessagePart, NetworkItem, NetworkPlayer, NetworkSlot, SlotType
+from Utils import Version
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def received_items(count: int) -> typing.List[dict]:
+    return [{"cmd": "ReceivedItems", "index": 0,
+             "items": [NetworkItem(77000 + index % 300, 1000 + index, index % 30 + 1, index % 3)
+                       for index in range(count)]}]
+
+
+def print_json(count: int) -> typing.List[dict]:
+    messages = []
+    for index in range(count):
+        data: typing.List[JSONMessagePart] = [
+            {"type": "player_id", "text": str(index % 30 + 1)},
+            {"text": " sent "},
+            {"type": "item_id", "text": str(77000 + index), "player": index % 30 + 1, "flags": index % 3},
+            {"text": " to "},
+            {"type": "player_id", "text": str(index % 7 + 1)},
+            {"text": " ("},
+            {"type": "location_id", "text": str(1000 + index), "player": index % 30 + 1},
+            {"text": ")"},
+        ]
+        messages.append({"cmd": "PrintJSON", "data": data, "type": "ItemSend", "receiving": index % 7 + 1,
+                         "item": NetworkItem(77000 + index, 1000 + index, index % 30 + 1, index % 3)})
+    return messages
+
+
+sample_messages: typing.List[typing.Any] = [
+    received_items(100),
+    print_json(100),
+    [{"cmd": "LocationChecks", "locations": list(range(1000, 1100))}],
+    [{"cmd": "Connected", "team": 0, "slot": 1, "missing_locations": [1, 2], "checked_locations": [],
+      "players": [NetworkPlayer(0, 1, "Alias 🙂", "Player\n1"), NetworkPlayer(0, 2, " ", "P2")],
+      "slot_info": {1: NetworkSlot("Player1", "osu!", SlotType.player),
+                    3: NetworkSlot("Group", "osu!", SlotType.group, [1, 2])},
+      "slot_data": {"nested": {"list": [1, 2.5, None, True], "set": {3}}, "float": 1e16, "big": 2 ** 63 - 1},
+      "hint_points": 0}],
+    [{"cmd": "RoomInfo", "version": Version(0, 6, 2), "tags": frozenset({"AP"}), "password": False,
+      "time": 1712345678.123456}],
+    [{"cmd": "SetReply", "key": "key", "value": {"status": ClientStatus.CLIENT_GOAL, "hint": HintStatus.HINT_FOUND},
+      "original_value": None}],
+]
+
+# these have to be left to the json module, as orjson would write or read them differently
+fallback_messages: typing.List[typing.Any] = [
+    [{"cmd": "Set", "value": 2 ** 64}],
+    [{"cmd": "Set", "value": 1e-7}],
+    [{"cmd": "Set", "value": float("nan"), "infinity": float("-inf")}],
+    [{"cmd": "Set", "value": "\ud800"}],
+    [NetworkSlot("Group", "osu!", SlotType.group, (NetworkItem(1, 2, 3),))],
+]
+
+
+@unittest.skipIf(orjson is None, "orjson not installed")
+class TestCodec(unittest.TestCase):
+    def test_encode(self) -> None:
+        for message in sample_messages + fallback_messages:
+            with self.subTest(message=repr(message)[:80]):
+                self.assertEqual(NetUtils._encode_json(message), NetUtils._fast_encode(message))
+
+    def test_decode(self) -> None:
+        for message in sample_messages + fallback_messages:
+            text = NetUtils._encode_json(message)
+            with self.subTest(text=text[:80]):
+                self.assertEqual(repr(NetUtils._decode_json(text)), repr(NetUtils._fast_decode(text)))
+
+    def test_decode_classes(self) -> None:
+        texts = [
+            '[{"class": "NetworkItem", "item": 1, "location": 2, "player": 3}]',
+            '[{"class": "NetworkItem", "item": 1, "location": 2, "player": 3, "flags": 1, "extra": [{"a": 1}]}]',
+            '[{"\\u0063lass": "NetworkPlayer", "team": 0, "slot": 1, "alias": "a", "name": "b"}]',
+            '[{"class": "Version", "major": 0, "minor": 6, "build": 2}]',
+            '[{"class": "Unknown", "item": 1}]',
+            '[12345678901234567890, -9223372036854775809]',
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(repr(NetUtils._decode_json(text)), repr(NetUtils._fast_decode(text)))
+
+    def test_encode_errors(self) -> None:
+        for obj in ({"cmd": object()}, [NetworkPlayer(0, 1, {"a"}, "b")]):
+            with self.subTest(obj=obj):
+                with self.assertRaises(TypeError):
+                    NetUtils._encode_json(obj)
+                with self.assertRaises(TypeError):
+                    NetUtils._fast_encode(obj)
@@ -165,6 +165,18 @@ class Base:
             with self.assertRaises(KeyError):
                 self.store.get_remaining(bad_state, 0, 9999)
 
+        def test_scout(self) -> None:
+            self.assertEqual(self.store.scout(1, [13, 11]), [(13, 13, 1, 0), (21, 11, 2, 7)])
+            self.assertEqual(self.store.scout(1, (11, 11)), [(21, 11, 2, 7), (21, 11, 2, 7)])
+            self.assertEqual(self.store.scout(4, {9}), [(99, 9, 3, 0)])
+            self.assertEqual(self.store.scout(2, []), [])
+
+        def test_scout_exception(self) -> None:
+            with self.assertRaises(KeyError):
+                self.store.scout(1, [11, 7])
+            with self.assertRaises(KeyError):
+                self.store.scout(9999, [11])
+
         def test_location_set_intersection(self) -> None:
             locations = {10, 11, 12}
             locations.intersection_update(self.store[1])
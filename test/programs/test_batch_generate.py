@@ -0,0 +1,24 @@
+# Tests for BatchGenerate.py
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import BatchGenerate
+
+
+class TestBatchGenerate(unittest.TestCase):
+    input_dir = Path(__file__).parent / "data" / "one_player"
+
+    def test_job_argv(self):
+        self.assertEqual(BatchGenerate.job_argv({"seed": 1, "race": True, "skip_output": False, "spoiler": None}),
+                         ["--seed", "1", "--race"])
+
+    def test_generate_batch(self):
+        with TemporaryDirectory(prefix="AP_out_") as output_dir:
+            jobs = [{"player_files_path": str(self.input_dir), "seed": seed, "outputpath": output_dir}
+                    for seed in (0, 1)]
+            results = dict(BatchGenerate.generate_batch(jobs, processes=1))
+
+            self.assertEqual({0, 1}, set(results))
+            self.assertEqual(sorted(str(path) for path in Path(output_dir).glob("*.zip")), sorted(results.values()))
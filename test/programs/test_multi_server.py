@@ -1,5 +1,16 @@
+import asyncio
+import atexit
+import copy
+import os
+import pickle
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from tempfile import TemporaryDirectory
+
+from MultiServer import Client, Context, DataStorageFull, ServerCommandProcessor, process_client_cmd, \
+    register_location_checks, send_items_to, send_new_items
+from NetUtils import Hint, HintStatus, LocationStore, NetworkItem, NetworkSlot, SlotType, decode, \
+    get_location_spheres
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +49,458 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestDataPackage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.games = {1: "APQuest", 2: "Muse Dash"}
+        self.ctx._init_game_data()
+
+    def test_encoded_like_dumper(self) -> None:
+        """Tests that DataPackage messages spliced from pre-encoded data packages are the same as encoding them."""
+        for games in (["Archipelago", "APQuest", "Muse Dash"], ["Muse Dash"], [], list(self.ctx.gamespackage)):
+            with self.subTest(games=games):
+                games = [game for game in self.ctx.gamespackage if game in games]
+                expected = self.ctx.dumper([{"cmd": "DataPackage", "data": {
+                    "games": {game: self.ctx.gamespackage[game] for game in games}}}])
+                self.assertEqual(self.ctx.encode_data_package(games), expected)
+
+    def test_room_data_package_cached(self) -> None:
+        self.assertEqual(sorted(self.ctx.room_data_package_games), ["APQuest", "Archipelago", "Muse Dash"])
+        self.assertIs(self.ctx.encode_data_package(self.ctx.room_data_package_games), self.ctx.room_data_package)
+
+    def test_encoded_game_packages_bounded(self) -> None:
+        """Tests that encoded game data packages are shared between contexts, up to the size limit."""
+        self.ctx.encoded_game_packages.clear()
+        encoded = self.ctx.encode_game_package("APQuest")
+        other_ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertIs(other_ctx.encode_game_package("APQuest"), encoded)
+
+        self.ctx.encoded_game_packages.clear()
+        self.ctx.max_encoded_game_packages_size = len(encoded) - 1
+        self.ctx.encode_game_package("APQuest")
+        self.assertEqual(len(self.ctx.encoded_game_packages), 0)
+
+
+class TestOutgoingQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.frames: list[tuple[list[Client], str]] = []
+        self.ctx.broadcast_encoded = lambda endpoints, msg: self.frames.append((list(endpoints), msg)) or True
+
+        async def send_encoded_msgs(endpoint: Client, msg: str) -> bool:
+            self.frames.append(([endpoint], msg))
+            return True
+
+        self.ctx.send_encoded_msgs = send_encoded_msgs
+
+    async def test_coalesce(self) -> None:
+        """Tests that messages queued in the same tick get sent to each endpoint in one frame, in order."""
+        first, second = Client(None, self.ctx), Client(None, self.ctx)
+        self.ctx.queue_msgs([first, second], [{"cmd": "PrintJSON", "data": [{"text": "1"}]}])
+        self.ctx.queue_msgs([first], [{"cmd": "RoomUpdate", "hint_points": 1}])
+        self.ctx.queue_msgs([first, second], [{"cmd": "PrintJSON", "data": [{"text": "2"}]}])
+        self.assertEqual(self.frames, [])
+
+        await asyncio.sleep(0)
+        frames = {endpoint: decode(msg) for endpoints, msg in self.frames for endpoint in endpoints}
+        self.assertEqual(len(self.frames), 2)
+        self.assertEqual([msg["cmd"] for msg in frames[first]], ["PrintJSON", "RoomUpdate", "PrintJSON"])
+        self.assertEqual([msg["data"][0]["text"] for msg in frames[second]], ["1", "2"])
+        self.assertEqual(first.outgoing, [])
+        stats = self.ctx.outgoing_stats
+        self.assertEqual((stats.flushes, stats.frames, stats.queued, stats.max_depth), (1, 2, 5, 5))
+
+    async def test_frame_size(self) -> None:
+        """Tests that queued messages get split into frames once they get too big."""
+        self.ctx.max_frame_size = 100
+        client = Client(None, self.ctx)
+        for text in range(10):
+            self.ctx.queue_msgs([client], [{"cmd": "PrintJSON", "data": [{"text": str(text)}]}])
+
+        await asyncio.sleep(0)
+        self.assertGreater(len(self.frames), 1)
+        self.assertTrue(all(len(msg) < 200 for _, msg in self.frames))
+        self.assertEqual([msg["data"][0]["text"] for _, frame in self.frames for msg in decode(frame)],
+                         [str(text) for text in range(10)])
+
+    async def test_awaited(self) -> None:
+        """Tests that all frames of endpoints with awaited messages queued get sent with awaited sends, in order."""
+        first, second = Client(None, self.ctx), Client(None, self.ctx)
+        self.ctx.max_frame_size = 100
+        self.ctx.queue_msgs([first, second], [{"cmd": "PrintJSON", "data": [{"text": str(text)}]} for text in range(5)])
+        self.ctx.queue_msgs([first], [{"cmd": "ReceivedItems", "index": 0, "items": []}], awaited=True)
+        broadcast_encoded = self.ctx.broadcast_encoded
+        self.ctx.broadcast_encoded = lambda endpoints, msg: self.assertNotIn(first, endpoints) or \
+            broadcast_encoded(endpoints, msg)
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        sent = [(endpoint, msg["cmd"]) for endpoints, frame in self.frames for endpoint in endpoints
+                for msg in decode(frame)]
+        self.assertEqual([cmd for endpoint, cmd in sent if endpoint is first], ["PrintJSON"] * 5 + ["ReceivedItems"])
+        self.assertEqual([cmd for endpoint, cmd in sent if endpoint is second], ["PrintJSON"] * 5)
+        self.assertFalse(first.outgoing_awaited)
+
+    async def test_send_new_items(self) -> None:
+        """Tests that only the clients of slots that received items get sent items."""
+        receiving, other = Client(None, self.ctx), Client(None, self.ctx)
+        self.ctx.clients = {0: {1: [receiving], 2: [other]}}
+        send_items_to(self.ctx, 0, 1, NetworkItem(1, 1, 2, 0))
+        send_new_items(self.ctx)
+
+        self.assertEqual((receiving.send_index, other.send_index), (1, 0))
+        self.assertEqual(self.ctx.new_items_slots, set())
+        await asyncio.sleep(0)  # flush
+        await asyncio.sleep(0)  # awaited send
+        self.assertEqual([(endpoints, decode(msg)[0]["cmd"]) for endpoints, msg in self.frames],
+                         [([receiving], "ReceivedItems")])
+
+
+class TestDataStorage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.frames: list[tuple[list[Client], str]] = []
+        self.ctx.broadcast_encoded = lambda endpoints, msg: self.frames.append((list(endpoints), msg)) or True
+        self.sent: list[dict] = []
+
+        async def send_msgs(endpoint: Client, msgs: list[dict]) -> bool:
+            self.sent += msgs
+            return True
+
+        self.ctx.send_msgs = send_msgs
+        self.clients = [Client(None, self.ctx) for _ in range(3)]
+        for slot, client in enumerate(self.clients, 1):
+            client.auth, client.team, client.slot = True, 0, slot
+
+    async def test_prefix_notify(self) -> None:
+        """Tests that SetReply packages reach each subscriber in one frame per tick, subscribed by key or prefix."""
+        exact, prefix, other = self.clients
+        await process_client_cmd(self.ctx, exact, {"cmd": "SetNotify", "keys": ["game_1_a"]})
+        await process_client_cmd(self.ctx, prefix, {"cmd": "SetNotify", "keys": [], "prefixes": ["game_1_"]})
+        await process_client_cmd(self.ctx, other, {"cmd": "SetNotify", "keys": ["game_1", "game_1_*"],
+                                                   "prefixes": ["game_2_"]})
+        for key in ("game_1_a", "game_1_b", "game_1_a", "game_10", "game_1_*"):
+            await process_client_cmd(self.ctx, other, {"cmd": "Set", "key": key, "default": 0,
+                                                       "operations": [{"operation": "add", "value": 1}]})
+
+        await asyncio.sleep(0)
+        frames = {endpoint: decode(msg) for endpoints, msg in self.frames for endpoint in endpoints}
+        self.assertEqual(len(self.frames), 3)
+        self.assertEqual([(msg["key"], msg["original_value"], msg["value"]) for msg in frames[prefix]],
+                         [("game_1_a", 0, 1), ("game_1_b", 0, 1), ("game_1_a", 1, 2), ("game_1_*", 0, 1)])
+        self.assertEqual([msg["key"] for msg in frames[exact]], ["game_1_a", "game_1_a"])
+        # keys ending in * are just keys
+        self.assertEqual([msg["key"] for msg in frames[other]], ["game_1_*"])
+
+    async def test_size_limit(self) -> None:
+        """Tests that Sets growing the data storage beyond its limit get refused, leaving the value unchanged."""
+        self.ctx.max_stored_data_size = 20
+        self.ctx.modify_stored_data("list", [], [{"operation": "update", "value": [1, 2, 3]}])
+        self.assertEqual(self.ctx.stored_data_size, len("[1,2,3]"))
+        with self.assertRaises(DataStorageFull):
+            self.ctx.modify_stored_data("list", [], [{"operation": "update", "value": list(range(4, 20))}])
+        self.assertEqual(self.ctx.stored_data, {"list": [1, 2, 3]})
+
+        operations = [{"operation": "replace", "value": "a" * 20}]
+        await process_client_cmd(self.ctx, self.clients[0], {"cmd": "Set", "key": "text", "want_reply": True,
+                                                             "operations": operations})
+        self.assertEqual([msg["cmd"] for msg in self.sent], ["InvalidPacket"])
+        self.assertNotIn("text", self.ctx.stored_data)
+
+        # shrinking values is always allowed
+        self.ctx.max_stored_data_size = 0
+        self.ctx.modify_stored_data("list", [], [{"operation": "pop", "value": 0}])
+        self.assertEqual(self.ctx.stored_data, {"list": [2, 3]})
+
+    async def test_size_estimate(self) -> None:
+        """Tests that sizes estimated from the operands only get measured exactly before refusing a Set."""
+        self.ctx.max_stored_data_size = 20
+        self.ctx.modify_stored_data("list", [], [{"operation": "update", "value": [1, 2, 3]}])
+        self.ctx.modify_stored_data("list", [], [{"operation": "pop", "value": 0}])
+        self.ctx.modify_stored_data("list", [], [{"operation": "add", "value": [4]}])
+        self.assertFalse(self.ctx.stored_data_sizes_exact)
+        self.assertEqual(self.ctx.stored_data_size, len("[1,2,3]") + len("[4]"))
+
+        self.ctx.modify_stored_data("text", "", [{"operation": "add", "value": "a" * 10}])
+        self.assertTrue(self.ctx.stored_data_sizes_exact)
+        self.assertEqual((self.ctx.stored_data, self.ctx.stored_data_size),
+                         ({"list": [2, 3, 4], "text": "a" * 10}, len("[2,3,4]") + len('"aaaaaaaaaa"')))
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_metrics(self) -> None:
+        """Tests that commands get recorded by name and the metrics get exported as Prometheus histograms."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.broadcast_encoded = lambda endpoints, msg: True
+        self.assertIsNone(ctx.metrics)
+        ctx.enable_metrics()
+        self.addCleanup(ctx.disable_metrics)
+        metrics = ctx.metrics
+        metrics.record_command({"cmd": "Set"}, 0.0002)
+        metrics.record_command({"cmd": "Set"}, 0.002)
+        metrics.record_command({"cmd": "Secret"}, 0.1)
+        metrics.record_command({"cmd": ["Set"]}, 0.1)
+        metrics.record_received('[{"cmd":"Sync"}]')
+        ctx.queue_msgs([Client(None, ctx) for _ in range(3)], [{"cmd": "RoomUpdate"}])
+
+        self.assertEqual({cmd: histogram.count for cmd, histogram in metrics.command_latency.items()},
+                         {"Set": 2, "other": 2})
+        self.assertEqual(metrics.command_latency["Set"].quantile_bound(0.5), 0.00025)
+        self.assertEqual((metrics.received_frames, metrics.received_bytes), (1, 16))
+        text = metrics.get_prometheus_text()
+        self.assertIn('archipelago_command_seconds_bucket{port="0",cmd="Set",le="0.00025"} 1\n', text)
+        self.assertIn('archipelago_command_seconds_bucket{port="0",cmd="Set",le="0.0025"} 2\n', text)
+        self.assertIn('archipelago_command_seconds_count{port="0",cmd="other"} 2\n', text)
+        self.assertIn('archipelago_broadcast_fan_out_bucket{port="0",le="5"} 1\n', text)
+        self.assertIn('archipelago_received_bytes_total{port="0"} 16\n', text)
+        self.assertEqual(metrics.get_summary()[-1][:20], "Set: 2 times, 2.2ms ")
+
+        # the outgoing queue gets flushed at the end of the event loop iteration
+        await asyncio.sleep(0)
+        text = metrics.get_prometheus_text()
+        self.assertIn('archipelago_outgoing_flushes_total{port="0"} 1\n', text)
+        self.assertIn('archipelago_outgoing_queued_total{port="0"} 3\n', text)
+        self.assertIn('archipelago_outgoing_max_depth{port="0"} 3\n', text)
+        self.assertIn("# TYPE archipelago_outgoing_max_latency_seconds gauge\n", text)
+        self.assertIn("archipelago_outgoing_latency_seconds_total", text)
+        self.assertTrue(any(line.startswith("Outgoing queue: 1 flushes, ") and line.endswith(", 3 messages max depth")
+                            for line in metrics.get_summary()))
+
+        ctx.disable_metrics()
+        self.assertIsNone(ctx.metrics_task)
+
+    async def test_metrics_file(self) -> None:
+        """Tests that recorded metrics get written to the metrics file."""
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.metrics_file = os.path.join(directory.name, "archipelago.prom")
+        ctx.enable_metrics()
+        self.addCleanup(ctx.disable_metrics)
+        ctx.metrics.record_received('[{"cmd":"Sync"}]')
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            if os.path.exists(ctx.metrics_file):
+                break
+        with open(ctx.metrics_file, encoding="utf-8") as f:
+            self.assertIn('archipelago_received_bytes_total{port="0"} 16\n', f.read())
+
+
+class TestHints(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.hint = Hint(receiving_player=2, finding_player=1, location=10, item=5, found=False)
+        self.other_hint = Hint(receiving_player=1, finding_player=2, location=10, item=6, found=False)
+        for slot in (1, 2):
+            self.ctx.hints[0, slot] |= {self.hint, self.other_hint}
+        self.ctx.index_hints(0, [self.hint, self.other_hint])
+
+    def test_recheck_location_hints(self) -> None:
+        """Tests that checking a location updates its hints for both players, and only its hints."""
+        self.ctx.location_checks[0, 1] = {10}
+        changed: set[tuple[int, int]] = set()
+        self.ctx.recheck_location_hints(0, 1, {10}, changed)
+
+        found_hint = self.hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        for slot in (1, 2):
+            self.assertEqual(self.ctx.hints[0, slot], {found_hint, self.other_hint})
+        self.assertEqual(self.ctx.get_hint(0, 1, 10), found_hint)
+        self.assertEqual(self.ctx.get_hint(0, 2, 10), self.other_hint)
+        self.assertIsNone(self.ctx.get_hint(0, 1, 11))
+
+    def test_unchecked_location(self) -> None:
+        changed: set[tuple[int, int]] = set()
+        self.ctx.recheck_location_hints(0, 1, {11}, changed)
+        self.assertEqual(changed, set())
+        self.assertEqual(self.ctx.get_hint(0, 1, 10), self.hint)
+
+
+class TestLocationScouts(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.broadcast_encoded = lambda endpoints, msg: True
+        self.ctx.locations = LocationStore({1: {10: (5, 2, 0), 11: (6, 1, 1)}, 2: {20: (7, 1, 0), 21: (8, 2, 0)}})
+        self.ctx.player_names = {(0, 1): "Player1", (0, 2): "Player2"}
+        self.ctx.slot_info = {slot: NetworkSlot(f"Player{slot}", "Game", SlotType.player) for slot in (1, 2)}
+        self.sent: list[dict] = []
+
+        async def send_msgs(endpoint: Client, msgs: list[dict]) -> bool:
+            self.sent += msgs
+            return True
+
+        async def send_encoded_msgs(endpoint: Client, msg: str) -> bool:
+            self.sent += decode(msg)
+            return True
+
+        self.ctx.send_msgs = send_msgs
+        self.ctx.send_encoded_msgs = send_encoded_msgs
+        self.client = Client(None, self.ctx)
+        self.client.auth, self.client.team, self.client.slot = True, 0, 1
+        self.ctx.clients = {0: {1: [self.client], 2: []}}
+
+    async def test_scout(self) -> None:
+        """Tests that scouts get answered in request order, from the cache once scouted before."""
+        for _ in range(2):
+            await process_client_cmd(self.ctx, self.client, {"cmd": "LocationScouts", "locations": [11, 10]})
+        self.assertEqual(self.sent, [{"cmd": "LocationInfo",
+                                      "locations": [NetworkItem(6, 11, 1, 1), NetworkItem(5, 10, 2, 0)]}] * 2)
+        self.assertEqual(list(self.ctx.location_info_cache), [(1, (11, 10))])
+
+        self.ctx.max_location_info_cache_size = 1
+        await process_client_cmd(self.ctx, self.client, {"cmd": "LocationScouts", "locations": [10]})
+        self.assertEqual(list(self.ctx.location_info_cache), [(1, (10,))])
+
+        self.sent.clear()
+        await process_client_cmd(self.ctx, self.client, {"cmd": "LocationScouts", "locations": [10, "11"]})
+        self.assertEqual([msg["cmd"] for msg in self.sent], ["InvalidPacket"])
+
+    async def test_scout_as_hint(self) -> None:
+        await process_client_cmd(self.ctx, self.client, {"cmd": "LocationScouts", "locations": [10, 11],
+                                                         "create_as_hint": 2})
+        self.assertEqual({(hint.location, hint.receiving_player) for hint in self.ctx.hints[0, 1]}, {(10, 2), (11, 1)})
+        self.assertEqual(self.sent[-1]["cmd"], "LocationInfo")
+
+    async def test_create_hints(self) -> None:
+        """Tests that hints for other slots' locations only get created for own items in existing locations."""
+        await process_client_cmd(self.ctx, self.client, {"cmd": "CreateHints", "player": 2, "locations": [20, 22]})
+        await process_client_cmd(self.ctx, self.client, {"cmd": "CreateHints", "player": 2, "locations": [20, 21]})
+        self.assertEqual([msg["cmd"] for msg in self.sent], ["InvalidPacket", "InvalidPacket"])
+        self.assertFalse(self.ctx.hints[0, 1])
+
+        await process_client_cmd(self.ctx, self.client, {"cmd": "CreateHints", "player": 2, "locations": [20]})
+        self.assertEqual([(hint.finding_player, hint.location) for hint in self.ctx.hints[0, 1]], [(2, 20)])
+
+
+class TestSpheres(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertEqual(ctx.get_sphere(1, 10), -1)
+
+        ctx.spheres = [{1: {10}, 2: {10}}, {1: {11, 12}}, {2: {13}}]
+        ctx.location_spheres = get_location_spheres(ctx.spheres)
+        self.assertEqual([ctx.get_sphere(1, location) for location in (10, 11, 12)], [0, 1, 1])
+        self.assertEqual([ctx.get_sphere(2, location) for location in (10, 13)], [0, 2])
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(2, 11)
+
+
+class TestSaveJournal(unittest.IsolatedAsyncioTestCase):
+    maxDiff = None
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.save_filename = os.path.join(directory.name, "test.apsave")
+
+    def create_context(self) -> Context:
+        """Creates a context with two players, loading the save and journal from previous contexts."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.broadcast_encoded = lambda endpoints, msg: True
+        ctx.games = {1: "APQuest", 2: "APQuest"}
+        ctx._init_game_data()
+        ctx.slot_info = {slot: NetworkSlot(f"P{slot}", "APQuest", SlotType.player) for slot in (1, 2)}
+        ctx.player_names = {(0, slot): f"P{slot}" for slot in (1, 2)}
+        ctx.clients = {0: {1: [], 2: []}}
+        ctx.locations = LocationStore({1: {10: (1, 2, 0), 11: (2, 1, 0)}, 2: {20: (3, 1, 0)}})
+        ctx.save_filename = self.save_filename
+        ctx.init_save()
+        self.addCleanup(atexit.unregister, ctx._save)
+        self.addCleanup(ctx.journal.file.close)
+        return ctx
+
+    def make_changes(self, ctx: Context) -> None:
+        hint = Hint(receiving_player=1, finding_player=2, location=20, item=3, found=False)
+        ctx.notify_hints(0, [hint])
+        register_location_checks(ctx, 0, 1, [10, 11])
+        register_location_checks(ctx, 0, 2, [20])
+        ctx.modify_stored_data("counter", 0, [{"operation": "add", "value": 2}])
+        ctx.modify_stored_data("counter", 0, [{"operation": "mul", "value": 3}])
+        ctx.name_aliases[0, 1] = "Alias"
+        ctx.journal_event("alias", 0, 1, "Alias")
+
+    @staticmethod
+    def saved_state(ctx: Context) -> dict:
+        save = ctx.get_save()
+        return {key: copy.deepcopy(save[key]) for key in ("received_items", "hints", "location_checks", "name_aliases",
+                                           "client_activity_timers", "stored_data", "journal_sequence")}
+
+    async def test_replay(self) -> None:
+        """Tests that changes made without saving get replayed from the journal."""
+        ctx = self.create_context()
+        self.make_changes(ctx)
+        self.assertGreater(ctx.journal.size, 0)
+        expected = self.saved_state(ctx)
+        self.assertEqual(expected["stored_data"], {"counter": 6})
+
+        self.assertEqual(self.saved_state(self.create_context()), expected)
+
+    async def test_bounded_loss(self) -> None:
+        """Tests that a crash loses at most the event being written, even in the middle of an event loop iteration."""
+        ctx = self.create_context()
+        self.make_changes(ctx)
+        expected = self.saved_state(ctx)
+        size = ctx.journal.size
+        self.assertEqual(os.path.getsize(ctx.journal.path), size)  # every event is in the file as it happens
+        ctx.modify_stored_data("counter", 0, [{"operation": "add", "value": 1}])
+        # crash while writing the record of the last event
+        ctx.journal.file.truncate(size + (ctx.journal.size - size) // 2)
+
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.saved_state(self.create_context()), expected)
+
+    async def test_torn_record(self) -> None:
+        """Tests that an event cut off by a crash is dropped, without losing the events before it."""
+        ctx = self.create_context()
+        self.make_changes(ctx)
+        expected = self.saved_state(ctx)
+        ctx.modify_stored_data("counter", 0, [{"operation": "add", "value": 1}])
+        ctx.journal.file.truncate(ctx.journal.size - 1)
+
+        with self.assertLogs(level="WARNING"):
+            loaded = self.create_context()
+        self.assertEqual(self.saved_state(loaded), expected)
+
+        # the torn record is gone, so events journaled after loading get replayed as well
+        loaded.modify_stored_data("counter", 0, [{"operation": "add", "value": 1}])
+        self.assertEqual(self.create_context().stored_data, {"counter": 7})
+
+    async def test_corrupt_record(self) -> None:
+        """Tests that a record with a valid checksum that can't be loaded is treated like a torn one."""
+        ctx = self.create_context()
+        self.make_changes(ctx)
+        expected = self.saved_state(ctx)
+        record = pickle.dumps((ctx.journal_sequence + 1, ("stored_data", "counter", 0, [])))[:-1]  # can't be loaded
+        ctx.journal.file.write(ctx.journal.record_header.pack(len(record), zlib.crc32(record)) + record)
+        ctx.journal.file.flush()
+
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.saved_state(self.create_context()), expected)
+
+    async def test_compaction(self) -> None:
+        """Tests that a journal outgrowing its maximum size gets compacted into a snapshot."""
+        ctx = self.create_context()
+        ctx.max_journal_size = 0
+        self.make_changes(ctx)
+        ctx.compaction_thread.join()  # compactions get skipped while one is running
+        ctx.save()
+        ctx.compaction_thread.join()
+        self.assertEqual(ctx.journal.size, 0)
+        self.assertFalse(os.path.exists(ctx.journal.old_path))
+        ctx.modify_stored_data("counter", 0, [{"operation": "add", "value": 1}])
+        expected = self.saved_state(ctx)
+
+        self.assertEqual(self.saved_state(self.create_context()), expected)
+
+    async def test_compaction_snapshot(self) -> None:
+        """Tests that changes made while a snapshot is being written don't end up in it."""
+        ctx = self.create_context()
+        register_location_checks(ctx, 0, 1, [10])
+        ctx.modify_stored_data("dict", {}, [{"operation": "update", "value": {"a": 1}}])
+        snapshot = ctx.get_save_snapshot()
+        expected = copy.deepcopy(snapshot)
+        self.make_changes(ctx)
+        ctx.modify_stored_data("dict", {}, [{"operation": "update", "value": {"b": 2}}])
+        self.assertNotEqual(ctx.get_save_snapshot(), expected)
+        self.assertEqual(snapshot, expected)
@@ -3,7 +3,7 @@
 import unittest
 from typing import Any
 
-from Utils import cache_argsless, cache_self1
+from Utils import LRUCache, cache_argsless, cache_self1
 
 
 class TestCacheArgless(unittest.TestCase):
@@ -77,3 +77,19 @@ class TestCacheSelf1(unittest.TestCase):
                 @cache_self1  # type: ignore[arg-type]
                 def func(_1: Any, _2: Any, _3: Any) -> Any:
                     pass
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_size(self) -> None:
+        """Verify that the least recently used entries get evicted once the cache is full."""
+        cache: LRUCache[str] = LRUCache()
+        cache.set("a", "A", 4, 10)
+        cache.set("b", "B", 4, 10)
+        self.assertEqual(cache.get("a"), "A")
+        cache.set("c", "C", 4, 10)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), ("A", None, "C"))
+        self.assertEqual((len(cache), cache.size), (2, 8))
+        self.assertEqual((cache.hits, cache.misses, cache.hit_rate), (3, 1, 0.75))
+        self.assertEqual(cache.get_stats(), {"entries": 2, "size": 8, "hits": 3, "misses": 1, "hit_rate": 0.75})
+        cache.set("d", "D", 11, 10)
+        self.assertEqual((len(cache), cache.size), (0, 0))
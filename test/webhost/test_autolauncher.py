@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import unittest
+from types import SimpleNamespace
+from uuid import uuid4
+
+from WebHostLib.autolauncher import MAX_HOSTER_LOOP_LAG, MultiworldInstance, place_room
+from WebHostLib.customserver import (CommandNotifications, HosterLoad, WebHostContext, log_cache_stats, notify_commands,
+                                     report_load)
+
+
+class TestRoomPlacement(unittest.TestCase):
+    def setUp(self) -> None:
+        config = {
+            "PONY": {},
+            "SELFLAUNCHCERT": None,
+            "SELFLAUNCHKEY": None,
+            "HOST_ADDRESS": "",
+            "GAME_PORTS": ["0"],
+            "ROOM_COMMAND_PORT": 0,
+            "GAME_DATA_PACKAGE_CACHE_SIZE": 0,
+        }
+        self.hosters = [MultiworldInstance(config, x) for x in range(3)]
+
+    def test_least_loaded(self) -> None:
+        """Verify that new rooms go to the hoster with the fewest rooms and clients."""
+        self.hosters[0].room_ids.add(uuid4())
+        self.hosters[1].load.client_count.value = 2
+        room_id = uuid4()
+        self.assertTrue(place_room(self.hosters, room_id))
+        self.assertEqual([room_id in hoster.room_ids for hoster in self.hosters], [False, False, True])
+
+        # already hosted rooms stay where they are
+        self.assertFalse(place_room(self.hosters, room_id))
+        self.assertEqual(sum(len(hoster.room_ids) for hoster in self.hosters), 2)
+
+        self.assertTrue(place_room(self.hosters, uuid4()))
+        self.assertEqual([len(hoster.room_ids) for hoster in self.hosters], [2, 0, 1])
+
+    def test_lagging_hoster(self) -> None:
+        """Verify that hosters with a lagging event loop only get rooms when all of them lag."""
+        self.hosters[0].load.loop_lag.value = MAX_HOSTER_LOOP_LAG * 2
+        self.hosters[1].room_ids.update(uuid4() for _ in range(3))
+        self.hosters[2].load.loop_lag.value = MAX_HOSTER_LOOP_LAG * 2
+        place_room(self.hosters, uuid4())
+        self.assertEqual([len(hoster.room_ids) for hoster in self.hosters], [0, 4, 0])
+
+        self.hosters[1].load.loop_lag.value = MAX_HOSTER_LOOP_LAG * 2
+        place_room(self.hosters, uuid4())
+        self.assertEqual([len(hoster.room_ids) for hoster in self.hosters], [1, 4, 0])
+
+
+class TestReportLoad(unittest.TestCase):
+    def test_client_count(self) -> None:
+        """Verify that the hosting process reports the clients connected to all of its rooms."""
+        load = HosterLoad(multiprocessing.Value("i", 0), multiprocessing.Value("d", 0.0))
+        contexts = [SimpleNamespace(endpoints=[1, 2]), SimpleNamespace(endpoints=[3])]
+
+        async def run() -> None:
+            task = asyncio.create_task(report_load(load, contexts, 0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(run())
+        self.assertEqual(load.client_count.value, 3)
+        self.assertGreaterEqual(load.loop_lag.value, 0.0)
+
+    def test_cache_stats(self) -> None:
+        """Verify that the hosting process logs the stats of its game data package cache."""
+        async def run() -> None:
+            task = asyncio.create_task(log_cache_stats("Hoster", 0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        with self.assertLogs(level="INFO") as logs:
+            asyncio.run(run())
+        self.assertIn("Hoster game data package cache: ", logs.output[0])
+
+
+class TestNotifyCommands(unittest.TestCase):
+    def test_wake(self) -> None:
+        """Verify that only the context hosting the room gets woken up."""
+        room_id = uuid4()
+        contexts = [SimpleNamespace(room_id=room_id, commands_pending=asyncio.Event()),
+                    SimpleNamespace(room_id=uuid4(), commands_pending=asyncio.Event())]
+
+        notify_commands(contexts, room_id)
+        self.assertEqual([ctx.commands_pending.is_set() for ctx in contexts], [True, False])
+
+    def test_probe(self) -> None:
+        """Verify that rooms poll for commands frequently until a probe confirmed that notifications arrive."""
+        import logging
+        from WebHostLib.roomcommands import COMMAND_HOST, RoomCommandProtocol, probe_room_commands
+
+        async def run() -> None:
+            notifications = CommandNotifications()
+            ctx = WebHostContext({"non_hintable_names": {}}, logging.getLogger("test"), notifications)
+            self.assertEqual(ctx.get_db_command_poll_interval(), WebHostContext.db_command_poll_interval)
+
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: RoomCommandProtocol(lambda room_id: None, notifications.confirm), local_addr=(COMMAND_HOST, 0))
+            try:
+                port = transport.get_extra_info("sockname")[1]
+                self.assertTrue(await loop.run_in_executor(None, probe_room_commands, port, 5))
+            finally:
+                transport.close()
+            self.assertEqual(ctx.get_db_command_poll_interval(), WebHostContext.notified_db_command_poll_interval)
+
+            # nothing listening
+            self.assertFalse(await loop.run_in_executor(None, probe_room_commands, port, 0.05))
+
+        asyncio.run(run())
@@ -0,0 +1,33 @@
+import pickle
+
+from flask import url_for
+
+from . import TestBase
+
+
+class TestDataCache(TestBase):
+    def test_game_data_package(self) -> None:
+        """Verify that game data packages get decoded once with their reverse lookup tables."""
+        from pony.orm import db_session
+        from WebHostLib.datacache import game_data_package_cache, get_game_data_package
+        from WebHostLib.models import GameDataPackage
+
+        package = {"item_name_to_id": {"Item": 1}, "location_name_to_id": {"Location": 2},
+                   "item_name_groups": {"Everything": ["Item"]}, "checksum": "test_datacache"}
+        with db_session:
+            GameDataPackage(checksum="test_datacache", data=pickle.dumps(package))
+        game_data_package_cache.clear()
+
+        decoded = get_game_data_package("test_datacache")
+        self.assertEqual(decoded.package, package)
+        self.assertEqual((decoded.item_id_to_name, decoded.location_id_to_name), ({1: "Item"}, {2: "Location"}))
+        self.assertIs(get_game_data_package("test_datacache"), decoded)
+        self.assertIsNone(get_game_data_package("missing"))
+        self.assertEqual((game_data_package_cache.hits, game_data_package_cache.misses), (1, 2))
+
+        with self.app.test_request_context():
+            with self.client.open(url_for("api.get_datapackage_by_checksum", checksum="test_datacache")) as response:
+                self.assertEqual(response.json, package)
+            with self.client.open(url_for("api.get_cache_stats")) as response:
+                self.assertEqual(response.json["game_data_package"]["entries"], 1)
+                self.assertEqual(set(response.json), {"game_data_package", "seed", "save"})
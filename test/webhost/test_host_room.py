@@ -187,6 +187,31 @@ class TestHostFakeRoom(TestBase):
             commands = select(command for command in Command if command.room.id == self.room_id)  # type: ignore
             self.assertIn("/help", (command.commandtext for command in commands))
 
+    def test_host_room_own_post_notification(self) -> None:
+        """Verify the hosters get notified of the queued command."""
+        import socket
+        from WebHostLib.roomcommands import COMMAND_HOST, RoomCommandProtocol
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as hoster:
+            hoster.bind((COMMAND_HOST, 0))
+            hoster.settimeout(5)
+            config = {"ROOM_COMMAND_PORT": hoster.getsockname()[1], "HOSTERS": 1}
+            old_config = {key: self.app.config[key] for key in config}
+            self.app.config.update(config)
+            try:
+                with self.app.app_context(), self.app.test_request_context():
+                    response = self.client.post(url_for("host_room", room=self.room_id), data={
+                        "cmd": "/help"
+                    })
+                    self.assertEqual(response.status_code, 302, response.text)
+            finally:
+                self.app.config.update(old_config)
+            data, addr = hoster.recvfrom(64)
+
+        notified: list[UUID] = []
+        RoomCommandProtocol(notified.append).datagram_received(data, addr)
+        self.assertEqual(notified, [self.room_id])
+
     def test_host_room_other_post(self) -> None:
         """Verify command from non-owner does not get queued for the server."""
         from pony.orm import db_session, select
@@ -1,5 +1,6 @@
 import os
 import pickle
+import unittest
 from pathlib import Path
 from typing import ClassVar
 from uuid import UUID, uuid4
@@ -103,3 +104,136 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_sphere_tracker(self) -> None:
+        """Verify that the sphere tracker and the location spheres of the tracker api work without sphere data."""
+        with self.app.test_request_context():
+            with self.client.open(url_for("get_multiworld_sphere_tracker", tracker=self.tracker_uuid)) as response:
+                self.assertEqual(response.status_code, 200)
+            with self.client.open(url_for("api.static_tracker_data", tracker=self.tracker_uuid)) as response:
+                self.assertEqual(response.json["player_location_spheres"], [])
+
+    def test_shared_tracker_data(self) -> None:
+        """Verify that tracker data of a seed is decoded once, and that a changed multisave gets decoded again."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            first, second = TrackerData(room), TrackerData(room)
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIs(first.item_id_to_name, second.item_id_to_name)
+            self.assertEqual(first._multisave, {})
+
+            # unknown ids get named without being added to the shared tables
+            self.assertEqual(first.item_id_to_name["Unknown"][-1], "Unknown Game Unknown - Item (ID: -1)")
+            self.assertNotIn("Unknown", first.item_id_to_name)
+            for game, names in first.location_id_to_name.items():
+                self.assertEqual(names[2 ** 60], f"Unknown Location (ID: {2 ** 60})")
+                self.assertEqual(names.get(2 ** 60, ""), "")
+                self.assertNotIn(2 ** 60, names)
+
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {1}}})
+            third, fourth = TrackerData(room), TrackerData(room)
+            self.assertIs(third._multidata, first._multidata)
+            self.assertEqual(third.get_player_checked_locations(0, 1), {1})
+            self.assertIs(third._multisave, fourth._multisave)
+
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {1, 2}}})
+            self.assertEqual(TrackerData(room).get_player_checked_locations(0, 1), {1, 2})
+
+    def test_tracker_api_changes(self) -> None:
+        """Verify that the tracker api answers with 304 for an unchanged save and with changes since a cursor."""
+        from pony.orm import db_session
+        from NetUtils import NetworkItem
+        from WebHostLib.models import Room
+
+        items = [NetworkItem(item, item, 1, 0) for item in range(3)]
+        with db_session:
+            Room.get(id=self.room_id).multisave = pickle.dumps({
+                "location_checks": {(0, 1): {1, 2, 3}},
+                "received_items": {(0, 1, True): items},
+                "tracker_generation": 2,
+                "tracker_log": [{"generation": 1, "checks": {(0, 1): [1]}, "items": {(0, 1): 0}, "hints": []},
+                                {"generation": 2, "checks": {(0, 1): [2, 3]}, "items": {(0, 1): 2}, "hints": [(0, 1)]}],
+            })
+
+        with self.app.test_request_context():
+            url = url_for("api.tracker_data", tracker=self.tracker_uuid)
+            with self.client.open(url) as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json["cursor"], 2)
+                etag = response.headers["ETag"]
+            with self.client.open(url, headers={"If-None-Match": etag}) as response:
+                self.assertEqual(response.status_code, 304)
+
+            with self.client.open(url, query_string={"since": 1}) as response:
+                self.assertEqual(response.json["cursor"], 2)
+                self.assertEqual(response.json["player_checks_done"], [{"team": 0, "player": 1, "locations": [2, 3]}])
+                self.assertEqual(response.json["player_items_received"],
+                                 [{"team": 0, "player": 1, "index": 2, "items": [[2, 2, 1, 0]]}])
+                self.assertEqual(response.json["hints"], [{"team": 0, "player": 1, "hints": []}])
+            with self.client.open(url, query_string={"since": 0}) as response:
+                self.assertEqual(response.json["player_checks_done"][0]["locations"], [1, 2, 3])
+                self.assertEqual(response.json["player_items_received"][0]["index"], 0)
+            with self.client.open(url, query_string={"since": 2}) as response:
+                self.assertEqual((response.json["player_checks_done"], response.json["hints"]), ([], []))
+            with self.client.open(url, query_string={"since": 3}) as response:
+                self.assertEqual(response.status_code, 410)
+
+
+class TestTrackerLog(unittest.IsolatedAsyncioTestCase):
+    async def test_record_tracker_generation(self) -> None:
+        """Verify that the hosting server logs what changed for the tracker api with each save that changed anything."""
+        import logging
+        from NetUtils import Hint, NetworkItem
+        from WebHostLib.customserver import WebHostContext
+
+        ctx = WebHostContext({"non_hintable_names": {}}, logging.getLogger("test"))
+        ctx.received_items[0, 1, True] = [NetworkItem(1, 2, 2, 0)]
+        ctx.journal_event("location_checks", 0, 2, {2}, None)
+        ctx.record_tracker_generation()
+        ctx.record_tracker_generation()
+        ctx.received_items[0, 1, True].append(NetworkItem(2, 3, 2, 0))
+        ctx.journal_event("hint", 0, Hint(1, 2, 3, 2, False))
+        ctx.record_tracker_generation()
+
+        self.assertEqual(ctx.tracker_generation, 2)
+        self.assertEqual([{key: value for key, value in entry.items() if key != "time"} for entry in ctx.tracker_log],
+                         [{"generation": 1, "checks": {(0, 2): [2]}, "items": {(0, 1): 0}, "hints": []},
+                          {"generation": 2, "checks": {}, "items": {(0, 1): 1}, "hints": [(0, 1), (0, 2)]}])
+        self.assertEqual(ctx.tracker_log_size, 5)
+
+        save = ctx.get_save()
+        loaded = WebHostContext({"non_hintable_names": {}}, logging.getLogger("test"))
+        loaded.connect_names = ctx.connect_names
+        loaded.set_save(save)
+        self.assertEqual((loaded.tracker_generation, list(loaded.tracker_log)), (2, list(ctx.tracker_log)))
+        loaded.record_tracker_generation()
+        self.assertEqual(loaded.tracker_generation, 2)
+
+    async def test_trim_tracker_log(self) -> None:
+        """Verify that the tracker log drops its oldest generations when it gets too big or old."""
+        import logging
+        import time
+        from WebHostLib.customserver import WebHostContext
+
+        ctx = WebHostContext({"non_hintable_names": {}}, logging.getLogger("test"))
+        ctx.max_tracker_log_size = 5
+        for slot in range(1, 4):
+            ctx.journal_event("location_checks", 0, slot, {1, 2}, None)
+            ctx.record_tracker_generation()
+        self.assertEqual([entry["generation"] for entry in ctx.tracker_log], [2, 3])
+        self.assertEqual(ctx.tracker_log_size, 4)
+
+        # the latest generation stays, even if it is too big on its own
+        ctx.journal_event("location_checks", 0, 4, set(range(10)), None)
+        ctx.record_tracker_generation()
+        self.assertEqual(([entry["generation"] for entry in ctx.tracker_log], ctx.tracker_log_size), ([4], 10))
+
+        ctx.max_tracker_log_size = 100
+        ctx.tracker_log[0]["time"] = time.time() - ctx.max_tracker_log_age - 1
+        ctx.journal_event("location_checks", 0, 5, {1}, None)
+        ctx.record_tracker_generation()
+        self.assertEqual(([entry["generation"] for entry in ctx.tracker_log], ctx.tracker_log_size), ([5], 1))
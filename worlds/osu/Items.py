@@ -1,12 +1,8 @@
 from typing import Dict, NamedTuple, Optional
 
 from BaseClasses import Item, ItemClassification
+from .SongIndex import get_song_index
 
-import json
-
-def load_text_file(name: str) -> str:
-    import pkgutil
-    return pkgutil.get_data(__name__, name).decode()
 
 class OsuItem(Item):
     game = "osu!"
@@ -21,28 +17,19 @@ SONG_DATA_CACHE = None
 def get_song_data() -> list[dict]:
     global SONG_DATA_CACHE
 
-    if SONG_DATA_CACHE is not None:
-        return SONG_DATA_CACHE
-
-    OsuSongData = load_text_file("OsuSongData.json")
-    packs = json.loads(OsuSongData)
-    beatmapsets = []
-    for pack in packs:
-        for beatmapset in pack["beatmapsets"]:
-            if beatmapset not in beatmapsets:
-                beatmapsets.append(beatmapset)
-    SONG_DATA_CACHE = beatmapsets
+    if SONG_DATA_CACHE is None:
+        SONG_DATA_CACHE = get_song_index().records()
 
     return SONG_DATA_CACHE
 
 
 def find_beatmapset(id) -> dict:
-    for beatmapset in osu_song_data:
-        if beatmapset["id"] == id:
-            return beatmapset
-    raise ValueError("Beatmap not in Song Data")
+    song_index = get_song_index()
+    try:
+        return song_index.record(song_index.position(id))
+    except KeyError:
+        raise ValueError("Beatmap not in Song Data")
 
-osu_song_data = get_song_data()
 osu_song_max = 520
 osu_song_pool = []
 
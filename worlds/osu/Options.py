@@ -1,6 +1,6 @@
 from Options import Toggle, Option, Range, Choice, DeathLink, ItemSet, OptionSet, PerGameCommonOptions
 from dataclasses import dataclass
-from .Items import get_song_data
+from .SongIndex import get_song_index
 
 
 class StartingSongs(Range):
@@ -276,14 +276,14 @@ class IncludeSongs(OptionSet):
     """Force a list of Beatmapsets to appear, each replacing a Random song. This setting is optional, overrides other settings, and only supports Featured Artist songs.
     Usage: ['123', '234', '345'], where each number is the id for the set."""
     display_name = "Include Songs"
-    valid_keys = {str(beatmapset['id']) for beatmapset in get_song_data()}
+    valid_keys = {str(beatmapset_id) for beatmapset_id in get_song_index().id}
 
 
 class ExcludeSongs(OptionSet):
     """List of Beatmapset IDs to exclude. Listed Beatmapset IDs cannot appear in the Rando.
     """
     display_name = "Exclude Songs"
-    valid_keys = {str(beatmapset['id']) for beatmapset in get_song_data()}
+    valid_keys = {str(beatmapset_id) for beatmapset_id in get_song_index().id}
 
 
 @dataclass
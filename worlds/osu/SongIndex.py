@@ -0,0 +1,260 @@
+"""
+Prebuilt columnar index of the beatmapsets in OsuSongData.json.
+
+Parsing and deduplicating the full song data on every import is slow, so it is compiled ahead of time into
+OsuSongIndex.bin: a one line json header followed by one packed array per field. Filters can scan the arrays directly,
+and beatmapset dicts in the OsuSongData.json format are only built when asked for.
+
+After changing OsuSongData.json, rebuild the index with `python worlds/osu/SongIndex.py`.
+"""
+import json
+import pkgutil
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from pathlib import Path
+from typing import AbstractSet, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+INDEX_VERSION = 1
+INDEX_FILE = "OsuSongIndex.bin"
+SONG_DATA_FILE = "OsuSongData.json"
+
+# name and array typecode of each column, in file order. diff_* columns have one entry per beatmap, the beatmaps of
+# beatmapset i being diff_start[i] up to diff_start[i + 1]
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "I"),
+    ("length", "H"),
+    ("ranked_date", "H"),
+    ("status", "B"),
+    ("nsfw", "B"),
+    ("diff_start", "I"),
+    ("diff_id", "I"),
+    ("diff_mode", "B"),
+    ("diff_sr", "d"),
+)
+
+
+class SongIndex:
+    """Columnar view of the deduplicated beatmapsets, in song data order."""
+    id: "array[int]"
+    length: "array[int]"
+    ranked_date: "array[int]"
+    status: "array[int]"
+    """Index into statuses."""
+    nsfw: "array[int]"
+    diff_start: "array[int]"
+    diff_id: "array[int]"
+    diff_mode: "array[int]"
+    """Index into modes."""
+    diff_sr: "array[float]"
+
+    statuses: Tuple[str, ...]
+    modes: Tuple[str, ...]
+    _integral_sr: FrozenSet[int]
+    _strings: bytes
+    _names: Optional[List[str]] = None
+    _positions: Optional[Dict[int, int]] = None
+    _diff_set: Optional["array[int]"] = None
+    _diff_ids: Optional[List[int]] = None
+    _sorted_difficulties: Optional[List[Tuple[List[float], List[int]]]] = None
+
+    def __init__(self, data: bytes) -> None:
+        header_end = data.index(b"\n")
+        header = json.loads(data[:header_end])
+        if header["version"] != INDEX_VERSION:
+            raise ValueError(f"{INDEX_FILE} has version {header['version']}, expected {INDEX_VERSION}. "
+                             f"Rebuild it with SongIndex.py.")
+        self.statuses = tuple(header["statuses"])
+        self.modes = tuple(header["modes"])
+        self._integral_sr = frozenset(header["integral_sr"])
+
+        view = memoryview(data)[header_end + 1:]
+        offset = 0
+        for name, typecode in COLUMNS:
+            column = array(typecode)
+            if column.itemsize != header["itemsizes"][name]:
+                raise ValueError(f"{INDEX_FILE} column {name} was built on a platform with a different item size.")
+            end = offset + header["lengths"][name] * column.itemsize
+            column.frombytes(view[offset:end])
+            if sys.byteorder != "little":
+                column.byteswap()
+            setattr(self, name, column)
+            offset = end
+        self._strings = bytes(view[offset:])
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @property
+    def names(self) -> List[str]:
+        """Artist and title of every beatmapset, interleaved."""
+        if self._names is None:
+            self._names = self._strings.decode().split("\0")
+        return self._names
+
+    def position(self, beatmapset_id: int) -> int:
+        """Returns the position of a beatmapset in the index. Raises KeyError if it is not in the index."""
+        if self._positions is None:
+            self._positions = {beatmapset_id: position for position, beatmapset_id in enumerate(self.id)}
+        return self._positions[beatmapset_id]
+
+    def beatmap(self, diff: int) -> dict:
+        sr = self.diff_sr[diff]
+        return {
+            "mode": self.modes[self.diff_mode[diff]],
+            "sr": int(sr) if diff in self._integral_sr else sr,
+            "id": self.diff_id[diff],
+        }
+
+    def record(self, position: int) -> dict:
+        """Builds a new beatmapset dict, as found in OsuSongData.json, for the beatmapset at position."""
+        names = self.names
+        return {
+            "id": self.id[position],
+            "nsfw": bool(self.nsfw[position]),
+            "artist": names[2 * position],
+            "title": names[2 * position + 1],
+            "status": self.statuses[self.status[position]],
+            "ranked_date": self.ranked_date[position],
+            "length": self.length[position],
+            "beatmaps": [self.beatmap(diff)
+                         for diff in range(self.diff_start[position], self.diff_start[position + 1])],
+        }
+
+    @property
+    def diff_set(self) -> "array[int]":
+        """The position of the beatmapset of every beatmap."""
+        if self._diff_set is None:
+            self._diff_set = array("I")
+            for position in range(len(self)):
+                self._diff_set.extend([position] * (self.diff_start[position + 1] - self.diff_start[position]))
+        return self._diff_set
+
+    @property
+    def diff_ids(self) -> List[int]:
+        """diff_id as a list, slices of which are lists of ids rather than arrays."""
+        if self._diff_ids is None:
+            self._diff_ids = self.diff_id.tolist()
+        return self._diff_ids
+
+    @property
+    def sorted_difficulties(self) -> List[Tuple[List[float], List[int]]]:
+        """Per mode, the star ratings times 100 of its beatmaps in ascending order, and the matching beatmaps."""
+        if self._sorted_difficulties is None:
+            by_mode: List[List[Tuple[float, int]]] = [[] for _ in self.modes]
+            for diff, (mode, sr) in enumerate(zip(self.diff_mode, self.diff_sr)):
+                by_mode[mode].append((sr * 100, diff))
+            self._sorted_difficulties = []
+            for entries in by_mode:
+                entries.sort()
+                self._sorted_difficulties.append(([difficulty for difficulty, _ in entries],
+                                                  [diff for _, diff in entries]))
+        return self._sorted_difficulties
+
+    def records(self) -> List[dict]:
+        return [self.record(position) for position in range(len(self))]
+
+    def find_eligible(self, excluded_ids: AbstractSet[int], minimum_length: int, maximum_length: int,
+                      allow_nsfw: bool, allowed_statuses: AbstractSet[str], newest: int, oldest: int,
+                      difficulty_ranges: Mapping[str, Tuple[int, int]]) -> List[Tuple[int, List[int]]]:
+        """
+        Finds the beatmapsets that pass the filters and have at least one beatmap whose star rating, times 100, lies
+        inside the difficulty range of its mode.
+
+        :param newest: The latest year a beatmapset may have been ranked in.
+        :param oldest: The earliest year a beatmapset may have been ranked in.
+        :param difficulty_ranges: Mode name mapped to the lowest and highest allowed difficulty.
+        :return: The position of each eligible beatmapset, with the ids of its beatmaps in range.
+        """
+        status_allowed = [status in allowed_statuses for status in self.statuses]
+        # mark the beatmaps in range and count them per beatmapset,
+        # for each mode they are a slice of its beatmaps sorted by difficulty
+        in_range = bytearray(len(self.diff_id))
+        in_range_count = [0] * len(self)
+        diff_set = self.diff_set
+        for mode, (difficulties, diffs) in zip(self.modes, self.sorted_difficulties):
+            minimum_difficulty, maximum_difficulty = difficulty_ranges[mode]
+            for diff in diffs[bisect_left(difficulties, minimum_difficulty):
+                              bisect_right(difficulties, maximum_difficulty)]:
+                in_range[diff] = 1
+                in_range_count[diff_set[diff]] += 1
+
+        diff_start, diff_ids = self.diff_start, self.diff_ids
+        eligible: List[Tuple[int, List[int]]] = []
+        for position, (count, beatmapset_id, length, ranked_date, status, nsfw) in enumerate(
+                zip(in_range_count, self.id, self.length, self.ranked_date, self.status, self.nsfw)):
+            if count and minimum_length <= length <= maximum_length and newest >= ranked_date >= oldest \
+                    and status_allowed[status] and (allow_nsfw or not nsfw) and beatmapset_id not in excluded_ids:
+                start, end = diff_start[position], diff_start[position + 1]
+                if count == end - start:
+                    eligible.append((position, diff_ids[start:end]))
+                else:
+                    eligible.append((position, list(compress(diff_ids[start:end], in_range[start:end]))))
+        return eligible
+
+
+def build_index(packs: Iterable[dict]) -> bytes:
+    """Compiles the packs of OsuSongData.json into the contents of OsuSongIndex.bin."""
+    beatmapsets: Dict[int, dict] = {}
+    for pack in packs:
+        for beatmapset in pack["beatmapsets"]:
+            if beatmapsets.setdefault(beatmapset["id"], beatmapset) != beatmapset:
+                raise ValueError(f"Beatmapset {beatmapset['id']} appears more than once with different data.")
+
+    statuses = sorted({beatmapset["status"] for beatmapset in beatmapsets.values()})
+    modes = sorted({beatmap["mode"] for beatmapset in beatmapsets.values() for beatmap in beatmapset["beatmaps"]})
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    integral_sr: List[int] = []
+    names: List[str] = []
+    for beatmapset in beatmapsets.values():
+        columns["id"].append(beatmapset["id"])
+        columns["length"].append(beatmapset["length"])
+        columns["ranked_date"].append(beatmapset["ranked_date"])
+        columns["status"].append(statuses.index(beatmapset["status"]))
+        columns["nsfw"].append(beatmapset["nsfw"])
+        columns["diff_start"].append(len(columns["diff_id"]))
+        for beatmap in beatmapset["beatmaps"]:
+            if isinstance(beatmap["sr"], int):
+                integral_sr.append(len(columns["diff_id"]))
+            columns["diff_id"].append(beatmap["id"])
+            columns["diff_mode"].append(modes.index(beatmap["mode"]))
+            columns["diff_sr"].append(beatmap["sr"])
+        names += beatmapset["artist"], beatmapset["title"]
+    columns["diff_start"].append(len(columns["diff_id"]))
+
+    header = {
+        "version": INDEX_VERSION,
+        "statuses": statuses,
+        "modes": modes,
+        "integral_sr": integral_sr,
+        "itemsizes": {name: column.itemsize for name, column in columns.items()},
+        "lengths": {name: len(column) for name, column in columns.items()},
+    }
+    data = [json.dumps(header, separators=(",", ":")).encode(), b"\n"]
+    for column in columns.values():
+        if sys.byteorder != "little":
+            column.byteswap()
+        data.append(column.tobytes())
+    data.append("\0".join(names).encode())
+    return b"".join(data)
+
+
+_song_index: Optional[SongIndex] = None
+
+
+def get_song_index() -> SongIndex:
+    """Loads the prebuilt index on first use."""
+    global _song_index
+    if _song_index is None:
+        _song_index = SongIndex(pkgutil.get_data(__name__, INDEX_FILE))
+    return _song_index
+
+
+if __name__ == "__main__":
+    directory = Path(__file__).parent
+    with open(directory / SONG_DATA_FILE, encoding="utf-8") as song_data_file:
+        index = build_index(json.load(song_data_file))
+    with open(directory / INDEX_FILE, "wb") as index_file:
+        index_file.write(index)
+    print(f"Wrote {len(SongIndex(index))} beatmapsets to {directory / INDEX_FILE}.")
@@ -2,7 +2,8 @@ import logging
 from BaseClasses import Region, Tutorial
 from Options import OptionError
 from worlds.AutoWorld import WebWorld, World
-from .Items import OsuItem, item_data_table, item_table, osu_song_data, osu_song_pool, find_beatmapset
+from .Items import OsuItem, item_data_table, item_table, get_song_data, osu_song_pool, find_beatmapset
+from .SongIndex import get_song_index
 from .Locations import OsuLocation, location_table, location_data_table
 from .Options import OsuOptions
 from .Regions import region_data_table
@@ -120,7 +121,7 @@ class OsuWorld(World):
         if self.options.shuffle_included_songs:
             for beatmapset in sorted(self.options.include_songs.value, key=int, reverse=True):
                 # First get the song data entry for the ID
-                song_entry = deepcopy(find_beatmapset(int(beatmapset)))
+                song_entry = find_beatmapset(int(beatmapset))
                 # Get the eligible difficulties, if there are any
                 eligibile_diffs = self.check_difficulties(song_entry)
                 if eligibile_diffs and self.options.difficulty_sync.value == 2:
@@ -138,10 +139,11 @@ class OsuWorld(World):
             self.random.shuffle(include_list)
 
         else:
-            include_list = deepcopy(song_data_raw)
+            # only the first song_count + 1 songs get paired, included songs get inserted in front of the rest
+            include_list = song_data_raw[:song_count + 1]
             for beatmapset in sorted(self.options.include_songs.value, key=int, reverse=True):
                 # First get the song data entry for the ID
-                song_entry = deepcopy(find_beatmapset(int(beatmapset)))
+                song_entry = find_beatmapset(int(beatmapset))
                 # Get the eligible difficulties, if there are any
                 eligibile_diffs = self.check_difficulties(song_entry)
                 if eligibile_diffs and self.options.difficulty_sync.value == 2:
@@ -154,10 +156,9 @@ class OsuWorld(World):
                 song_entry['diffs'] = eligibile_diffs
                 include_list.insert(self.options.starting_songs, song_entry)
 
-        song_data = deepcopy(include_list)
-
-        for generic_song, osu_song in zip((self.starting_songs + self.additional_songs + ["Victory"]), song_data):
-            self.pairs[generic_song] = osu_song
+        # eligible songs share their beatmaps with the song data, so each paired song gets a copy of its own
+        for generic_song, osu_song in zip((self.starting_songs + self.additional_songs + ["Victory"]), include_list):
+            self.pairs[generic_song] = deepcopy(osu_song)
 
         for song in self.starting_songs:
             self.multiworld.push_precollected(self.create_item(song))
@@ -171,13 +172,23 @@ class OsuWorld(World):
             self.location_count = minimum_location_count
 
     def get_eligible_songs(self) -> list[dict]:
-        song_list = []
-        for beatmapset in osu_song_data:
-            eligibile_diffs = self.check_eligibility(beatmapset)
-            if not eligibile_diffs:
-                continue
+        song_index = get_song_index()
+        song_data = get_song_data()
+        # Included Songs are handled elsewhere, and we don't want duplicates
+        excluded_ids = {int(beatmapset_id) for beatmapset_id
+                        in self.options.include_songs.value | self.options.exclude_songs.value}
+        allowed_statuses = set(song_index.statuses)
+        if not self.options.enable_loved:
+            allowed_statuses.discard('loved')
+        difficulty_ranges = {name: (mode.minimum_difficulty, mode.maximum_difficulty)
+                             for name, mode in self.modes.items()}
 
-            eligibile_beatmapset = copy(beatmapset)
+        song_list = []
+        for position, eligibile_diffs in song_index.find_eligible(
+                excluded_ids, self.options.minimum_length.value, self.options.maximum_length.value,
+                bool(self.options.explicit_lyrics), allowed_statuses, self.options.minimum_age.value,
+                self.options.maximum_age.value, difficulty_ranges):
+            eligibile_beatmapset = copy(song_data[position])
             if self.options.difficulty_sync.value == 2:  # 2 = Strict_random
                 eligibile_diffs = [self.random.choice(eligibile_diffs)]
             eligibile_beatmapset['diffs'] = eligibile_diffs
@@ -185,23 +196,6 @@ class OsuWorld(World):
 
         return song_list
 
-    def check_eligibility(self, beatmapset):
-        # Check each of the settings to see if the song cannot be included
-        if str(beatmapset["id"]) in self.options.include_songs.value.union(self.options.exclude_songs.value):
-            return False  # Included Songs are handled elsewhere, and we don't want duplicates
-        if beatmapset["length"] > self.options.maximum_length:
-            return False
-        if beatmapset["length"] < self.options.minimum_length:
-            return False
-        if (not self.options.explicit_lyrics) and beatmapset["nsfw"]:
-            return False
-        if beatmapset["status"] == 'loved' and (not self.options.enable_loved):
-            return False
-        if not (self.options.minimum_age >= beatmapset["ranked_date"] >= self.options.maximum_age):
-            return False
-        # If the song is legal, start looking for difficulties
-        return self.check_difficulties(beatmapset)
-
     def check_difficulties(self, beatmapset):
         found_difficulties = []
         # Check each beatmap of the set individually
@@ -0,0 +1,58 @@
+import json
+import pkgutil
+import unittest
+
+from ..Items import find_beatmapset, get_song_data
+from ..SongIndex import INDEX_FILE, SONG_DATA_FILE, build_index, get_song_index
+
+
+class TestSongIndex(unittest.TestCase):
+    def test_index_is_up_to_date(self) -> None:
+        """Tests that the shipped index was rebuilt after the last change to the song data."""
+        packs = json.loads(pkgutil.get_data("worlds.osu", SONG_DATA_FILE))
+        self.assertEqual(build_index(packs), pkgutil.get_data("worlds.osu", INDEX_FILE),
+                         "Rebuild the index with `python worlds/osu/SongIndex.py`.")
+
+    def test_records_match_song_data(self) -> None:
+        """Tests that records built from the index are the deduplicated beatmapsets of the song data."""
+        packs = json.loads(pkgutil.get_data("worlds.osu", SONG_DATA_FILE))
+        beatmapsets = []
+        for pack in packs:
+            for beatmapset in pack["beatmapsets"]:
+                if beatmapset not in beatmapsets:
+                    beatmapsets.append(beatmapset)
+        # compare the serialized form as well, so an integer star rating doesn't turn into a float
+        self.assertEqual(json.dumps(get_song_data()), json.dumps(beatmapsets))
+
+    def test_find_beatmapset(self) -> None:
+        song_index = get_song_index()
+        for position in (0, len(song_index) // 2, len(song_index) - 1):
+            self.assertEqual(find_beatmapset(song_index.id[position]), get_song_data()[position])
+        with self.assertRaises(ValueError):
+            find_beatmapset(-1)
+
+    def test_find_eligible(self) -> None:
+        """Tests that filtering on the columns finds the same beatmapsets and beatmaps as checking each record."""
+        song_index = get_song_index()
+        all_modes = {mode: (0, 2000) for mode in song_index.modes}
+        cases = (
+            ({song_index.id[1], song_index.id[5]}, 30, 300, False, {"ranked", "approved"}, 2025, 2007,
+             {**{mode: (-1, -1) for mode in song_index.modes}, "osu": (200, 450)}),
+            (set(), 0, 2200, True, set(song_index.statuses), 2025, 2007, all_modes),
+            (set(), 100, 200, True, {"loved"}, 2020, 2012, {**all_modes, "taiko": (-1, -1), "4k": (400, 400)}),
+        )
+        for excluded_ids, minimum_length, maximum_length, allow_nsfw, statuses, newest, oldest, ranges in cases:
+            expected = []
+            for position, beatmapset in enumerate(get_song_data()):
+                if beatmapset["id"] in excluded_ids or not minimum_length <= beatmapset["length"] <= maximum_length \
+                        or (beatmapset["nsfw"] and not allow_nsfw) or beatmapset["status"] not in statuses \
+                        or not newest >= beatmapset["ranked_date"] >= oldest:
+                    continue
+                diffs = [beatmap["id"] for beatmap in beatmapset["beatmaps"]
+                         if ranges[beatmap["mode"]][0] <= beatmap["sr"] * 100 <= ranges[beatmap["mode"]][1]]
+                if diffs:
+                    expected.append((position, diffs))
+            with self.subTest(ranges=ranges):
+                self.assertTrue(expected)
+                self.assertEqual(song_index.find_eligible(excluded_ids, minimum_length, maximum_length, allow_nsfw,
+                                                          statuses, newest, oldest, ranges), expected)